@@ -2,6 +2,7 @@
 
 from pathlib import Path
 import environ
+from django.core.exceptions import ImproperlyConfigured
 import os
 import sys
 
@@ -39,6 +40,19 @@ env = environ.Env(
     VAPID_PUBLIC_KEY=(str, ''),
     VAPID_PRIVATE_KEY=(str, ''),
     VAPID_ADMIN_EMAIL=(str, ''),
+
+    # Shared cache (leave empty for per-process memory cache)
+    REDIS_URL=(str, ''),
+
+    # Where sessions live: 'cache' (with database fallback; needs REDIS_URL),
+    # 'cookie' or 'db' (leave empty for 'cache' with Redis, 'db' without)
+    SESSION_STORE=(str, ''),
+
+    # Bearer token Prometheus must send to /metrics (leave empty to allow anyone)
+    METRICS_TOKEN=(str, ''),
+
+    # Key for signing API access/refresh tokens (leave empty to use SECRET_KEY)
+    JWT_SIGNING_KEY=(str, ''),
 )
 environ.Env.read_env(os.path.join(BASE_DIR, '.env'))
 
@@ -66,7 +80,6 @@ INSTALLED_APPS = [
     'rest_framework.authtoken',
     'corsheaders',
     'channels',
-    'django_cleanup.apps.CleanupConfig',
     'webpush',
     # Allauth apps
     'allauth',
@@ -79,11 +92,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'portal.middleware.RequestTimingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'portal.middleware.ProfileAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
@@ -132,6 +146,61 @@ else:
         }
     }
 
+# Cache
+# Use Redis when REDIS_URL is set so cached data and its invalidation are
+# shared by every worker; otherwise fall back to a per-process memory cache.
+if env('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': env('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Sessions (see portal/sessions.py): 'cache' reads them from the cache above
+# with a write-through copy in the database, 'cookie' keeps them in a signed
+# cookie (small payloads only), 'db' is Django's database store. The cache
+# store needs the cache to be shared: with the per-process memory cache, a
+# logout on one worker would leave the session live on the others.
+SESSION_STORE = env('SESSION_STORE') or ('cache' if env('REDIS_URL') else 'db')
+if SESSION_STORE == 'cache' and not env('REDIS_URL'):
+    raise ImproperlyConfigured('SESSION_STORE=cache needs a shared cache; set REDIS_URL or use SESSION_STORE=db.')
+SESSION_ENGINE = {
+    'cache': 'portal.sessions',
+    'cookie': 'django.contrib.sessions.backends.signed_cookies',
+    'db': 'django.contrib.sessions.backends.db',
+}[SESSION_STORE]
+
+# Channel layer for the live donation feed (see portal/realtime.py)
+# Redis lets every ASGI worker reach every socket; tests always use the
+# in-process layer.
+if env('REDIS_URL') and 'test' not in sys.argv:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [env('REDIS_URL')]},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
+
+# Dashboard counters are invalidated by signals; this is only a safety net.
+STATS_CACHE_TIMEOUT = 300
+
+# Public map data and the anonymous landing page (see portal/page_cache.py)
+PAGE_CACHE_TIMEOUT = 600  # server-side cache lifetime
+ANONYMOUS_PAGE_MAX_AGE = 60  # Cache-Control max-age for browsers and proxies
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -174,9 +243,11 @@ EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL')
 
 # Django Allauth Configuration
+# The stock ModelBackend and allauth backend, loading the user's profile in
+# the same query (see portal/backends.py)
 AUTHENTICATION_BACKENDS = [
-    'django.contrib.auth.backends.ModelBackend',
-    'allauth.account.auth_backends.AuthenticationBackend',
+    'portal.backends.ModelBackend',
+    'portal.backends.AuthenticationBackend',
 ]
 
 SITE_ID = 1 # Changed this to the ID of your ngrok site
@@ -224,3 +295,86 @@ WEBPUSH_SETTINGS = {
     "VAPID_PRIVATE_KEY": env('VAPID_PRIVATE_KEY'),
     "VAPID_ADMIN_EMAIL": env('VAPID_ADMIN_EMAIL')
 }
+WEBPUSH_MAX_WORKERS = 8  # concurrent push sends per process
+WEBPUSH_TIMEOUT = 5  # seconds per push request
+WEBPUSH_TTL = 3600  # seconds the push service may hold an undelivered message
+
+# Geo-targeted donation notifications (see portal/notifications.py)
+LOCATION_CELL_DEGREES = 0.1  # ~11 km cells; re-save volunteer profiles after changing
+NOTIFY_RADIUS_KM = 10
+NOTIFY_REQUIRE_NGO_MEMBERSHIP = False
+
+# Spatial index for nearest-camp lookups (see portal/geo.py)
+CAMP_INDEX_CELL_DEGREES = 0.05  # ~5.5 km grid cells
+CAMP_INDEX_MAX_AGE = 300  # seconds before a full rebuild from the database
+
+# "Donations near me" queries (see portal/geo.py)
+NEARBY_DONATIONS_RADIUS_KM = 15
+NEARBY_DONATIONS_MAX_RADIUS_KM = 100
+NEARBY_DONATIONS_LIMIT = 100
+
+# Multi-stop pickup routes (see portal/routes.py)
+ROUTE_TIME_BUDGET_MS = 50  # cap on 2-opt improvement per plan
+ROUTE_CAMP_CANDIDATES = 3  # nearest camps per route point considered as the end
+ROUTE_CACHE_TIMEOUT = 300
+
+# Batch dispatch of pending donations to opted-in volunteers, run by the
+# dispatch_donations management command (see portal/dispatch.py)
+DISPATCH_MODE = 'suggest'  # or 'assign' to accept matches on the volunteers' behalf
+DISPATCH_RADIUS_KM = 15  # furthest a volunteer is sent to a restaurant
+DISPATCH_REGION_DEGREES = 0.5  # ~55 km regions, each solved on its own
+DISPATCH_SUGGESTION_TIMEOUT = 300  # seconds a suggestion stays visible
+
+# Per-request SQL/template/view timing as Server-Timing headers and JSON log
+# lines on the 'portal.timing' logger (see portal/middleware.py)
+REQUEST_TIMING_ENABLED = True
+REQUEST_TIMING_SAMPLE_RATE = 1.0 if DEBUG else 0.05  # share of requests with query and template timing
+REQUEST_TIMING_SLOW_MS = 500  # log any request slower than this, sampled or not
+REQUEST_TIMING_HEADER = True  # add Server-Timing to sampled responses
+
+# Prometheus scrape endpoint at /metrics (see portal/metrics.py)
+METRICS_TOKEN = env('METRICS_TOKEN')
+
+# Rows per page of the infinite-scroll lists and the REST API (see portal/pagination.py)
+PAGE_SIZE = 25
+
+# REST API: the mobile client sends the access token from /api/login/ as
+# "Bearer <token>" (see portal/tokens.py); DRF "Token <key>" still works.
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'portal.tokens.JWTAuthentication',
+        'rest_framework.authentication.TokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+    ],
+}
+JWT_SIGNING_KEY = env('JWT_SIGNING_KEY')  # empty: sign with SECRET_KEY
+JWT_ACCESS_TOKEN_LIFETIME = 300  # seconds
+JWT_REFRESH_TOKEN_LIFETIME = 14 * 24 * 3600
+JWT_REVOCATION_SYNC_SECONDS = 5  # how stale a worker's in-memory revocation list may get
+
+# Full-text search (see portal/search.py). Leave SEARCH_BACKEND as None to pick
+# MySQL FULLTEXT or SQLite FTS5 from the database in use.
+SEARCH_BACKEND = None  # dotted path, e.g. 'portal.search.SimpleSearchBackend'
+SEARCH_RESULT_LIMIT = 200
+
+# Accepted donations not collected within this window are released by the
+# sweep_expired_acceptances management command (see portal/expiry.py)
+ACCEPTANCE_TIMEOUT_MINUTES = 30
+
+# Most donations one bulk delivery/verification request may move (see portal/transitions.py)
+TRANSITION_BATCH_LIMIT = 200
+
+# Profile picture and banner uploads (see portal/images.py). Uploads are
+# checked from their headers; resized WebP/JPEG copies are made, and replaced
+# files deleted, on a background thread pool.
+IMAGE_MAX_UPLOAD_BYTES = 8 * 1024 * 1024
+IMAGE_MAX_PIXELS = 40_000_000  # width x height; larger images are refused as likely bombs
+IMAGE_ALLOWED_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+IMAGE_VARIANT_WIDTHS = {
+    'profile_picture': (64, 128, 256),
+    'banner_image': (480, 960, 1600),
+}
+IMAGE_WEBP_QUALITY = 80
+IMAGE_JPEG_QUALITY = 85
+IMAGE_PIPELINE_WORKERS = 2
+IMAGE_PIPELINE_ASYNC = True  # False renders inline during the request (e.g. for tests)
@@ -6,14 +6,19 @@ from .models import (
     VolunteerProfile, 
     NGOVolunteer, 
     DonationCamp, 
-    Donation
+    Donation,
+    LeaderboardEntry,
+    SearchEntry
 )
 
-# Register your models here.
+# Register your models here. Models whose __str__ reads a related object
+# fetch it with the change list query instead of once per row.
 admin.site.register(User)
 admin.site.register(RestaurantProfile)
 admin.site.register(NGOProfile)
 admin.site.register(VolunteerProfile)
-admin.site.register(NGOVolunteer)
-admin.site.register(DonationCamp)
-admin.site.register(Donation)
\ No newline at end of file
+admin.site.register(NGOVolunteer, list_select_related=['volunteer', 'ngo'])
+admin.site.register(DonationCamp, list_select_related=['ngo'])
+admin.site.register(Donation, list_select_related=['restaurant'])
+admin.site.register(LeaderboardEntry, list_select_related=['volunteer'])
+admin.site.register(SearchEntry)
\ No newline at end of file
@@ -0,0 +1,11 @@
+# portal/apps.py
+from django.apps import AppConfig
+
+
+class PortalConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'portal'
+
+    def ready(self):
+        # Register model signal handlers (spatial index maintenance, etc.)
+        from . import signals  # noqa: F401
@@ -0,0 +1,57 @@
+# portal/backends.py
+"""
+Authentication backends that load the user's role profile with the user.
+
+Django fetches a signed-in user through the backend that logged them in.
+These subclasses join the three profile tables into that query. Each profile
+is a one-to-one keyed by the user id, and a user has at most one of them, so
+this stays a single indexed lookup. Afterwards ``user.<role>_profile`` (and
+``request.profile``, see ``ProfileAuthenticationMiddleware``) costs nothing.
+A user has no profile until registration step 2, and then the missing
+relation is cached as absent, so ``hasattr`` checks run no query either.
+"""
+from allauth.account import auth_backends as allauth_backends
+from django.contrib.auth import BACKEND_SESSION_KEY, backends, get_user_model
+
+PROFILE_RELATIONS = {
+    'RESTAURANT': 'restaurant_profile',
+    'NGO': 'ngo_profile',
+    'VOLUNTEER': 'volunteer_profile',
+}
+
+# Sessions created before these backends were installed name the stock ones.
+LEGACY_BACKENDS = {
+    'django.contrib.auth.backends.ModelBackend': 'portal.backends.ModelBackend',
+    'allauth.account.auth_backends.AuthenticationBackend': 'portal.backends.AuthenticationBackend',
+}
+
+
+def profile_of(user):
+    """The profile matching ``user.user_type``, or None (anonymous, admin, unregistered)."""
+    relation = PROFILE_RELATIONS.get(getattr(user, 'user_type', None))
+    return getattr(user, relation, None) if relation else None
+
+
+def upgrade_session_backend(session):
+    """Point a session at the profile-loading backend instead of logging it out."""
+    path = session.get(BACKEND_SESSION_KEY)
+    if path in LEGACY_BACKENDS:
+        session[BACKEND_SESSION_KEY] = LEGACY_BACKENDS[path]
+
+
+class ProfileLoadingMixin:
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related(*PROFILE_RELATIONS.values()).get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+class ModelBackend(ProfileLoadingMixin, backends.ModelBackend):
+    pass
+
+
+class AuthenticationBackend(ProfileLoadingMixin, allauth_backends.AuthenticationBackend):
+    pass
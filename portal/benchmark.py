@@ -0,0 +1,253 @@
+# portal/benchmark.py
+"""
+End-to-end view benchmarks.
+
+``run()`` fills the database with a ``seeding`` dataset of a given size, then
+drives each view in ``SCENARIOS`` through the Django test client as the
+matching kind of user. For every view it records latency percentiles, the
+number of SQL queries and the response size, and repeats that for each
+requested dataset size. The ``benchmark_views`` management command runs it
+against a throwaway test database and writes the report as JSON, so runs can
+be diffed and a view whose query count or latency grows with the data is
+caught before it ships.
+
+Scenarios that change state (accepting, delivering) put the data back into
+shape before every timed request; that preparation isn't measured.
+"""
+import time
+
+import numpy as np
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import seeding
+from .geo import camp_index
+from .models import Donation, DonationCamp, User, VolunteerProfile
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+# --- Dataset ---
+
+# Busier than production, so every list has rows to show at small sizes.
+STATUS_WEIGHTS = {'PENDING': 0.4, 'ACCEPTED': 0.02, 'COLLECTED': 0.02, 'VERIFYING': 0.1, 'DELIVERED': 0.46}
+
+
+class Dataset:
+    """Ids of the users the scenarios act as, plus what they act on."""
+
+    def __init__(self, size):
+        self.size = size
+        self.restaurant_id = None
+        self.ngo_id = None
+        self.volunteer_id = None
+        self.camp_id = None
+        self.pending_ids = []
+        self.delivery_ids = []
+        self.counts = {}
+
+
+def build_dataset(size, seed=0):
+    """
+    Seed about ``size`` donations with proportional numbers of restaurants,
+    NGOs, camps and volunteers, and act as the busiest of each, whose lists
+    grow with ``size``.
+    """
+    data = Dataset(size)
+    data.counts = seeding.seed(
+        size, restaurants=max(2, size // 20), ngos=max(2, size // 200), volunteers=max(2, size // 10),
+        seed=seed, prefix='bench', status_weights=STATUS_WEIGHTS,
+    )
+    cache.clear()
+
+    data.restaurant_id = Donation.objects.values_list('restaurant').annotate(n=Count('pk')).order_by('-n', 'restaurant')[0][0]
+    data.ngo_id = DonationCamp.objects.values_list('ngo').annotate(n=Count('donations_received')).order_by('-n', 'ngo')[0][0]
+    volunteer = (VolunteerProfile.objects.filter(registered_ngos__camps__is_active=True, latitude__isnull=False)
+                 .annotate(n=Count('assigned_donations', distinct=True)).order_by('-n', 'pk').first())
+    data.volunteer_id = volunteer.pk
+    data.camp_id = DonationCamp.objects.filter(ngo__volunteers=volunteer, is_active=True).order_by('pk')[0].pk
+    data.pending_ids = list(Donation.objects.filter(status='PENDING').order_by('pk').values_list('pk', flat=True)[:500])
+    data.delivery_ids = list(Donation.objects.filter(status='VERIFYING').order_by('pk').values_list('pk', flat=True)[:5])
+    return data
+
+
+# --- Scenarios ---
+
+class Scenario:
+    """One view request: who sends it, where, and what to set up first."""
+
+    def __init__(self, name, role, target, method='get', prepare=None):
+        self.name = name
+        self.role = role
+        self.target = target
+        self.method = method
+        self.prepare = prepare
+
+    def url(self, data, iteration):
+        if self.prepare is not None:
+            return self.prepare(data, iteration)
+        return self.target if self.target.startswith('/') else reverse(self.target)
+
+
+def _next_acceptance(data, iteration):
+    # Give back whatever earlier iterations accepted so the limit is never hit.
+    Donation.objects.filter(assigned_volunteer_id=data.volunteer_id, status__in=['ACCEPTED', 'COLLECTED']).update(
+        status='PENDING', assigned_volunteer=None, accepted_at=None, collected_at=None,
+    )
+    return reverse('accept_donation', args=[data.pending_ids[iteration % len(data.pending_ids)]])
+
+
+def _load_pickups(data, iteration):
+    Donation.objects.filter(pk__in=data.delivery_ids).update(
+        status='ACCEPTED', assigned_volunteer_id=data.volunteer_id, target_camp=None, delivered_at=None,
+    )
+    return reverse('mark_as_delivered', args=[data.camp_id])
+
+
+SCENARIOS = [
+    Scenario('index', 'anonymous', 'index'),
+    Scenario('restaurant_dashboard', 'restaurant', 'restaurant_dashboard'),
+    Scenario('restaurant_donations', 'restaurant', 'restaurant_donations'),
+    Scenario('restaurant_profile', 'restaurant', 'restaurant_profile'),
+    Scenario('restaurant_settings', 'restaurant', 'restaurant_settings'),
+    Scenario('ngo_dashboard_overview', 'ngo', 'ngo_dashboard_overview'),
+    Scenario('ngo_manage_camps', 'ngo', 'ngo_manage_camps'),
+    Scenario('ngo_manage_camps_history', 'ngo', '/dashboard/ngo/camps/?view=history'),
+    Scenario('ngo_manage_volunteers', 'ngo', 'ngo_manage_volunteers'),
+    Scenario('ngo_profile', 'ngo', 'ngo_profile'),
+    Scenario('ngo_settings', 'ngo', 'ngo_settings'),
+    Scenario('volunteer_dashboard', 'volunteer', 'volunteer_dashboard'),
+    Scenario('volunteer_manage_pickups', 'volunteer', 'volunteer_manage_pickups'),
+    Scenario('volunteer_delivery_route', 'volunteer', '/dashboard/volunteer/pickups/?view=delivery_route'),
+    Scenario('volunteer_history', 'volunteer', '/dashboard/volunteer/pickups/?view=history'),
+    Scenario('volunteer_manage_camps', 'volunteer', 'volunteer_manage_camps'),
+    Scenario('volunteer_profile', 'volunteer', 'volunteer_profile'),
+    Scenario('volunteer_settings', 'volunteer', 'volunteer_settings'),
+    Scenario('volunteer_leaderboard', 'volunteer', 'volunteer_leaderboard'),
+    Scenario('nearby_donations_api', 'volunteer', 'nearby_donations_api'),
+    Scenario('accept_donation', 'volunteer', 'accept_donation', method='post', prepare=_next_acceptance),
+    Scenario('mark_as_delivered', 'volunteer', 'mark_as_delivered', method='post', prepare=_load_pickups),
+]
+
+
+# --- Running ---
+
+def _clients(data):
+    clients = {'anonymous': Client()}
+    for role, user_id in (('restaurant', data.restaurant_id), ('ngo', data.ngo_id), ('volunteer', data.volunteer_id)):
+        clients[role] = Client()
+        clients[role].force_login(User.objects.get(pk=user_id))
+    return clients
+
+
+def _summarise(timings, queries, sizes, statuses):
+    ms = np.array(timings)
+    summary = {f'p{p}_ms': round(float(np.percentile(ms, p)), 2) for p in PERCENTILES}
+    summary.update({
+        'max_ms': round(float(ms.max()), 2),
+        'mean_ms': round(float(ms.mean()), 2),
+        'queries': max(queries),
+        'queries_min': min(queries),
+        'bytes': int(np.median(sizes)),
+        'statuses': sorted(statuses),
+    })
+    return summary
+
+
+def measure(client, scenario, data, repeat, warmup=1):
+    """Time ``repeat`` requests for ``scenario`` after ``warmup`` untimed ones."""
+    timings, queries, sizes, statuses = [], [], [], set()
+    for iteration in range(warmup + repeat):
+        url = scenario.url(data, iteration)
+        send = getattr(client, scenario.method)
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = send(url)
+            elapsed = (time.perf_counter() - started) * 1000
+        if iteration < warmup:
+            continue
+        timings.append(elapsed)
+        queries.append(len(captured))
+        sizes.append(len(response.content))
+        statuses.add(response.status_code)
+    return _summarise(timings, queries, sizes, statuses)
+
+
+def _reset():
+    call_command('flush', interactive=False, verbosity=0)
+    camp_index.invalidate()
+    cache.clear()
+
+
+def scaling(runs):
+    """Compare each view between the smallest and the largest dataset."""
+    if len(runs) < 2:
+        return {}
+    small, large = runs[0], runs[-1]
+    report = {}
+    for name, before in small['views'].items():
+        after = large['views'].get(name)
+        if after is None:
+            continue
+        report[name] = {
+            'queries': [before['queries'], after['queries']],
+            'p50_ms': [before['p50_ms'], after['p50_ms']],
+            'bytes': [before['bytes'], after['bytes']],
+            'latency_ratio': round(after['p50_ms'] / before['p50_ms'], 2) if before['p50_ms'] else None,
+            'queries_grow': after['queries'] > before['queries'],
+        }
+    return report
+
+
+def run(sizes, repeat=20, warmup=1, only=None, seed=0, log=None):
+    """
+    Benchmark every scenario (or those named in ``only``) once per dataset
+    size. Wipes the database between sizes, so only point it at a test
+    database. Returns the JSON-serialisable report.
+    """
+    scenarios = [s for s in SCENARIOS if not only or s.name in only]
+    runs = []
+    for size in sorted(sizes):
+        _reset()
+        data = build_dataset(size, seed=seed)
+        clients = _clients(data)
+        views = {}
+        for scenario in scenarios:
+            views[scenario.name] = measure(clients[scenario.role], scenario, data, repeat, warmup)
+            if log:
+                log(size, scenario.name, views[scenario.name])
+        runs.append({'size': size, 'counts': data.counts, 'views': views})
+    return {
+        'created': timezone.now().isoformat(),
+        'repeat': repeat,
+        'warmup': warmup,
+        'seed': seed,
+        'runs': runs,
+        'scaling': scaling(runs),
+    }
+
+
+def compare(report, baseline, tolerance=1.5):
+    """
+    Regressions of ``report`` against an earlier ``baseline`` report: any view
+    issuing more queries than before, or whose median latency grew by more
+    than ``tolerance`` times, at the same dataset size.
+    """
+    previous = {run['size']: run['views'] for run in baseline.get('runs', [])}
+    regressions = []
+    for entry in report['runs']:
+        for name, now in entry['views'].items():
+            before = previous.get(entry['size'], {}).get(name)
+            if before is None:
+                continue
+            if now['queries'] > before['queries']:
+                regressions.append(f"{name} @ {entry['size']}: {before['queries']} -> {now['queries']} queries")
+            if before['p50_ms'] and now['p50_ms'] > before['p50_ms'] * tolerance:
+                regressions.append(f"{name} @ {entry['size']}: p50 {before['p50_ms']} -> {now['p50_ms']} ms")
+    return regressions
@@ -0,0 +1,31 @@
+# portal/consumers.py
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from . import realtime
+
+
+class DonationFeedConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Pushes donation lifecycle events to a signed-in dashboard.
+
+    The socket joins the groups ``realtime.groups_for_user`` picks for the
+    user and forwards whatever is sent to them; clients don't send anything.
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close()
+            return
+        self.feed_groups = await database_sync_to_async(realtime.groups_for_user)(user)
+        for group in self.feed_groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        for group in getattr(self, 'feed_groups', []):
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def donation_event(self, message):
+        await self.send_json({'event': message['event'], 'donations': message['donations']})
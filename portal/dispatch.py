@@ -0,0 +1,241 @@
+# portal/dispatch.py
+"""
+Batch dispatch of pending donations to volunteers.
+
+Instead of first-come-first-served acceptance, a periodic run (the
+``dispatch_donations`` management command) matches every PENDING donation to
+an opted-in volunteer so that the total travel distance is as small as
+possible:
+
+* Volunteers take part when they set ``dispatch_opt_in``, have a location and
+  belong to an NGO with an active camp (somewhere to deliver to).
+* Each volunteer has ``MAX_ACTIVE_PICKUPS`` minus their active pickups free
+  slots; a volunteer with three free slots becomes three columns of the cost
+  matrix.
+* A pair costs the volunteer-to-restaurant distance, and pairs further apart
+  than ``DISPATCH_RADIUS_KM`` are not allowed.
+
+Donations are processed region by region (``DISPATCH_REGION_DEGREES`` grid
+cells around the restaurants), each region solved as a rectangular
+assignment problem with the Hungarian algorithm below. Volunteers near a
+region border can serve several regions; their free slots carry over between
+regions.
+
+``DISPATCH_MODE = 'assign'`` moves each match through ``transitions.accept``
+as if the volunteer had clicked accept; ``'suggest'`` only caches the matches
+so the pickups list can highlight them.
+"""
+import logging
+import math
+import time
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from . import transitions
+from .geo import bounding_box, haversine_km
+from .models import Donation, VolunteerProfile
+
+logger = logging.getLogger(__name__)
+
+SUGGEST = 'suggest'
+ASSIGN = 'assign'
+
+# Cost of a forbidden pair; far above any real distance.
+INFEASIBLE = 1e9
+
+
+def linear_sum_assignment(cost):
+    """
+    Minimum-cost assignment for a rectangular cost matrix.
+
+    Returns ``(rows, cols)`` index arrays pairing every row with a distinct
+    column when there are fewer rows than columns, and vice versa. This is
+    the O(n^2 m) shortest augmenting path form of the Hungarian algorithm,
+    with the inner scan over columns vectorised.
+    """
+    cost = np.asarray(cost, dtype=float)
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+    if n == 0:
+        return np.array([], dtype=int), np.array([], dtype=int)
+
+    # 1-based as in the textbook form; row/column 0 is the virtual start.
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=int)  # owner[j]: row matched to column j, 0 if none
+    way = np.zeros(m + 1, dtype=int)
+    for i in range(1, n + 1):
+        owner[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            free = np.flatnonzero(~used[1:]) + 1
+            reduced = cost[i0 - 1, free - 1] - u[i0] - v[free]
+            better = reduced < minv[free]
+            minv[free[better]] = reduced[better]
+            way[free[better]] = j0
+            j1 = free[np.argmin(minv[free])]
+            delta = minv[j1]
+            visited = np.flatnonzero(used)
+            u[owner[visited]] += delta
+            v[visited] -= delta
+            minv[free] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+
+    cols = np.flatnonzero(owner[1:])
+    rows = owner[cols + 1] - 1
+    order = np.argsort(rows)
+    rows, cols = rows[order], cols[order]
+    return (cols, rows) if transposed else (rows, cols)
+
+
+# --- Inputs ---
+
+def eligible_volunteers():
+    """Opted-in volunteers with a location, an active camp to deliver to and free slots."""
+    volunteers = (
+        VolunteerProfile.objects.filter(
+            dispatch_opt_in=True, latitude__isnull=False, longitude__isnull=False,
+            registered_ngos__camps__is_active=True,
+        )
+        .distinct()
+        .only('pk', 'latitude', 'longitude')
+        .annotate(active=Count(
+            'assigned_donations', filter=Q(assigned_donations__status__in=transitions.ACTIVE_STATUSES), distinct=True,
+        ))
+    )
+    return [v for v in volunteers if v.active < transitions.MAX_ACTIVE_PICKUPS]
+
+
+def pending_by_region(region_degrees):
+    """``{region: [(donation_id, lat, lon), ...]}`` for pending donations with a location."""
+    rows = Donation.objects.filter(
+        status='PENDING', restaurant__latitude__isnull=False, restaurant__longitude__isnull=False,
+    ).order_by('created_at', 'pk').values_list('pk', 'restaurant__latitude', 'restaurant__longitude')
+    regions = defaultdict(list)
+    for pk, lat, lon in rows:
+        regions[(math.floor(lat / region_degrees), math.floor(lon / region_degrees))].append((pk, lat, lon))
+    return regions
+
+
+# --- Matching ---
+
+def match_region(donations, volunteers, free_slots, radius_km):
+    """
+    Best ``(donation_id, volunteer, distance_km)`` matches for one region.
+    ``free_slots`` (volunteer pk -> slots) is decremented for every match.
+    """
+    lats = np.array([d[1] for d in donations], dtype=float)
+    lons = np.array([d[2] for d in donations], dtype=float)
+    columns, blocks = [], []
+    for volunteer in volunteers:
+        slots = free_slots[volunteer.pk]
+        if slots <= 0:
+            continue
+        distances = haversine_km(volunteer.latitude, volunteer.longitude, lats, lons)
+        reachable = int(np.count_nonzero(distances <= radius_km))
+        if not reachable:
+            continue
+        # One column per slot, but never more slots than reachable donations.
+        for _ in range(min(slots, reachable)):
+            columns.append(volunteer)
+            blocks.append(distances)
+    if not columns:
+        return []
+
+    distances = np.column_stack(blocks)
+    cost = np.where(distances <= radius_km, distances, INFEASIBLE)
+    rows, cols = linear_sum_assignment(cost)
+    matches = []
+    for row, col in zip(rows, cols):
+        if cost[row, col] >= INFEASIBLE:
+            continue
+        volunteer = columns[col]
+        free_slots[volunteer.pk] -= 1
+        matches.append((donations[row][0], volunteer, float(distances[row, col])))
+    return matches
+
+
+def plan(radius_km=None, region_degrees=None):
+    """Every match for the current pending donations, without applying any."""
+    radius_km = radius_km or getattr(settings, 'DISPATCH_RADIUS_KM', 15)
+    region_degrees = region_degrees or getattr(settings, 'DISPATCH_REGION_DEGREES', 0.5)
+    volunteers = eligible_volunteers()
+    if not volunteers:
+        return []
+    free_slots = {v.pk: transitions.MAX_ACTIVE_PICKUPS - v.active for v in volunteers}
+    vol_lats = np.array([v.latitude for v in volunteers], dtype=float)
+    vol_lons = np.array([v.longitude for v in volunteers], dtype=float)
+
+    matches = []
+    for region, donations in sorted(pending_by_region(region_degrees).items()):
+        # Volunteers within reach of any point of the region's cell: a box
+        # around its centre, widened by the distance to its furthest corner.
+        south, west = region[0] * region_degrees, region[1] * region_degrees
+        centre = (south + region_degrees / 2, west + region_degrees / 2)
+        corners_km = haversine_km(*centre, np.array([south, south + region_degrees]), np.array([west, west]))
+        min_lat, max_lat, min_lon, max_lon = bounding_box(*centre, radius_km + float(corners_km.max()))
+        near = (vol_lats >= min_lat) & (vol_lats <= max_lat)
+        if min_lon is not None:
+            near &= (vol_lons >= min_lon) & (vol_lons <= max_lon)
+        candidates = [volunteers[i] for i in np.flatnonzero(near)]
+        if candidates:
+            matches.extend(match_region(donations, candidates, free_slots, radius_km))
+    return matches
+
+
+# --- Applying ---
+
+def suggestion_key(volunteer_id):
+    return f'dispatch:suggested:{volunteer_id}'
+
+
+def suggested_donation_ids(volunteer):
+    """Donation ids the last suggest run picked for ``volunteer``."""
+    return set(cache.get(suggestion_key(volunteer.pk)) or [])
+
+
+def run(mode=None):
+    """
+    Plan and apply one dispatch round. Returns a summary dict of what
+    happened, keyed by outcome.
+    """
+    mode = mode or getattr(settings, 'DISPATCH_MODE', SUGGEST)
+    started = time.perf_counter()
+    matches = plan()
+    summary = {'mode': mode, 'matched': len(matches), 'assigned': 0, 'skipped': 0}
+
+    if mode == ASSIGN:
+        for donation_id, volunteer, _ in matches:
+            if transitions.accept(donation_id, volunteer) == transitions.UPDATED:
+                summary['assigned'] += 1
+            else:
+                # Taken meanwhile, or the volunteer filled up by hand.
+                summary['skipped'] += 1
+    else:
+        by_volunteer = defaultdict(list)
+        for donation_id, volunteer, _ in matches:
+            by_volunteer[volunteer.pk].append(donation_id)
+        cache.set_many(
+            {suggestion_key(pk): ids for pk, ids in by_volunteer.items()},
+            getattr(settings, 'DISPATCH_SUGGESTION_TIMEOUT', 300),
+        )
+
+    summary['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    logger.info('Dispatch round: %s', summary)
+    return summary
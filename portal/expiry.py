@@ -0,0 +1,106 @@
+# portal/expiry.py
+"""
+Release of stale donation acceptances.
+
+A volunteer who accepts a donation has ``ACCEPTANCE_TIMEOUT_MINUTES`` to
+collect it; after that it goes back to PENDING. The work is done in batches
+by the ``sweep_expired_acceptances`` management command rather than by the
+views, and a named lock keeps concurrent sweepers on different nodes from
+doing it twice.
+"""
+import logging
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from . import metrics, realtime, stats
+from .models import Donation
+
+logger = logging.getLogger(__name__)
+
+
+def acceptance_cutoff(now=None):
+    """Acceptances older than this are expired."""
+    minutes = getattr(settings, 'ACCEPTANCE_TIMEOUT_MINUTES', 30)
+    return (now or timezone.now()) - timedelta(minutes=minutes)
+
+
+def release_expired_acceptances(batch_size=500, now=None):
+    """
+    Move ACCEPTED donations whose acceptance has timed out back to PENDING.
+
+    Rows are released ``batch_size`` at a time so each UPDATE holds its row
+    locks only briefly. Returns the number of donations released.
+    """
+    cutoff = acceptance_cutoff(now)
+    released = 0
+    while True:
+        rows = list(
+            Donation.objects.filter(status='ACCEPTED', accepted_at__lt=cutoff)
+            .order_by('accepted_at')
+            .values_list('pk', 'restaurant_id', 'assigned_volunteer_id')[:batch_size]
+        )
+        if not rows:
+            break
+        # Re-check the status guard in the UPDATE itself: a volunteer may have
+        # marked one of these as collected since the SELECT.
+        released += Donation.objects.filter(
+            pk__in=[row[0] for row in rows], status='ACCEPTED', accepted_at__lt=cutoff
+        ).update(status='PENDING', assigned_volunteer=None, accepted_at=None)
+        # .update() skips the model signals, so drop the cached counters here.
+        stats.invalidate_donations((restaurant_id, volunteer_id, None) for _, restaurant_id, volunteer_id in rows)
+        # Rows a volunteer collected meanwhile go out with their current status.
+        realtime.publish(realtime.RELEASED, [row[0] for row in rows], {row[0]: row[2] for row in rows})
+        if len(rows) < batch_size:
+            break
+    if released:
+        metrics.ACCEPTANCES_TIMED_OUT.inc(released)
+    return released
+
+
+@contextmanager
+def named_lock(name, timeout=300):
+    """
+    Non-blocking cluster-wide lock; yields True if this process holds it.
+
+    MySQL uses ``GET_LOCK``, which is released automatically if the holder's
+    connection dies. Other databases fall back to ``cache.add``, which is only
+    cluster-wide when a shared cache backend (Redis, Memcached, database) is
+    configured.
+    """
+    if connection.vendor == 'mysql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT GET_LOCK(%s, 0)', [name])
+            acquired = cursor.fetchone()[0] == 1
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT RELEASE_LOCK(%s)', [name])
+        return
+
+    key = f'lock:{name}'
+    token = uuid.uuid4().hex
+    acquired = cache.add(key, token, timeout)
+    try:
+        yield acquired
+    finally:
+        if acquired and cache.get(key) == token:
+            cache.delete(key)
+
+
+def sweep(batch_size=500):
+    """Run one locked sweep. Returns the number released, or None if another node holds the lock."""
+    with named_lock('portal.sweep_expired_acceptances') as acquired:
+        if not acquired:
+            return None
+        released = release_expired_acceptances(batch_size=batch_size)
+        if released:
+            logger.info('Released %s expired acceptance(s)', released)
+        return released
@@ -2,6 +2,18 @@
 
 from django import forms
 from .models import DonationCamp, Donation, NGOProfile, RestaurantProfile, VolunteerProfile
+from .images import check_upload
+
+
+class CheckedImageField(forms.ImageField):
+    """
+    Image field that refuses oversized files, unsupported formats and
+    decompression bombs from the header alone, before the upload is decoded.
+    """
+    def to_python(self, data):
+        if data and hasattr(data, 'size'):
+            check_upload(data)
+        return super().to_python(data)
 
 class DonationCampForm(forms.ModelForm):
     """
@@ -62,6 +74,7 @@ class NGOProfileForm(forms.ModelForm):
             'profile_picture': 'Profile Picture (Logo)',
             'banner_image': 'Banner Image (for your public page)',
         }
+        field_classes = {'profile_picture': CheckedImageField, 'banner_image': CheckedImageField}
         widgets = {
             'latitude': forms.HiddenInput(),
             'longitude': forms.HiddenInput(),
@@ -88,6 +101,7 @@ class RestaurantProfileForm(forms.ModelForm):
             'phone_number': 'Public Phone Number',
             'profile_picture': 'Profile Picture (Logo)',
         }
+        field_classes = {'profile_picture': CheckedImageField}
         widgets = {
             'latitude': forms.HiddenInput(),
             'longitude': forms.HiddenInput(),
@@ -107,7 +121,8 @@ class VolunteerProfileForm(forms.ModelForm):
             'address', 
             'latitude', 
             'longitude', 
-            'profile_picture'
+            'profile_picture',
+            'dispatch_opt_in'
         ]
         labels = {
             'full_name': 'Full Name',
@@ -115,7 +130,9 @@ class VolunteerProfileForm(forms.ModelForm):
             'skills': 'Skills (e.g., Driving, First Aid)',
             'address': 'Your Primary Address',
             'profile_picture': 'Profile Picture',
+            'dispatch_opt_in': 'Assign nearby donations to me automatically',
         }
+        field_classes = {'profile_picture': CheckedImageField}
         widgets = {
             'latitude': forms.HiddenInput(),
             'longitude': forms.HiddenInput(),
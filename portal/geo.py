@@ -0,0 +1,318 @@
+# portal/geo.py
+"""
+Geospatial helpers for the Connect2Give application.
+
+The main piece is an in-process grid index over active ``DonationCamp``
+coordinates, so "nearest camp" lookups only measure a handful of candidate
+camps instead of running ``geodesic`` against every active camp. There is
+also a radius query for pending donations that prefilters with a bounding
+box in SQL and ranks the survivors with a vectorised haversine, and a coarse
+location-cell scheme used to find volunteers near a point.
+"""
+import math
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from geopy.distance import geodesic
+
+# Mean Earth radius used by the haversine helpers.
+EARTH_RADIUS_KM = 6371.0088
+
+# Conservative kilometres per degree of great-circle arc. The WGS-84 meridian
+# degree is never shorter than ~110.57 km, so this stays a lower bound.
+KM_PER_DEGREE_LOWER_BOUND = 110.0
+
+
+class CampSpatialIndex:
+    """
+    Grid (bucket) index over active donation camps.
+
+    Camps are bucketed by ``(floor(lat / cell), floor(lon / cell))``. A
+    k-nearest query scans rings of cells around the query point and stops as
+    soon as no unseen cell can hold anything closer than the current k-th
+    candidate. Distances are always computed with ``geodesic`` so the result
+    matches a brute-force loop exactly.
+
+    The index is loaded lazily from the database, kept up to date by the
+    ``DonationCamp`` signal handlers and fully rebuilt after
+    ``CAMP_INDEX_MAX_AGE`` seconds so that camps changed in other worker
+    processes are eventually picked up as well.
+    """
+
+    def __init__(self, cell_degrees=None, max_age=None):
+        self.cell_degrees = cell_degrees or getattr(settings, 'CAMP_INDEX_CELL_DEGREES', 0.05)
+        self.max_age = max_age if max_age is not None else getattr(settings, 'CAMP_INDEX_MAX_AGE', 300)
+        self._lock = threading.RLock()
+        self._cells = {}     # (row, col) -> {camp_pk: (ngo_id, lat, lon)}
+        self._entries = {}   # camp_pk -> (row, col)
+        self._loaded_at = None
+
+    # --- Maintenance ---
+
+    def _cell_for(self, lat, lon):
+        return (math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees))
+
+    def add(self, camp_pk, ngo_id, lat, lon):
+        """Insert or move a camp in the index."""
+        with self._lock:
+            self._remove(camp_pk)
+            cell = self._cell_for(lat, lon)
+            self._cells.setdefault(cell, {})[camp_pk] = (ngo_id, lat, lon)
+            self._entries[camp_pk] = cell
+
+    def discard(self, camp_pk):
+        """Remove a camp from the index if it is present."""
+        with self._lock:
+            self._remove(camp_pk)
+
+    def _remove(self, camp_pk):
+        cell = self._entries.pop(camp_pk, None)
+        if cell is None:
+            return
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.pop(camp_pk, None)
+            if not bucket:
+                del self._cells[cell]
+
+    def update_from_camp(self, camp):
+        """Sync a single ``DonationCamp`` instance (called from signals)."""
+        if camp.is_active and camp.latitude and camp.longitude:
+            self.add(camp.pk, camp.ngo_id, camp.latitude, camp.longitude)
+        else:
+            self.discard(camp.pk)
+
+    def rebuild(self):
+        """Reload every active, geolocated camp from the database."""
+        from .models import DonationCamp
+
+        rows = DonationCamp.objects.filter(
+            is_active=True, latitude__isnull=False, longitude__isnull=False
+        ).values_list('pk', 'ngo_id', 'latitude', 'longitude')
+        with self._lock:
+            self._cells = {}
+            self._entries = {}
+            for pk, ngo_id, lat, lon in rows:
+                if lat and lon:
+                    self.add(pk, ngo_id, lat, lon)
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """Force a full rebuild on the next query."""
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age:
+                self.rebuild()
+
+    def __len__(self):
+        return len(self._entries)
+
+    # --- Queries ---
+
+    def nearest(self, lat, lon, k=1, ngo_ids=None):
+        """
+        Return up to ``k`` ``(distance_km, camp_pk)`` tuples sorted by distance.
+
+        Args:
+            lat, lon: Query point.
+            k: Number of neighbours to return.
+            ngo_ids: Optional iterable of NGO ids; only their camps are considered.
+        """
+        self._ensure_loaded()
+        if ngo_ids is not None:
+            ngo_ids = set(ngo_ids)
+            if not ngo_ids:
+                return []
+
+        origin = (lat, lon)
+        with self._lock:
+            if not self._cells:
+                return []
+
+            rows = [cell[0] for cell in self._cells]
+            cols = [cell[1] for cell in self._cells]
+            min_row, max_row, min_col, max_col = min(rows), max(rows), min(cols), max(cols)
+            centre_row, centre_col = self._cell_for(lat, lon)
+
+            best = []  # sorted list of (distance_km, camp_pk)
+            ring = 0
+            while True:
+                for cell in self._ring_cells(centre_row, centre_col, ring):
+                    bucket = self._cells.get(cell)
+                    if not bucket:
+                        continue
+                    for camp_pk, (ngo_id, c_lat, c_lon) in bucket.items():
+                        if ngo_ids is not None and ngo_id not in ngo_ids:
+                            continue
+                        best.append((geodesic(origin, (c_lat, c_lon)).km, camp_pk))
+                best.sort()
+                del best[k:]
+
+                covers_all = (
+                    centre_row - ring <= min_row and centre_row + ring >= max_row
+                    and centre_col - ring <= min_col and centre_col + ring >= max_col
+                )
+                if covers_all:
+                    return best
+                if len(best) == k and best[-1][0] <= self._unseen_lower_bound_km(lat, lon, centre_row, centre_col, ring):
+                    return best
+                ring += 1
+
+    @staticmethod
+    def _ring_cells(row, col, ring):
+        if ring == 0:
+            yield (row, col)
+            return
+        for c in range(col - ring, col + ring + 1):
+            yield (row - ring, c)
+            yield (row + ring, c)
+        for r in range(row - ring + 1, row + ring):
+            yield (r, col - ring)
+            yield (r, col + ring)
+
+    def _unseen_lower_bound_km(self, lat, lon, row, col, ring):
+        """
+        Lower bound on the distance from (lat, lon) to any point outside the
+        square of cells already scanned.
+        """
+        cell = self.cell_degrees
+        south = (row - ring) * cell
+        north = (row + ring + 1) * cell
+        west = (col - ring) * cell
+        east = (col + ring + 1) * cell
+
+        lat_gap = min(lat - south, north - lat)
+        lon_gap = min(lon - west, east - lon)
+        if west < -180 or east > 180 or lon_gap >= 90:
+            # The square wraps the antimeridian; don't try to prune.
+            return 0.0
+
+        lat_bound = lat_gap * KM_PER_DEGREE_LOWER_BOUND
+        # Shortest great-circle distance from the point to a meridian lon_gap away.
+        lon_bound = math.degrees(math.asin(
+            min(1.0, math.sin(math.radians(lon_gap)) * math.cos(math.radians(lat)))
+        )) * KM_PER_DEGREE_LOWER_BOUND
+        return min(lat_bound, lon_bound)
+
+
+# Process-wide index instance used by views and kept fresh by signals.
+camp_index = CampSpatialIndex()
+
+
+# --- Location cells ---
+
+def location_cell(lat, lon, cell_degrees=None):
+    """
+    Return the ``"row:col"`` cell key stored on ``VolunteerProfile.location_cell``.
+
+    Changing ``LOCATION_CELL_DEGREES`` means existing keys must be recomputed
+    (re-save the profiles) before cell queries are reliable again.
+    """
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None
+    cell_degrees = cell_degrees or getattr(settings, 'LOCATION_CELL_DEGREES', 0.1)
+    return f'{math.floor(lat / cell_degrees)}:{math.floor(lon / cell_degrees)}'
+
+
+def cells_within(lat, lon, radius_km, cell_degrees=None):
+    """
+    Return every cell key that may contain points within ``radius_km`` of
+    (lat, lon), or ``None`` if the area is too large to enumerate sensibly.
+    """
+    cell_degrees = cell_degrees or getattr(settings, 'LOCATION_CELL_DEGREES', 0.1)
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+    if min_lon is None:
+        return None
+    rows = range(math.floor(min_lat / cell_degrees), math.floor(max_lat / cell_degrees) + 1)
+    cols = range(math.floor(min_lon / cell_degrees), math.floor(max_lon / cell_degrees) + 1)
+    if len(rows) * len(cols) > 2500:
+        return None
+    return [f'{row}:{col}' for row in rows for col in cols]
+
+
+# --- Radius queries ---
+
+def bounding_box(lat, lon, radius_km):
+    """
+    Return ``(min_lat, max_lat, min_lon, max_lon)`` enclosing every point
+    within ``radius_km`` of (lat, lon). Longitude bounds are ``None`` when the
+    circle reaches a pole or crosses the antimeridian.
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(angular)
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), None, None
+
+    dlon = math.degrees(math.asin(min(1.0, math.sin(angular) / math.cos(math.radians(lat)))))
+    min_lon, max_lon = lon - dlon, lon + dlon
+    if min_lon < -180 or max_lon > 180:
+        return min_lat, max_lat, None, None
+    return min_lat, max_lat, min_lon, max_lon
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Vectorised great-circle distance from one point to arrays of points."""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2.0) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def nearby_donations(queryset, lat, lon, radius_km=None, limit=None, after=None):
+    """
+    Return donations from ``queryset`` whose restaurant lies within
+    ``radius_km`` of (lat, lon), nearest first and capped at ``limit``.
+
+    Only the bounding box survives the SQL filter, and only ``(pk, lat, lon)``
+    is fetched for it; full rows (with their restaurant) are loaded for the
+    final page alone. Each returned donation gets a ``distance_km`` attribute.
+    ``after`` is a ``(distance_km, pk)`` pair; only donations ordered after it
+    are returned, which is how the pickups list pages through the results.
+    """
+    radius_km = radius_km or getattr(settings, 'NEARBY_DONATIONS_RADIUS_KM', 15)
+    limit = limit or getattr(settings, 'NEARBY_DONATIONS_LIMIT', 100)
+
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+    candidates = queryset.filter(
+        restaurant__latitude__gte=min_lat,
+        restaurant__latitude__lte=max_lat,
+    )
+    if min_lon is not None:
+        candidates = candidates.filter(
+            restaurant__longitude__gte=min_lon,
+            restaurant__longitude__lte=max_lon,
+        )
+    rows = list(candidates.filter(restaurant__longitude__isnull=False).values_list(
+        'pk', 'restaurant__latitude', 'restaurant__longitude'
+    ))
+    if not rows:
+        return []
+
+    coords = np.array([(r[1], r[2]) for r in rows], dtype=float)
+    pks = np.array([r[0] for r in rows])
+    distances = haversine_km(lat, lon, coords[:, 0], coords[:, 1])
+    keep = distances <= radius_km
+    if after is not None:
+        after_km, after_pk = after
+        keep &= (distances > after_km) | ((distances == after_km) & (pks > after_pk))
+    within = np.flatnonzero(keep)
+    # Ties on distance (same restaurant) fall back to pk, so the order is total.
+    order = within[np.lexsort((pks[within], distances[within]))][:limit]
+
+    pks = [rows[i][0] for i in order]
+    by_pk = queryset.model.objects.select_related('restaurant').in_bulk(pks)
+    results = []
+    for i in order:
+        donation = by_pk.get(rows[i][0])
+        if donation is not None:
+            donation.distance_km = float(distances[i])
+            results.append(donation)
+    return results
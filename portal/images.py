@@ -0,0 +1,222 @@
+# portal/images.py
+"""
+Upload pipeline for profile pictures and banners.
+
+* ``check_upload`` runs while the form is validated. It looks only at the
+  file size and the image header (format and pixel dimensions; Pillow does
+  not decode pixels on ``Image.open``). Oversized files, unsupported formats
+  and decompression bombs are refused before anything decodes them.
+* Once a profile is saved with a new image (``signals.queue_image_processing``,
+  after the transaction commits), a background worker renders each width in
+  ``IMAGE_VARIANT_WIDTHS`` as WebP plus a JPEG (PNG if the image has
+  transparency) fallback. The result is recorded on the profile's
+  ``image_variants``, and the worker then deletes the files the upload
+  superseded: the previous original and its variants.
+* Templates ask for the smallest variant at least as wide as they need with
+  ``{% image_url profile 'profile_picture' 240 %}``. Until the variants are
+  ready they get the original.
+
+Work runs on a small thread pool in the web process, like push sends (see
+``portal/notifications.py``); ``IMAGE_PIPELINE_ASYNC = False`` runs it inline.
+"""
+import io
+import logging
+import posixpath
+import threading
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, models, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_ALPHA = 'png'
+FALLBACK_OPAQUE = 'jpeg'
+PIL_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG', 'png': 'PNG'}
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg', 'png': 'png'}
+
+
+# --- Upload checks ---
+
+def check_upload(file):
+    """Raise ``ValidationError`` unless ``file`` is an acceptable image, reading only its header."""
+    max_bytes = getattr(settings, 'IMAGE_MAX_UPLOAD_BYTES', 8 * 1024 * 1024)
+    if file.size > max_bytes:
+        raise ValidationError(f'Images can be at most {max_bytes // (1024 * 1024)} MB.', code='file_too_large')
+
+    position = file.tell()
+    try:
+        with warnings.catch_warnings():
+            # Pillow only warns between MAX_IMAGE_PIXELS and twice that.
+            warnings.simplefilter('error', Image.DecompressionBombWarning)
+            with Image.open(file) as image:
+                image_format, (width, height) = image.format, image.size
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning):
+        raise ValidationError('This image has too many pixels.', code='too_many_pixels')
+    except Exception:
+        raise ValidationError('Upload a valid image.', code='invalid_image')
+    finally:
+        file.seek(position)
+
+    allowed = getattr(settings, 'IMAGE_ALLOWED_FORMATS', ('JPEG', 'PNG', 'WEBP', 'GIF'))
+    if image_format not in allowed:
+        raise ValidationError(f'Images must be one of: {", ".join(allowed)}.', code='invalid_format')
+    if width * height > getattr(settings, 'IMAGE_MAX_PIXELS', 40_000_000):
+        raise ValidationError('This image has too many pixels.', code='too_many_pixels')
+
+
+# --- Variants ---
+
+def image_fields(model):
+    return [field.name for field in model._meta.fields if isinstance(field, models.ImageField)]
+
+
+def variant_widths(field_name):
+    widths = getattr(settings, 'IMAGE_VARIANT_WIDTHS', {})
+    return widths.get(field_name, widths.get('default', (128, 256, 512)))
+
+
+def _variant_name(source, width, fmt):
+    folder, filename = posixpath.split(source)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(folder, 'variants', f'{stem}_{width}w.{EXTENSIONS[fmt]}')
+
+
+def _encode(image, fmt):
+    buffer = io.BytesIO()
+    if fmt == 'webp':
+        image.save(buffer, PIL_FORMATS[fmt], quality=getattr(settings, 'IMAGE_WEBP_QUALITY', 80), method=4)
+    elif fmt == 'jpeg':
+        image.save(buffer, PIL_FORMATS[fmt], quality=getattr(settings, 'IMAGE_JPEG_QUALITY', 85), optimize=True, progressive=True)
+    else:
+        image.save(buffer, PIL_FORMATS[fmt], optimize=True)
+    return buffer.getvalue()
+
+
+def render_variants(source, widths, storage=default_storage):
+    """
+    Resize ``source`` to each width (never wider than the original) and save
+    WebP and fallback copies. Returns the manifest stored in ``image_variants``.
+    """
+    largest = max(widths)
+    with storage.open(source) as file, Image.open(file) as image:
+        # Let JPEG decode at a reduced scale when the original is far larger.
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    fallback = FALLBACK_ALPHA if has_alpha else FALLBACK_OPAQUE
+    sizes = {}
+    for width in sorted({min(w, image.width) for w in widths}):
+        height = max(round(image.height * width / image.width), 1)
+        resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+        sizes[str(width)] = {
+            fmt: storage.save(_variant_name(source, width, fmt), ContentFile(_encode(resized, fmt)))
+            for fmt in ('webp', fallback)
+        }
+    return {'source': source, 'fallback': fallback, 'sizes': sizes}
+
+
+def variant_files(manifest):
+    return [name for formats in (manifest or {}).get('sizes', {}).values() for name in formats.values()]
+
+
+def pick_variant(manifest, width, fmt='webp'):
+    """Name of the smallest variant at least ``width`` wide, else the largest one."""
+    sizes = sorted((int(w), formats) for w, formats in (manifest or {}).get('sizes', {}).items())
+    if not sizes:
+        return None
+    fmt = fmt if fmt == 'webp' else manifest['fallback']
+    for w, formats in sizes:
+        if w >= width:
+            return formats[fmt]
+    return sizes[-1][1][fmt]
+
+
+def delete_files(names, storage=default_storage):
+    for name in names:
+        if not name:
+            continue
+        try:
+            storage.delete(name)
+        except Exception:
+            logger.warning('Could not delete superseded image %s', name, exc_info=True)
+
+
+# --- Jobs ---
+
+def process(model_label, pk, changes):
+    """
+    Render variants for ``changes`` (``[(field, new name, old name)]``) of
+    one profile, record them, and delete whatever the new images replaced.
+    """
+    model = apps.get_model(model_label)
+    rendered = {}
+    for field, new, old in changes:
+        if new:
+            try:
+                rendered[field] = render_variants(new, variant_widths(field))
+            except Exception:
+                logger.exception('Could not render variants of %s', new)
+
+    obsolete = [old for _, _, old in changes]
+    with transaction.atomic():
+        row = model.objects.select_for_update().filter(pk=pk).first()
+        if row is None:
+            # Deleted meanwhile; queue_image_deletion removes its current files.
+            obsolete += [name for manifest in rendered.values() for name in variant_files(manifest)]
+        else:
+            manifest = dict(row.image_variants or {})
+            for field, new, old in changes:
+                current = getattr(row, field).name or ''
+                if field in manifest and manifest[field]['source'] != current:
+                    obsolete += variant_files(manifest.pop(field))
+                if field in rendered:
+                    if current == new:
+                        manifest[field] = rendered[field]
+                    else:  # replaced again while we worked; that job takes over
+                        obsolete += variant_files(rendered[field])
+            model.objects.filter(pk=pk).update(image_variants=manifest)
+            obsolete = [name for name in obsolete if name not in {getattr(row, f).name for f in image_fields(model)}]
+    delete_files(obsolete)
+
+
+class ImagePipeline:
+    """Bounded background runner for ``process`` and ``delete_files`` jobs."""
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or getattr(settings, 'IMAGE_PIPELINE_WORKERS', 2)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='images')
+            return self._executor
+
+    @staticmethod
+    def _run(func, *args):
+        close_old_connections()
+        try:
+            func(*args)
+        except Exception:
+            logger.exception('Image job %s failed', func.__name__)
+        finally:
+            close_old_connections()
+
+    def submit(self, func, *args):
+        if not getattr(settings, 'IMAGE_PIPELINE_ASYNC', True):
+            return func(*args)
+        return self._get_executor().submit(self._run, func, *args)
+
+
+# Process-wide pipeline shared by all requests.
+pipeline = ImagePipeline()
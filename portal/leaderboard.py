@@ -0,0 +1,158 @@
+# portal/leaderboard.py
+"""
+Incrementally maintained volunteer leaderboard.
+
+Every verified delivery and every rating updates the volunteer's
+``LeaderboardEntry`` rows for the current week, month and all-time windows,
+both on the global board and on the board of the NGO that received the
+donation. Reading a board is then a single range scan on
+``leaderboard_rank_idx`` instead of aggregating the whole donation history.
+
+Score = deliveries + 2 × average rating, as before.
+"""
+from collections import Counter
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Donation, LeaderboardEntry
+
+ALL_TIME_START = date(1970, 1, 1)
+RATING_WEIGHT = 2
+
+
+def compute_score(deliveries, rating_sum, rating_count):
+    avg_rating = rating_sum / rating_count if rating_count else 0.0
+    return deliveries + avg_rating * RATING_WEIGHT
+
+
+def period_start(window, when=None):
+    """First day of the ``window`` period containing ``when`` (default: now)."""
+    day = timezone.localdate(when) if when else timezone.localdate()
+    if window == LeaderboardEntry.Window.WEEK:
+        return day - timedelta(days=day.weekday())
+    if window == LeaderboardEntry.Window.MONTH:
+        return day.replace(day=1)
+    return ALL_TIME_START
+
+
+def _boards(ngo_id, when):
+    scopes = [LeaderboardEntry.GLOBAL_SCOPE]
+    if ngo_id:
+        scopes.append(ngo_id)
+    for window in LeaderboardEntry.Window.values:
+        for scope in scopes:
+            yield window, period_start(window, when), scope
+
+
+def _apply(volunteer_id, ngo_id, when, deliveries=0, rating_sum=0, rating_count=0):
+    with transaction.atomic():
+        for window, start, scope in _boards(ngo_id, when):
+            entry, _ = LeaderboardEntry.objects.select_for_update().get_or_create(
+                window=window, period_start=start, scope=scope, volunteer_id=volunteer_id,
+            )
+            entry.deliveries += deliveries
+            entry.rating_sum += rating_sum
+            entry.rating_count += rating_count
+            entry.score = compute_score(entry.deliveries, entry.rating_sum, entry.rating_count)
+            entry.save(update_fields=['deliveries', 'rating_sum', 'rating_count', 'score'])
+
+
+def _donation_context(donation):
+    ngo_id = None
+    if donation.target_camp_id:
+        ngo_id = donation.target_camp.ngo_id
+    return donation.assigned_volunteer_id, ngo_id, donation.delivered_at or timezone.now()
+
+
+def record_delivery(donation):
+    """Count a donation that has just been verified as DELIVERED."""
+    volunteer_id, ngo_id, when = _donation_context(donation)
+    if volunteer_id:
+        _apply(volunteer_id, ngo_id, when, deliveries=1)
+
+
+def record_deliveries(rows):
+    """
+    Count many just-verified donations, given as ``(volunteer_id, ngo_id,
+    delivered_at)`` tuples. Donations sharing all three are applied together.
+    """
+    now = timezone.now()
+    totals = Counter((volunteer_id, ngo_id, when or now) for volunteer_id, ngo_id, when in rows if volunteer_id)
+    for (volunteer_id, ngo_id, when), count in totals.items():
+        _apply(volunteer_id, ngo_id, when, deliveries=count)
+
+
+def record_rating(donation, previous_rating=None):
+    """Apply a new rating (or a change to an existing one) for ``donation``."""
+    volunteer_id, ngo_id, when = _donation_context(donation)
+    if not volunteer_id or donation.rating is None:
+        return
+    if previous_rating is None:
+        _apply(volunteer_id, ngo_id, when, rating_sum=donation.rating, rating_count=1)
+    elif previous_rating != donation.rating:
+        _apply(volunteer_id, ngo_id, when, rating_sum=donation.rating - previous_rating)
+
+
+# --- Reads ---
+
+def top(window=LeaderboardEntry.Window.ALL_TIME, scope=LeaderboardEntry.GLOBAL_SCOPE, limit=20, when=None):
+    """Top ``limit`` entries of a board, best first."""
+    return list(
+        LeaderboardEntry.objects.filter(
+            window=window, period_start=period_start(window, when), scope=scope, deliveries__gt=0,
+        ).select_related('volunteer').order_by('-score', '-deliveries', 'volunteer_id')[:limit]
+    )
+
+
+def rank_of(volunteer_id, window=LeaderboardEntry.Window.ALL_TIME, scope=LeaderboardEntry.GLOBAL_SCOPE, when=None):
+    """
+    Return ``(rank, entry)`` for one volunteer on a board, or ``(None, None)``
+    if they have no delivery in that period.
+    """
+    start = period_start(window, when)
+    entry = LeaderboardEntry.objects.filter(
+        window=window, period_start=start, scope=scope, volunteer_id=volunteer_id, deliveries__gt=0,
+    ).first()
+    if entry is None:
+        return None, None
+    ahead = LeaderboardEntry.objects.filter(
+        window=window, period_start=start, scope=scope, deliveries__gt=0,
+    ).filter(
+        Q(score__gt=entry.score)
+        | Q(score=entry.score, deliveries__gt=entry.deliveries)
+        | Q(score=entry.score, deliveries=entry.deliveries, volunteer_id__lt=volunteer_id)
+    ).count()
+    return ahead + 1, entry
+
+
+# --- Maintenance ---
+
+def rebuild():
+    """Recompute every board from the donation history. Returns the row count."""
+    totals = {}
+    donations = Donation.objects.filter(assigned_volunteer__isnull=False).filter(
+        Q(status='DELIVERED') | Q(rating__isnull=False)
+    ).values_list('assigned_volunteer_id', 'target_camp__ngo_id', 'delivered_at', 'status', 'rating').iterator()
+    for volunteer_id, ngo_id, delivered_at, status, rating in donations:
+        for board in _boards(ngo_id, delivered_at):
+            row = totals.setdefault(board + (volunteer_id,), [0, 0, 0])
+            if status == 'DELIVERED':
+                row[0] += 1
+            if rating is not None:
+                row[1] += rating
+                row[2] += 1
+
+    entries = [
+        LeaderboardEntry(
+            window=window, period_start=start, scope=scope, volunteer_id=volunteer_id,
+            deliveries=d, rating_sum=rs, rating_count=rc, score=compute_score(d, rs, rc),
+        )
+        for (window, start, scope, volunteer_id), (d, rs, rc) in totals.items()
+    ]
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+    return len(entries)
@@ -0,0 +1,70 @@
+# portal/management/commands/benchmark_views.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+
+from portal import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the dashboards, lists and actions against synthetic datasets in a throwaway test database '
+            'and write latency, query and size figures as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, action='append', dest='sizes',
+                            help='Donations in the dataset; repeat for several sizes (default: 100 and 1000).')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per view (default: 20).')
+        parser.add_argument('--warmup', type=int, default=1, help='Untimed requests per view first (default: 1).')
+        parser.add_argument('--view', action='append', dest='views', help='Only benchmark this scenario; repeatable.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the dataset (default: 0).')
+        parser.add_argument('--output', help='Write the JSON report here instead of stdout.')
+        parser.add_argument('--compare', help='Earlier JSON report to check for regressions against.')
+        parser.add_argument('--tolerance', type=float, default=1.5,
+                            help='Allowed median latency growth against --compare (default: 1.5x).')
+        parser.add_argument('--keepdb', action='store_true', help='Reuse the test database between runs.')
+
+    def handle(self, *args, **options):
+        unknown = set(options['views'] or []) - {s.name for s in benchmark.SCENARIOS}
+        if unknown:
+            raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+
+        def log(size, name, result):
+            self.stderr.write(
+                f"{size:>8} {name:<28} p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+                f"{result['queries']:>3} queries  {result['bytes']:>7} bytes  {result['statuses']}"
+            )
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        try:
+            report = benchmark.run(
+                options['sizes'] or [100, 1000], repeat=options['repeat'], warmup=options['warmup'],
+                only=options['views'], seed=options['seed'], log=log,
+            )
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+            self.stdout.write(self.style.SUCCESS(f"Wrote benchmark report to {options['output']}."))
+        else:
+            self.stdout.write(output)
+
+        growing = sorted(name for name, row in report['scaling'].items() if row['queries_grow'])
+        if growing:
+            self.stderr.write(self.style.WARNING(f"Query count grows with the data: {', '.join(growing)}"))
+        if baseline is not None:
+            regressions = benchmark.compare(report, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError('Regressions against the baseline:\n  ' + '\n  '.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
@@ -0,0 +1,39 @@
+# portal/management/commands/dispatch_donations.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from portal import dispatch
+from portal.expiry import named_lock
+
+
+class Command(BaseCommand):
+    help = 'Match pending donations to opted-in volunteers by distance. Runs forever unless --once is given.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run a single round and exit (e.g. from cron).')
+        parser.add_argument('--interval', type=int, default=120, help='Seconds between rounds (default: 120).')
+        parser.add_argument(
+            '--mode', choices=[dispatch.SUGGEST, dispatch.ASSIGN], default=None,
+            help=f"Suggest or assign matches (default: DISPATCH_MODE, currently '{getattr(settings, 'DISPATCH_MODE', dispatch.SUGGEST)}').",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            with named_lock('portal.dispatch_donations') as acquired:
+                if not acquired:
+                    self.stdout.write('Another node holds the dispatch lock; skipping.')
+                else:
+                    summary = dispatch.run(mode=options['mode'])
+                    if summary['matched'] or options['once']:
+                        self.stdout.write(self.style.SUCCESS(
+                            f"Matched {summary['matched']} donation(s) in {summary['elapsed_ms']} ms "
+                            f"({summary['mode']}: {summary['assigned']} assigned, {summary['skipped']} skipped)."
+                        ))
+
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,12 @@
+# portal/management/commands/rebuild_leaderboard.py
+from django.core.management.base import BaseCommand
+
+from portal.leaderboard import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized volunteer leaderboard from the donation history.'
+
+    def handle(self, *args, **options):
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt leaderboard with {count} entries.'))
@@ -0,0 +1,12 @@
+# portal/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+
+from portal.search import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rewrite the full-text search entries for donations, restaurants, NGOs and camps.'
+
+    def handle(self, *args, **options):
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} objects for search.'))
@@ -0,0 +1,51 @@
+# portal/management/commands/seed_scale.py
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from portal import seeding
+
+
+class Command(BaseCommand):
+    help = ('Fill the database with synthetic restaurants, NGOs, volunteers, camps, memberships and donations '
+            'in every status, at production scale (e.g. --donations 10000000).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--donations', type=int, default=100000, help='Donations to create (default: 100000).')
+        parser.add_argument('--restaurants', type=int, help='Restaurants (default: one per 200 donations).')
+        parser.add_argument('--ngos', type=int, help='NGOs (default: one per 2000 donations).')
+        parser.add_argument('--volunteers', type=int, help='Volunteers (default: one per 100 donations).')
+        parser.add_argument('--camps', type=int, help='Camps (default: three per NGO).')
+        parser.add_argument('--days', type=int, default=365, help='Days of donation history (default: 365).')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; same seed and --end, same data.')
+        parser.add_argument('--end', help='ISO timestamp the data leads up to (default: now).')
+        parser.add_argument('--prefix', default='seed', help="Namespace for usernames and names (default: 'seed').")
+        parser.add_argument('--chunk-size', type=int, default=seeding.DONATION_CHUNK_SIZE,
+                            help=f'Rows per insert transaction (default: {seeding.DONATION_CHUNK_SIZE}).')
+        parser.add_argument('--skip-rebuild', action='store_true',
+                            help='Leave the leaderboard and search index alone (rebuild them later with their commands).')
+
+    def handle(self, *args, **options):
+        end = None
+        if options['end']:
+            try:
+                end = datetime.fromisoformat(options['end'])
+            except ValueError:
+                raise CommandError(f"--end must be an ISO timestamp, got '{options['end']}'.")
+            if timezone.is_naive(end):
+                end = timezone.make_aware(end)
+
+        try:
+            summary = seeding.seed(
+                options['donations'], restaurants=options['restaurants'], ngos=options['ngos'],
+                volunteers=options['volunteers'], camps=options['camps'], seed=options['seed'], end=end,
+                days=options['days'], prefix=options['prefix'], chunk_size=options['chunk_size'],
+                rebuild=not options['skip_rebuild'], log=self.stdout.write,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {summary['donations']} donations, {summary['restaurants']} restaurants, {summary['ngos']} NGOs, "
+            f"{summary['volunteers']} volunteers and {summary['camps']} camps in {summary['elapsed_s']} s."
+        ))
@@ -0,0 +1,29 @@
+# portal/management/commands/sweep_expired_acceptances.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from portal.expiry import sweep
+
+
+class Command(BaseCommand):
+    help = 'Release ACCEPTED donations that were not collected in time. Runs forever unless --once is given.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run a single sweep and exit (e.g. from cron).')
+        parser.add_argument('--interval', type=int, default=60, help='Seconds between sweeps (default: 60).')
+        parser.add_argument('--batch-size', type=int, default=500, help='Donations released per UPDATE (default: 500).')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            released = sweep(batch_size=options['batch_size'])
+            if released is None:
+                self.stdout.write('Another node holds the sweep lock; skipping.')
+            elif released or options['once']:
+                self.stdout.write(self.style.SUCCESS(f'Released {released} expired acceptance(s).'))
+
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,230 @@
+# portal/metrics.py
+"""
+Operational metrics in the Prometheus text format, served at ``/metrics``.
+
+Counters and histograms live in process memory and are updated where the
+events happen:
+
+* ``transitions.accept`` / ``collect`` / ``verify_deliveries`` observe how
+  long each donation waited for the step (created -> accepted, accepted ->
+  collected, delivered -> verified);
+* ``notifications.PushDispatcher.send`` counts push outcomes;
+* ``expiry.release_expired_acceptances`` counts timed-out acceptances.
+
+The sweeper runs in its own process, so its counter is kept in the shared
+cache instead (Redis in production) and read back at scrape time. Queue
+depth per open status is a gauge computed at scrape time with one indexed
+count, so it is right whichever worker answers.
+
+A scrape reaches only the worker that answers it, so everything held in
+process memory is exposed with a ``pid`` label: each worker reports its own
+series, and Prometheus never mistakes a different worker's lower count for
+a counter reset (``sum without (pid)`` adds them up). Without a shared cache
+(no ``REDIS_URL``) the sweeper's counter is per process as well and gets the
+label too.
+"""
+import os
+import threading
+from bisect import bisect_left
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Count
+
+# Seconds; from half a minute to a day.
+LIFECYCLE_BUCKETS = (30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 14400, 43200, 86400)
+OPEN_STATUSES = ('PENDING', 'ACCEPTED', 'COLLECTED', 'VERIFYING')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _process_labels():
+    return (('pid', os.getpid()),)
+
+
+def cache_is_shared():
+    """Whether the default cache is seen by every process (Redis), not just this one."""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+class Metric:
+    kind = None
+    per_process = False  # values live in this process's memory
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} takes labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(labels[name] for name in self.labelnames)
+
+    def samples(self):
+        """``(suffix, label values, extra labels, value)`` tuples to expose."""
+        raise NotImplementedError
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        process = _process_labels() if self.per_process else ()
+        for suffix, values, extra, value in self.samples():
+            labels = _format_labels(self.labelnames, values, process + tuple(extra))
+            lines.append(f'{self.name}{suffix}{labels} {_format_value(value)}')
+        return '\n'.join(lines)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    kind = 'counter'
+    per_process = True
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [('_total', key, (), value) for key, value in sorted(self._values.items())]
+
+
+class SharedCounter(Counter):
+    """A label-less counter kept in the cache, for events in other processes."""
+
+    def __init__(self, name, documentation):
+        super().__init__(name, documentation)
+        self.cache_key = f'metrics:{name}'
+
+    @property
+    def per_process(self):
+        return not cache_is_shared()
+
+    def inc(self, amount=1):
+        cache.add(self.cache_key, 0, None)
+        try:
+            cache.incr(self.cache_key, amount)
+        except ValueError:  # evicted between add and incr
+            cache.set(self.cache_key, amount, None)
+
+    def value(self):
+        return cache.get(self.cache_key, 0)
+
+    def samples(self):
+        return [('_total', (), (), self.value())]
+
+    def clear(self):
+        cache.delete(self.cache_key)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+    per_process = True
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LIFECYCLE_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    samples.append(('_bucket', key, (('le', _format_value(float(bound))),), cumulative))
+                samples.append(('_sum', key, (), total))
+                samples.append(('_count', key, (), cumulative))
+        return samples
+
+
+class Gauge(Metric):
+    """Value(s) computed when scraped: ``collect()`` returns ``{label values: value}``."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), collect=None):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def samples(self):
+        return [('', key, (), value) for key, value in sorted(self.collect().items())]
+
+
+# --- Registry ---
+
+def _queue_depth():
+    from .models import Donation
+
+    counts = dict(
+        Donation.objects.filter(status__in=OPEN_STATUSES).order_by().values_list('status').annotate(n=Count('pk'))
+    )
+    return {(status,): counts.get(status, 0) for status in OPEN_STATUSES}
+
+
+TIME_TO_ACCEPT = Histogram(
+    'connect2give_donation_time_to_accept_seconds', 'Time from a donation being posted to a volunteer accepting it.',
+)
+TIME_TO_COLLECT = Histogram(
+    'connect2give_donation_time_to_collect_seconds', 'Time from acceptance to the volunteer collecting the food.',
+)
+TIME_TO_VERIFY = Histogram(
+    'connect2give_donation_time_to_verify_seconds', 'Time from drop-off at a camp to the NGO verifying it.',
+)
+ACCEPTANCES_TIMED_OUT = SharedCounter(
+    'connect2give_acceptances_timed_out', 'Acceptances released back to the pool after the pickup timeout.',
+)
+PUSH_SENDS = Counter(
+    'connect2give_push_sends', 'Web push sends by outcome (sent, rejected by the push service, error).', ['outcome'],
+)
+QUEUE_DEPTH = Gauge(
+    'connect2give_donations_queue_depth', 'Donations currently in each open status.', ['status'], collect=_queue_depth,
+)
+
+REGISTRY = [TIME_TO_ACCEPT, TIME_TO_COLLECT, TIME_TO_VERIFY, ACCEPTANCES_TIMED_OUT, PUSH_SENDS, QUEUE_DEPTH]
+
+
+def observe_wait(histogram, since, until):
+    """Observe ``until - since`` in seconds, skipping rows missing a timestamp."""
+    if since is not None and until is not None:
+        histogram.observe(max((until - since).total_seconds(), 0.0))
+
+
+def render():
+    """Every metric in the Prometheus text exposition format."""
+    return '\n'.join(metric.expose() for metric in REGISTRY) + '\n'
+
+
+def reset():
+    """Forget everything recorded so far (for tests)."""
+    for metric in REGISTRY:
+        metric.clear()
@@ -0,0 +1,175 @@
+# portal/middleware.py
+"""
+Per-request timing, and the signed-in user's profile on ``request.profile``.
+
+``RequestTimingMiddleware`` reports where each request's time went:
+
+* ``db``: number of SQL queries and the time spent executing them, counted
+  with a ``connection.execute_wrapper`` on every database connection;
+* ``tpl``: time spent rendering Django templates;
+* ``view``: time from just before the view is called (after URL resolution)
+  to its response coming back through the middleware below this one;
+* ``total``: the whole request as seen by this middleware.
+
+Results go out as a ``Server-Timing`` header (shown in the browser's network
+panel) and as one JSON log line on the ``portal.timing`` logger.
+
+Counting queries and templates costs a little on every query and render, so
+only ``REQUEST_TIMING_SAMPLE_RATE`` of requests are instrumented. The rest
+only time the view and the total (two clock reads), and still log when they
+take longer than ``REQUEST_TIMING_SLOW_MS``, so slow pages are never missed.
+"""
+import functools
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth import middleware as auth_middleware
+from django.db import connections
+from django.utils.functional import SimpleLazyObject
+
+from .backends import profile_of, upgrade_session_backend
+
+logger = logging.getLogger('portal.timing')
+
+# The RequestTiming being filled in for the current request, if it is sampled.
+_current = ContextVar('portal_request_timing', default=None)
+
+
+class RequestTiming:
+    def __init__(self, sampled):
+        self.sampled = sampled
+        self.queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.view_ms = None
+        self.total_ms = None
+        self._template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook: time one query."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - started) * 1000
+            self.queries += 1
+
+    def server_timing(self):
+        parts = []
+        if self.sampled:
+            parts.append(f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"')
+            parts.append(f'tpl;dur={self.template_ms:.1f}')
+        if self.view_ms is not None:
+            parts.append(f'view;dur={self.view_ms:.1f}')
+        parts.append(f'total;dur={self.total_ms:.1f}')
+        return ', '.join(parts)
+
+    def as_dict(self):
+        record = {'total_ms': round(self.total_ms, 1), 'sampled': self.sampled}
+        if self.view_ms is not None:
+            record['view_ms'] = round(self.view_ms, 1)
+        if self.sampled:
+            record.update(queries=self.queries, db_ms=round(self.db_ms, 1), template_ms=round(self.template_ms, 1))
+        return record
+
+
+def _install_template_timer():
+    """Wrap Django template rendering so sampled requests can time it."""
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, 'timed', False):
+        return
+    original = Template.render
+
+    @functools.wraps(original)
+    def render(self, context=None, request=None):
+        timing = _current.get()
+        if timing is None:
+            return original(self, context, request)
+        # Templates rendered from inside another one are already counted.
+        timing._template_depth += 1
+        started = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            timing._template_depth -= 1
+            if not timing._template_depth:
+                timing.template_ms += (time.perf_counter() - started) * 1000
+
+    render.timed = True
+    Template.render = render
+
+
+class RequestTimingMiddleware:
+    """Place it near the top of MIDDLEWARE so ``total`` and ``db`` cover the rest."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        _install_template_timer()
+
+    def __call__(self, request):
+        if not getattr(settings, 'REQUEST_TIMING_ENABLED', True):
+            return self.get_response(request)
+
+        timing = RequestTiming(random.random() < getattr(settings, 'REQUEST_TIMING_SAMPLE_RATE', 0.1))
+        started = time.perf_counter()
+        if timing.sampled:
+            token = _current.set(timing)
+            try:
+                with ExitStack() as stack:
+                    for connection in connections.all():
+                        stack.enter_context(connection.execute_wrapper(timing))
+                    response = self.get_response(request)
+            finally:
+                _current.reset(token)
+        else:
+            response = self.get_response(request)
+        finished = time.perf_counter()
+
+        timing.total_ms = (finished - started) * 1000
+        if getattr(request, '_timing_view_started', None) is not None:
+            timing.view_ms = (finished - request._timing_view_started) * 1000
+        if timing.sampled and getattr(settings, 'REQUEST_TIMING_HEADER', True):
+            response['Server-Timing'] = timing.server_timing()
+        if timing.sampled or timing.total_ms >= getattr(settings, 'REQUEST_TIMING_SLOW_MS', 500):
+            self.log(request, response, timing)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._timing_view_started = time.perf_counter()
+
+    def log(self, request, response, timing):
+        match = getattr(request, 'resolver_match', None)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            **timing.as_dict(),
+        }
+        logger.info(json.dumps(record), extra={'timing': record})
+
+
+def _get_user(request):
+    if not hasattr(request, '_cached_user'):
+        upgrade_session_backend(request.session)
+    return auth_middleware.get_user(request)
+
+
+class ProfileAuthenticationMiddleware(auth_middleware.AuthenticationMiddleware):
+    """
+    Drop-in for Django's ``AuthenticationMiddleware``. ``request.user`` comes
+    from ``portal.backends`` with its profile already joined, and
+    ``request.profile`` is the profile for the user's type (falsy if there is
+    none). Both stay lazy, so requests that never look cost no query.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: _get_user(request))
+        request.profile = SimpleLazyObject(lambda: profile_of(request.user))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:13
+
+from django.db import migrations, models
+
+
+def backfill_location_cells(apps, schema_editor):
+    from portal.geo import location_cell
+
+    VolunteerProfile = apps.get_model('portal', 'VolunteerProfile')
+    for profile in VolunteerProfile.objects.filter(latitude__isnull=False, longitude__isnull=False).only('pk', 'latitude', 'longitude'):
+        profile.location_cell = location_cell(profile.latitude, profile.longitude)
+        profile.save(update_fields=['location_cell'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0005_badge_donation_rating_donation_review_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='volunteerprofile',
+            name='location_cell',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Grid cell of latitude/longitude, kept in sync on save', max_length=32, null=True),
+        ),
+        migrations.RunPython(backfill_location_cells, migrations.RunPython.noop),
+    ]
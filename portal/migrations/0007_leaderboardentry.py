@@ -0,0 +1,76 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:17
+
+from datetime import date, timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Q
+from django.utils import timezone
+
+# Inlined from portal/leaderboard.py as of this migration.
+ALL_TIME_START = date(1970, 1, 1)
+RATING_WEIGHT = 2
+
+
+def _period_starts(when):
+    day = timezone.localdate(when) if when else timezone.localdate()
+    return {'WEEK': day - timedelta(days=day.weekday()), 'MONTH': day.replace(day=1), 'ALL': ALL_TIME_START}
+
+
+def backfill_leaderboard(apps, schema_editor):
+    Donation = apps.get_model('portal', 'Donation')
+    LeaderboardEntry = apps.get_model('portal', 'LeaderboardEntry')
+
+    totals = {}
+    donations = Donation.objects.filter(assigned_volunteer__isnull=False).filter(
+        Q(status='DELIVERED') | Q(rating__isnull=False)
+    ).values_list('assigned_volunteer_id', 'target_camp__ngo_id', 'delivered_at', 'status', 'rating').iterator()
+    for volunteer_id, ngo_id, delivered_at, status, rating in donations:
+        for window, start in _period_starts(delivered_at).items():
+            for scope in (0, ngo_id) if ngo_id else (0,):
+                row = totals.setdefault((window, start, scope, volunteer_id), [0, 0, 0])
+                if status == 'DELIVERED':
+                    row[0] += 1
+                if rating is not None:
+                    row[1] += rating
+                    row[2] += 1
+
+    LeaderboardEntry.objects.bulk_create(
+        (
+            LeaderboardEntry(
+                window=window, period_start=start, scope=scope, volunteer_id=volunteer_id,
+                deliveries=d, rating_sum=rs, rating_count=rc, score=d + (rs / rc if rc else 0.0) * RATING_WEIGHT,
+            )
+            for (window, start, scope, volunteer_id), (d, rs, rc) in totals.items()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0006_volunteerprofile_location_cell'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(choices=[('WEEK', 'This Week'), ('MONTH', 'This Month'), ('ALL', 'All Time')], max_length=5)),
+                ('period_start', models.DateField(help_text='First day of the week/month; a fixed date for all-time')),
+                ('scope', models.PositiveBigIntegerField(default=0, help_text='NGO id, or 0 for the global board')),
+                ('deliveries', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('score', models.FloatField(default=0)),
+                ('volunteer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='portal.volunteerprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['window', 'period_start', 'scope', '-score', '-deliveries'], name='leaderboard_rank_idx')],
+                'unique_together': {('window', 'period_start', 'scope', 'volunteer')},
+            },
+        ),
+        migrations.RunPython(backfill_leaderboard, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:25
+
+from django.db import migrations, models
+
+# The full-text index and the search text as portal/search.py defined them
+# when this migration was written; later changes there don't apply here.
+FTS_TABLE = 'portal_searchentry_fts'
+FULLTEXT_INDEX = 'portal_searchentry_body_ft'
+
+INSTALL = {
+    'sqlite': [
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+        "body, content='portal_searchentry', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        "CREATE TRIGGER portal_searchentry_ai AFTER INSERT ON portal_searchentry BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, body) VALUES (new.id, new.body); END",
+        "CREATE TRIGGER portal_searchentry_ad AFTER DELETE ON portal_searchentry BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, body) VALUES ('delete', old.id, old.body); END",
+        "CREATE TRIGGER portal_searchentry_au AFTER UPDATE ON portal_searchentry BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, body) VALUES ('delete', old.id, old.body); "
+        f"INSERT INTO {FTS_TABLE}(rowid, body) VALUES (new.id, new.body); END",
+    ],
+    'mysql': [f"ALTER TABLE portal_searchentry ADD FULLTEXT INDEX {FULLTEXT_INDEX} (body)"],
+}
+
+UNINSTALL = {
+    'sqlite': [
+        "DROP TRIGGER IF EXISTS portal_searchentry_ai",
+        "DROP TRIGGER IF EXISTS portal_searchentry_ad",
+        "DROP TRIGGER IF EXISTS portal_searchentry_au",
+        f"DROP TABLE IF EXISTS {FTS_TABLE}",
+    ],
+    'mysql': [f"ALTER TABLE portal_searchentry DROP INDEX {FULLTEXT_INDEX}"],
+}
+
+# kind, model, fields joined into the entry body
+DOCUMENTS = [
+    ('donation', 'Donation', ('restaurant__restaurant_name', 'food_description', 'pickup_address')),
+    ('restaurant', 'RestaurantProfile', ('restaurant_name', 'address')),
+    ('ngo', 'NGOProfile', ('ngo_name', 'address')),
+    ('camp', 'DonationCamp', ('name', 'location_address')),
+]
+
+
+def install_search_index(apps, schema_editor):
+    for statement in INSTALL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+    # The SQLite triggers above index these rows as they are inserted.
+    SearchEntry = apps.get_model('portal', 'SearchEntry')
+    for kind, model_name, fields in DOCUMENTS:
+        rows = apps.get_model('portal', model_name).objects.values_list('pk', *fields).iterator()
+        SearchEntry.objects.bulk_create(
+            (SearchEntry(kind=kind, object_id=pk, body=' '.join(str(part) for part in parts if part)) for pk, *parts in rows),
+            batch_size=500,
+        )
+
+
+def uninstall_search_index(apps, schema_editor):
+    for statement in UNINSTALL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0007_leaderboardentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=16)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('body', models.TextField()),
+            ],
+            options={
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
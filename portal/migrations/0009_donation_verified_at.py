@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0008_searchentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='donation',
+            name='verified_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
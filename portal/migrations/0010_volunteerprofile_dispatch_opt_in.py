@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0009_donation_verified_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='volunteerprofile',
+            name='dispatch_opt_in',
+            field=models.BooleanField(default=False, help_text='Let the dispatcher assign nearby donations to this volunteer'),
+        ),
+    ]
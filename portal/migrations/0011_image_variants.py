@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0010_volunteerprofile_dispatch_opt_in'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ngoprofile',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies of the images, kept by portal/images.py'),
+        ),
+        migrations.AddField(
+            model_name='restaurantprofile',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies of the images, kept by portal/images.py'),
+        ),
+        migrations.AddField(
+            model_name='volunteerprofile',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies of the images, kept by portal/images.py'),
+        ),
+    ]
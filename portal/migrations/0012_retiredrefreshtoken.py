@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0011_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RetiredRefreshToken',
+            fields=[
+                ('jti', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('expires_at', models.DateTimeField(db_index=True, help_text='When the token would have expired; the row can go after that')),
+            ],
+        ),
+    ]
@@ -21,6 +21,7 @@ class RestaurantProfile(models.Model):
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
     profile_picture = models.ImageField(upload_to='profile_pictures/restaurants/', null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized copies of the images, kept by portal/images.py")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     def __str__(self):
@@ -35,7 +36,10 @@ class VolunteerProfile(models.Model):
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
     profile_picture = models.ImageField(upload_to='profile_pictures/volunteers/', null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized copies of the images, kept by portal/images.py")
     webpush_subscription = models.TextField(blank=True, null=True, help_text="Web push subscription data (JSON)")
+    location_cell = models.CharField(max_length=32, blank=True, null=True, db_index=True, editable=False, help_text="Grid cell of latitude/longitude, kept in sync on save")
+    dispatch_opt_in = models.BooleanField(default=False, help_text="Let the dispatcher assign nearby donations to this volunteer")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     def __str__(self):
@@ -51,6 +55,7 @@ class NGOProfile(models.Model):
     contact_person = models.CharField(max_length=100)
     profile_picture = models.ImageField(upload_to='profile_pictures/ngos/', null=True, blank=True)
     banner_image = models.ImageField(upload_to='banner_images/ngos/', null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized copies of the images, kept by portal/images.py")
     volunteers = models.ManyToManyField('VolunteerProfile', through='NGOVolunteer', related_name='registered_ngos')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -106,6 +111,7 @@ class Donation(models.Model):
     accepted_at = models.DateTimeField(null=True, blank=True)
     collected_at = models.DateTimeField(null=True, blank=True)
     delivered_at = models.DateTimeField(null=True, blank=True)
+    verified_at = models.DateTimeField(null=True, blank=True)
 
     # Rating and Review fields
     rating = models.IntegerField(null=True, blank=True, choices=RATING_CHOICES, help_text="Rating from 1 to 5 stars")
@@ -133,4 +139,61 @@ class VolunteerBadge(models.Model):
         unique_together = ('volunteer', 'badge')
 
     def __str__(self):
-        return f"{self.volunteer.full_name} - {self.badge.name}"
\ No newline at end of file
+        return f"{self.volunteer.full_name} - {self.badge.name}"
+
+# Materialized leaderboard, maintained incrementally by portal/leaderboard.py
+class LeaderboardEntry(models.Model):
+    class Window(models.TextChoices):
+        WEEK = 'WEEK', 'This Week'
+        MONTH = 'MONTH', 'This Month'
+        ALL_TIME = 'ALL', 'All Time'
+
+    GLOBAL_SCOPE = 0
+
+    window = models.CharField(max_length=5, choices=Window.choices)
+    period_start = models.DateField(help_text="First day of the week/month; a fixed date for all-time")
+    scope = models.PositiveBigIntegerField(default=GLOBAL_SCOPE, help_text="NGO id, or 0 for the global board")
+    volunteer = models.ForeignKey(VolunteerProfile, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    deliveries = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    score = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ('window', 'period_start', 'scope', 'volunteer')
+        indexes = [
+            models.Index(fields=['window', 'period_start', 'scope', '-score', '-deliveries'], name='leaderboard_rank_idx'),
+        ]
+
+    @property
+    def avg_rating(self):
+        return self.rating_sum / self.rating_count if self.rating_count else 0.0
+
+    def __str__(self):
+        return f"{self.volunteer.full_name} - {self.window} {self.period_start} ({self.score:.1f})"
+
+
+class SearchEntry(models.Model):
+    """
+    Denormalised search text for one object, matched by the full-text index
+    that ``portal/search.py`` maintains on ``body`` (FULLTEXT on MySQL, an
+    FTS5 table on SQLite).
+    """
+    kind = models.CharField(max_length=16)
+    object_id = models.PositiveBigIntegerField()
+    body = models.TextField()
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id}"
+
+
+# Refresh tokens that were traded in or logged out (see portal/tokens.py)
+class RetiredRefreshToken(models.Model):
+    jti = models.CharField(max_length=32, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True, help_text="When the token would have expired; the row can go after that")
+
+    def __str__(self):
+        return self.jti
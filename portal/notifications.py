@@ -0,0 +1,244 @@
+# portal/notifications.py
+"""
+Web push delivery for the Connect2Give application.
+
+Sends are fanned out on a bounded thread pool so the view that triggers them
+returns immediately. HTTP connections are pooled per push-service origin and
+signed VAPID headers are reused per audience until shortly before they expire,
+so a send costs one payload encryption and one POST on a warm connection.
+Recipients for a new donation are picked by distance from the restaurant.
+"""
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from pywebpush import Vapid, WebPusher
+
+from . import metrics
+from .geo import cells_within, haversine_km
+
+logger = logging.getLogger(__name__)
+
+# VAPID tokens are valid for at most 24 hours; we sign for 12 and refresh early.
+VAPID_TOKEN_LIFETIME = 12 * 60 * 60
+VAPID_REFRESH_MARGIN = 10 * 60
+
+
+class PushBatch:
+    """Outcome counters for one fan-out, filled in as the sends complete."""
+
+    def __init__(self, label, total, considered=None):
+        self.label = label
+        self.total = total
+        self.considered = total if considered is None else considered
+        self.sent = 0
+        self.failed = 0
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+        if total == 0:
+            self._finish()
+
+    def record(self, success):
+        with self._lock:
+            if success:
+                self.sent += 1
+            else:
+                self.failed += 1
+            if self.sent + self.failed >= self.total:
+                self._finish()
+
+    def _finish(self):
+        self.finished_at = time.monotonic()
+        self.done.set()
+        logger.info('Push batch %s finished: %s', self.label, self.as_dict())
+
+    @property
+    def duration(self):
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    def as_dict(self):
+        return {
+            'considered': self.considered,
+            'total': self.total,
+            'sent': self.sent,
+            'failed': self.failed,
+            'duration_ms': round(self.duration * 1000, 1),
+        }
+
+
+class PushDispatcher:
+    """
+    Bounded, connection-pooling web push sender.
+
+    Use ``dispatch(subscriptions, message)`` from request code; it only
+    enqueues work and returns a ``PushBatch`` that fills in as sends finish.
+    """
+
+    def __init__(self, max_workers=None, timeout=None):
+        self.max_workers = max_workers or getattr(settings, 'WEBPUSH_MAX_WORKERS', 8)
+        self.timeout = timeout or getattr(settings, 'WEBPUSH_TIMEOUT', 5)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._sessions = {}       # origin -> requests.Session
+        self._vapid = None
+        self._vapid_headers = {}  # audience -> (expires_at, headers)
+
+    # --- Shared resources ---
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='webpush')
+            return self._executor
+
+    def _session_for(self, origin):
+        with self._lock:
+            session = self._sessions.get(origin)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+                session.mount(origin, adapter)
+                self._sessions[origin] = session
+            return session
+
+    def _headers_for(self, audience):
+        now = time.time()
+        with self._lock:
+            cached = self._vapid_headers.get(audience)
+            if cached and cached[0] - VAPID_REFRESH_MARGIN > now:
+                return cached[1]
+            if self._vapid is None:
+                self._vapid = Vapid.from_string(private_key=settings.WEBPUSH_SETTINGS['VAPID_PRIVATE_KEY'])
+            expires_at = int(now) + VAPID_TOKEN_LIFETIME
+            headers = self._vapid.sign({
+                'sub': f"mailto:{settings.WEBPUSH_SETTINGS['VAPID_ADMIN_EMAIL']}",
+                'aud': audience,
+                'exp': expires_at,
+            })
+            self._vapid_headers[audience] = (expires_at, headers)
+            return headers
+
+    # --- Sending ---
+
+    def send(self, subscription, data):
+        """
+        Send one already-serialised payload. ``subscription`` may be the dict
+        or the JSON string stored on ``VolunteerProfile``. Returns True on
+        success; failures are logged and reported as False.
+        """
+        try:
+            if isinstance(subscription, str):
+                subscription = json.loads(subscription)
+            endpoint = urlparse(subscription['endpoint'])
+            origin = f'{endpoint.scheme}://{endpoint.netloc}'
+            response = WebPusher(subscription, requests_session=self._session_for(origin)).send(
+                data,
+                dict(self._headers_for(origin)),
+                ttl=getattr(settings, 'WEBPUSH_TTL', 3600),
+                timeout=self.timeout,
+            )
+            if response.status_code > 202:
+                logger.warning('Push to %s rejected: %s %s', origin, response.status_code, response.reason)
+                metrics.PUSH_SENDS.inc(outcome='rejected')
+                return False
+            metrics.PUSH_SENDS.inc(outcome='sent')
+            return True
+        except Exception as e:
+            logger.warning('Push send failed: %s', e)
+            metrics.PUSH_SENDS.inc(outcome='error')
+            return False
+
+    def dispatch(self, subscriptions, message, label='push', considered=None):
+        """Queue ``message`` (a dict) for every subscription and return at once."""
+        subscriptions = [s for s in subscriptions if s]
+        batch = PushBatch(label, len(subscriptions), considered=considered)
+        if not subscriptions:
+            return batch
+
+        data = json.dumps(message)
+        executor = self._get_executor()
+        for subscription in subscriptions:
+            future = executor.submit(self.send, subscription, data)
+            future.add_done_callback(lambda f: batch.record(not f.exception() and f.result()))
+        return batch
+
+
+# Process-wide dispatcher shared by all views.
+push_dispatcher = PushDispatcher()
+
+
+def select_recipients(lat, lon, radius_km=None, ngo_ids=None):
+    """
+    Return ``(considered, subscriptions)`` for volunteers within ``radius_km``
+    of (lat, lon) that have a push subscription.
+
+    Candidates come from the location cells covering the radius; the exact
+    distance check runs on those rows only. ``ngo_ids`` limits recipients to
+    members of those NGOs, and ``NOTIFY_REQUIRE_NGO_MEMBERSHIP`` to volunteers
+    registered with at least one NGO (others have no camp to deliver to).
+    """
+    from .models import VolunteerProfile
+
+    radius_km = radius_km or getattr(settings, 'NOTIFY_RADIUS_KM', 10)
+    candidates = VolunteerProfile.objects.exclude(
+        webpush_subscription__isnull=True
+    ).exclude(webpush_subscription='')
+
+    cells = cells_within(lat, lon, radius_km)
+    if cells is not None:
+        candidates = candidates.filter(location_cell__in=cells)
+    else:
+        candidates = candidates.filter(latitude__isnull=False, longitude__isnull=False)
+
+    if ngo_ids is not None:
+        candidates = candidates.filter(registered_ngos__in=ngo_ids).distinct()
+    elif getattr(settings, 'NOTIFY_REQUIRE_NGO_MEMBERSHIP', False):
+        candidates = candidates.filter(registered_ngos__isnull=False).distinct()
+
+    rows = list(candidates.values_list('latitude', 'longitude', 'webpush_subscription'))
+    if not rows:
+        return 0, []
+    distances = haversine_km(
+        lat, lon,
+        np.array([r[0] for r in rows], dtype=float),
+        np.array([r[1] for r in rows], dtype=float),
+    )
+    return len(rows), [rows[i][2] for i in np.flatnonzero(distances <= radius_km)]
+
+
+def notify_new_donation(donation, radius_km=None, ngo_ids=None):
+    """
+    Tell nearby subscribed volunteers about a freshly posted donation.
+
+    Restaurants without coordinates can't be targeted, so their donations
+    still go to every subscriber.
+    """
+    from .models import VolunteerProfile
+
+    restaurant = donation.restaurant
+    if restaurant.latitude and restaurant.longitude:
+        considered, subscriptions = select_recipients(restaurant.latitude, restaurant.longitude, radius_km=radius_km, ngo_ids=ngo_ids)
+    else:
+        subscriptions = list(VolunteerProfile.objects.exclude(
+            webpush_subscription__isnull=True
+        ).exclude(webpush_subscription='').values_list('webpush_subscription', flat=True))
+        considered = len(subscriptions)
+
+    message = {
+        'title': 'New Donation Available! 🍱',
+        'body': f'{restaurant.restaurant_name} posted: {donation.food_description}',
+        'url': '/dashboard/volunteer/pickups/'
+    }
+    batch = push_dispatcher.dispatch(subscriptions, message, label=f'donation-{donation.pk}', considered=considered)
+    logger.info('Donation %s: %s volunteers considered, %s notified', donation.pk, considered, batch.total)
+    return batch
@@ -0,0 +1,112 @@
+# portal/page_cache.py
+"""
+Caching for the public map data and the anonymous landing page.
+
+Everything here hangs off one version number that the signal handlers bump
+whenever a camp changes or a restaurant's map entry changes. Cache keys
+include the version, so bumping it retires every dependent entry at once
+without having to know their names.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from .models import DonationCamp, RestaurantProfile
+
+VERSION_KEY = 'map:version'
+
+
+def _timeout():
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', 600)
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # A fresh, never-used number, so entries cached under an evicted
+        # version can't come back to life.
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _bump():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, int(time.time() * 1000), None)
+
+
+def bump_version():
+    """Retire cached map data and pages, now and again after commit."""
+    _bump()
+    transaction.on_commit(_bump)
+
+
+# --- Map data ---
+
+def get_camps_map_json():
+    """JSON list of active, geolocated camps for the public maps."""
+    def build():
+        camps = DonationCamp.objects.filter(is_active=True).select_related('ngo')
+        return json.dumps([
+            {"lat": c.latitude, "lon": c.longitude, "name": c.name, "ngo": c.ngo.ngo_name, "address": c.location_address, "start": c.start_time.strftime('%d %b %Y, %H:%M')}
+            for c in camps if c.latitude and c.longitude
+        ])
+    return cache.get_or_set(f'map:camps:{get_version()}', build, _timeout())
+
+
+def get_restaurants_map_json():
+    """JSON list of geolocated restaurants for the landing page map."""
+    def build():
+        restaurants = RestaurantProfile.objects.filter(latitude__isnull=False, longitude__isnull=False).only(
+            'latitude', 'longitude', 'restaurant_name', 'address'
+        )
+        return json.dumps([
+            {"lat": r.latitude, "lon": r.longitude, "name": r.restaurant_name, "address": r.address}
+            for r in restaurants
+        ])
+    return cache.get_or_set(f'map:restaurants:{get_version()}', build, _timeout())
+
+
+# --- Anonymous pages ---
+
+def cached_anonymous_page(request, name, render_page):
+    """
+    Serve ``render_page(request)`` from the cache for anonymous visitors.
+
+    The body is cached per map version together with an ETag, so repeat
+    visits are answered without touching the database, and conditional
+    requests get an empty 304. Requests carrying flash messages are rendered
+    normally because their output is per-visitor.
+    """
+    if len(get_messages(request)):
+        return render_page(request)
+
+    key = f'page:{name}:{get_version()}'
+    cached = cache.get(key)
+    if cached is None:
+        response = render_page(request)
+        if response.status_code != 200:
+            return response
+        etag = '"%s"' % hashlib.md5(response.content).hexdigest()
+        cached = (etag, response.content, response['Content-Type'])
+        cache.set(key, cached, _timeout())
+    etag, content, content_type = cached
+
+    if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type=content_type)
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=getattr(settings, 'ANONYMOUS_PAGE_MAX_AGE', 60))
+    # Logged-in visitors get a redirect from the same URL.
+    patch_vary_headers(response, ['Cookie'])
+    return response
@@ -0,0 +1,228 @@
+# portal/pagination.py
+"""
+Keyset (cursor) pagination for the dashboard lists.
+
+Instead of OFFSET, each page continues from the sort key of the last row of
+the previous page, so fetching page 100 costs the same as fetching page 1.
+The cursor is an opaque base64 token carrying those sort-key values.
+
+Several lists can live on one page: each is paginated under its own name
+(``?<name>_cursor=...``), and ``?fragment=<name>`` asks a view for just the
+next rows of that list, which ``static/js/infinite_scroll.js`` appends.
+``KeysetAPIPagination`` offers the same cursors to the REST API.
+"""
+import base64
+import binascii
+import datetime
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from django.shortcuts import render
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor=None, next_url=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.next_url = next_url
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+def default_page_size():
+    return getattr(settings, 'PAGE_SIZE', 25)
+
+
+def _parse_ordering(queryset, ordering):
+    """
+    Turn ``('-created_at', '-pk')`` into ``[(name, descending, field)]``.
+    Names may also refer to annotations, such as ``search_rank``.
+    """
+    parsed = []
+    for term in ordering:
+        descending = term.startswith('-')
+        name = term.lstrip('-')
+        if name == 'pk':
+            field = queryset.model._meta.pk
+        elif name in queryset.query.annotations:
+            field = queryset.query.annotations[name].output_field
+        else:
+            field = queryset.model._meta.get_field(name)
+        parsed.append((name, descending, field))
+    return parsed
+
+
+def encode_cursor(values):
+    def dump(value):
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat()
+        return value
+    raw = json.dumps([dump(v) for v in values], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_values(token):
+    """Raw values of a cursor; raises ``ValueError`` if it is malformed."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (TypeError, UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError(str(e))
+    if not isinstance(values, list):
+        raise ValueError('Cursor is not a list of values.')
+    return values
+
+
+def decode_cursor(token, parsed):
+    values = decode_values(token)
+    if len(values) != len(parsed):
+        raise ValueError('Cursor does not match this ordering.')
+    return [None if v is None else field.to_python(v) for v, (_, _, field) in zip(values, parsed)]
+
+
+def _after(parsed, values):
+    """
+    WHERE clause selecting rows strictly after ``values`` in the ordering.
+    NULLs sort last in both directions, matching ``_order_by``.
+    """
+    clause = Q(pk__in=[])
+    equal = Q()
+    for (name, descending, field), value in zip(parsed, values):
+        if value is None:
+            # Nothing sorts after NULL in this column; only ties can continue.
+            step = Q(pk__in=[])
+            same = Q(**{f'{name}__isnull': True})
+        else:
+            step = Q(**{f'{name}__lt' if descending else f'{name}__gt': value})
+            if field.null:
+                step |= Q(**{f'{name}__isnull': True})
+            same = Q(**{name: value})
+        clause |= equal & step
+        equal &= same
+    return clause
+
+
+def _sort_value(obj, name, field):
+    if name == 'pk':
+        return obj.pk
+    # Model fields are read by attname (``restaurant_id``), annotations by name.
+    return getattr(obj, getattr(field, 'attname', name))
+
+
+def _order_by(parsed):
+    return [
+        F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_last=True)
+        for name, descending, _ in parsed
+    ]
+
+
+def keyset_paginate(queryset, ordering, cursor=None, page_size=None):
+    """
+    Return one ``KeysetPage`` of ``queryset`` sorted by ``ordering``.
+
+    ``ordering`` must end with a unique column (normally ``pk``) so every row
+    has a distinct position. An invalid cursor restarts from the first page.
+    """
+    page_size = page_size or default_page_size()
+    parsed = _parse_ordering(queryset, ordering)
+    queryset = queryset.order_by(*_order_by(parsed))
+    if cursor:
+        try:
+            queryset = queryset.filter(_after(parsed, decode_cursor(cursor, parsed)))
+        except (ValueError, TypeError, ValidationError):
+            pass
+
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor([_sort_value(last, name, field) for name, _, field in parsed])
+    return KeysetPage(rows, next_cursor)
+
+
+def request_cursor(request, name):
+    return request.GET.get(f'{name}_cursor')
+
+
+def link_page(request, name, page):
+    """Point ``page.next_url`` at the fragment holding the rows after it."""
+    if page.has_next:
+        params = request.GET.copy()
+        params[f'{name}_cursor'] = page.next_cursor
+        params['fragment'] = name
+        page.next_url = f'{request.path}?{params.urlencode()}'
+    return page
+
+
+def paginate_request(request, name, queryset, ordering, page_size=None):
+    """Paginate ``queryset`` as list ``name`` of the current request."""
+    page = keyset_paginate(queryset, ordering, request_cursor(request, name), page_size)
+    return link_page(request, name, page)
+
+
+def requested_fragment(request):
+    """Name of the list whose next rows a GET request asks for, if any."""
+    if request.method != 'GET':
+        return None
+    return request.GET.get('fragment')
+
+
+def fragment_response(request, template_name, context, page):
+    """Render just the rows of one list, with the next page's URL in a header."""
+    response = render(request, template_name, context)
+    response['X-Next-Url'] = page.next_url or ''
+    return response
+
+
+class KeysetAPIPagination(BasePagination):
+    """
+    DRF pagination over ``keyset_paginate``. The view names its sort order in
+    ``ordering``; clients follow ``next`` (``?cursor=...``) until it is null.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return default_page_size()
+        return min(max(size, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        cursor = request.query_params.get(self.cursor_query_param)
+        self.page = keyset_paginate(queryset, view.ordering, cursor, self.get_page_size(request))
+        return self.page.items
+
+    def get_next_link(self):
+        if not self.page.has_next:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.page.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {'next': {'type': 'string', 'nullable': True, 'format': 'uri'}, 'results': schema},
+        }
@@ -0,0 +1,119 @@
+# portal/realtime.py
+"""
+Live donation feed over WebSockets.
+
+Dashboards open one socket (``portal/consumers.py``) and join the channel
+layer groups below. Lifecycle events are sent to those groups after the
+transaction that caused them commits, so open pages can patch themselves
+instead of reloading:
+
+* ``volunteers.cell.<row>_<col>``: volunteers whose ``location_cell`` is that
+  cell. New, accepted and released donations go to every cell within
+  ``NEARBY_DONATIONS_RADIUS_KM`` of the restaurant.
+* ``volunteers.anywhere``: volunteers without a location, whose pickups list
+  isn't filtered by distance.
+* ``volunteer.<id>``, ``restaurant.<id>``, ``ngo.<id>``: one profile each
+  (profile pk == user pk).
+
+An event carries only the donation ids and their current status; pages fetch
+rendered rows through the list fragments when they need more than that.
+"""
+import logging
+from collections import defaultdict
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+
+from .geo import cells_within
+from .models import Donation, VolunteerProfile
+
+logger = logging.getLogger(__name__)
+
+CREATED = 'created'
+ACCEPTED = 'accepted'
+COLLECTED = 'collected'
+DELIVERED = 'delivered'
+VERIFIED = 'verified'
+RELEASED = 'released'
+
+# Events that add a donation to, or remove it from, the pickups list.
+NEARBY_EVENTS = {CREATED, ACCEPTED, RELEASED}
+
+ANYWHERE_GROUP = 'volunteers.anywhere'
+STATUS_LABELS = dict(Donation.DonationStatus.choices)
+
+
+def cell_group(cell):
+    # Group names may not contain ':', which separates the cell key parts.
+    return 'volunteers.cell.' + cell.replace(':', '_')
+
+
+def groups_for_user(user):
+    """The groups a dashboard socket of ``user`` joins."""
+    if user.user_type == 'VOLUNTEER':
+        cell = VolunteerProfile.objects.filter(pk=user.pk).values_list('location_cell', flat=True).first()
+        return [f'volunteer.{user.pk}', cell_group(cell) if cell else ANYWHERE_GROUP]
+    if user.user_type == 'RESTAURANT':
+        return [f'restaurant.{user.pk}']
+    if user.user_type == 'NGO':
+        return [f'ngo.{user.pk}']
+    return []
+
+
+def nearby_groups(lat, lon):
+    groups = [ANYWHERE_GROUP]
+    if lat is not None and lon is not None:
+        radius_km = getattr(settings, 'NEARBY_DONATIONS_RADIUS_KM', 15)
+        groups.extend(cell_group(cell) for cell in cells_within(lat, lon, radius_km) or [])
+    return groups
+
+
+def audiences(event, donation_ids, volunteer_ids=None):
+    """
+    Map each group to the donation deltas it should receive for ``event``.
+    ``volunteer_ids`` (donation id -> volunteer id) names volunteers that are
+    no longer assigned but should still hear about it, e.g. on release.
+    """
+    volunteer_ids = volunteer_ids or {}
+    rows = Donation.objects.filter(pk__in=donation_ids).values_list(
+        'pk', 'status', 'restaurant_id', 'assigned_volunteer_id', 'target_camp__ngo_id',
+        'restaurant__latitude', 'restaurant__longitude',
+    )
+    by_group = defaultdict(list)
+    for pk, status, restaurant_id, volunteer_id, ngo_id, lat, lon in rows:
+        delta = {'id': pk, 'status': status, 'status_display': STATUS_LABELS.get(status, status)}
+        groups = {f'restaurant.{restaurant_id}'}
+        for volunteer in {volunteer_id, volunteer_ids.get(pk)} - {None}:
+            groups.add(f'volunteer.{volunteer}')
+        if ngo_id is not None:
+            groups.add(f'ngo.{ngo_id}')
+        if event in NEARBY_EVENTS:
+            groups.update(nearby_groups(lat, lon))
+        for group in groups:
+            by_group[group].append(delta)
+    return by_group
+
+
+def send(event, donation_ids, volunteer_ids=None):
+    """Send ``event`` for ``donation_ids`` now. Failures are logged, not raised."""
+    layer = get_channel_layer()
+    if layer is None or not donation_ids:
+        return
+    try:
+        for group, donations in audiences(event, donation_ids, volunteer_ids).items():
+            async_to_sync(layer.group_send)(group, {
+                'type': 'donation.event',
+                'event': event,
+                'donations': donations,
+            })
+    except Exception as e:
+        logger.warning('Live feed %s event for %s donation(s) not sent: %s', event, len(donation_ids), e)
+
+
+def publish(event, donation_ids, volunteer_ids=None):
+    """Send ``event`` once the current transaction commits."""
+    donation_ids = list(donation_ids)
+    if donation_ids:
+        transaction.on_commit(lambda: send(event, donation_ids, volunteer_ids))
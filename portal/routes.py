@@ -0,0 +1,200 @@
+# portal/routes.py
+"""
+Multi-stop pickup routes for a volunteer's active donations.
+
+A route starts at the volunteer, visits the restaurant of every ACCEPTED
+donation (COLLECTED ones are already on board) and ends at one of the
+volunteer's NGOs' active camps. Stops are ordered with a nearest-neighbour
+tour improved by 2-opt over a precomputed haversine distance matrix, once per
+candidate camp, and the shortest result wins. The improvement loop stops at
+``ROUTE_TIME_BUDGET_MS`` even if it hasn't converged, so a request never
+waits on it.
+
+Plans are cached under a key derived from the volunteer's location, active
+donations and NGO memberships, so any change to those simply misses the
+cache; ``ROUTE_CACHE_TIMEOUT`` only bounds how long a completed camp can
+linger in a stale plan.
+"""
+import hashlib
+import json
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .geo import camp_index, haversine_km
+from .models import Donation, DonationCamp
+
+
+def _budget_seconds():
+    return getattr(settings, 'ROUTE_TIME_BUDGET_MS', 50) / 1000.0
+
+
+# --- Ordering ---
+
+def distance_matrix(points):
+    """Symmetric matrix of haversine distances (km) between ``(lat, lon)`` points."""
+    lats = np.array([p[0] for p in points], dtype=float)
+    lons = np.array([p[1] for p in points], dtype=float)
+    return np.vstack([haversine_km(lat, lon, lats, lons) for lat, lon in points])
+
+
+def path_length(matrix, path):
+    return float(sum(matrix[a, b] for a, b in zip(path, path[1:])))
+
+
+def nearest_neighbour(matrix, start, stops):
+    """Visit ``stops`` from ``start``, always moving to the closest unvisited one."""
+    path, remaining = [start], list(stops)
+    while remaining:
+        here = path[-1]
+        nearest = min(remaining, key=lambda stop: (matrix[here, stop], stop))
+        path.append(nearest)
+        remaining.remove(nearest)
+    return path
+
+
+def two_opt(matrix, path, deadline):
+    """
+    Improve ``path`` in place by reversing segments while that shortens it.
+    The first and last nodes stay fixed. Returns True if it converged before
+    ``deadline`` (a ``time.perf_counter()`` value).
+    """
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, len(path) - 2):
+            if time.perf_counter() > deadline:
+                return False
+            for j in range(i + 1, len(path) - 1):
+                a, b, c, d = path[i - 1], path[i], path[j], path[j + 1]
+                if matrix[a, c] + matrix[b, d] < matrix[a, b] + matrix[c, d] - 1e-9:
+                    path[i:j + 1] = reversed(path[i:j + 1])
+                    improved = True
+    return True
+
+
+def order_stops(matrix, start, stops, ends, budget=None):
+    """
+    Best ``(length, path, converged)`` from ``start`` through every node of
+    ``stops`` to one of ``ends``; with no ``ends`` the path may stop anywhere.
+    """
+    deadline = time.perf_counter() + (budget if budget is not None else _budget_seconds())
+    tour = nearest_neighbour(matrix, start, stops)
+    if not ends:
+        # A free end is a dummy node at zero distance from everything.
+        size = len(matrix)
+        padded = np.zeros((size + 1, size + 1))
+        padded[:size, :size] = matrix
+        path = tour + [size]
+        converged = two_opt(padded, path, deadline)
+        path.pop()
+        return path_length(matrix, path), path, converged
+
+    best = None
+    for end in ends:
+        path = tour + [end]
+        converged = two_opt(matrix, path, deadline)
+        length = path_length(matrix, path)
+        if best is None or length < best[0]:
+            best = (length, path, converged)
+    return best
+
+
+# --- Planning ---
+
+def _signature(volunteer, active, ngo_ids):
+    data = [volunteer.latitude, volunteer.longitude, sorted(ngo_ids), active]
+    return hashlib.sha1(json.dumps(data, default=str).encode()).hexdigest()
+
+
+def _candidate_camps(points, ngo_ids):
+    """Active camps of ``ngo_ids`` nearest to any of ``points``, confirmed in the database."""
+    k = getattr(settings, 'ROUTE_CAMP_CANDIDATES', 3)
+    while True:
+        pks = {pk for lat, lon in points for _, pk in camp_index.nearest(lat, lon, k=k, ngo_ids=ngo_ids)}
+        camps = list(DonationCamp.objects.filter(pk__in=pks, ngo_id__in=ngo_ids, is_active=True).exclude(latitude=None).exclude(longitude=None))
+        # The index may not have seen a camp being completed or deleted yet.
+        # Drop those and ask again, so they don't hide live camps further out;
+        # every round shrinks the index, so this ends.
+        stale = pks - {camp.pk for camp in camps}
+        if not stale:
+            return camps
+        for pk in stale:
+            camp_index.discard(pk)
+
+
+def plan_route(volunteer):
+    """
+    The pickup route for ``volunteer`` as a JSON-ready dict, or None if their
+    location is unknown. See the module docstring for how it is built.
+    """
+    if not (volunteer.latitude and volunteer.longitude):
+        return None
+    active = list(
+        Donation.objects.filter(assigned_volunteer=volunteer, status__in=['ACCEPTED', 'COLLECTED'])
+        .order_by('pk')
+        .values_list('pk', 'status', 'restaurant__latitude', 'restaurant__longitude')
+    )
+    ngo_ids = list(volunteer.registered_ngos.values_list('pk', flat=True))
+    key = f'route:{volunteer.pk}:{_signature(volunteer, active, ngo_ids)}'
+    route = cache.get(key)
+    if route is None:
+        route = _build_route(volunteer, active, ngo_ids)
+        cache.set(key, route, getattr(settings, 'ROUTE_CACHE_TIMEOUT', 300))
+    return route
+
+
+def _build_route(volunteer, active, ngo_ids):
+    started = time.perf_counter()
+    pickups = [row for row in active if row[1] == 'ACCEPTED' and row[2] is not None and row[3] is not None]
+    start = (volunteer.latitude, volunteer.longitude)
+    camps = _candidate_camps([start] + [(row[2], row[3]) for row in pickups], ngo_ids)
+
+    points = [start] + [(row[2], row[3]) for row in pickups] + [(c.latitude, c.longitude) for c in camps]
+    matrix = distance_matrix(points)
+    stop_nodes = list(range(1, len(pickups) + 1))
+    camp_nodes = list(range(len(pickups) + 1, len(points)))
+    length, path, converged = order_stops(matrix, 0, stop_nodes, camp_nodes)
+
+    details = {
+        d.pk: d for d in Donation.objects.filter(pk__in=[row[0] for row in pickups]).select_related('restaurant')
+    }
+    stops = []
+    for previous, node in zip(path, path[1:]):
+        if node > len(pickups):
+            break
+        donation = details[pickups[node - 1][0]]
+        stops.append({
+            'id': donation.pk,
+            'restaurant': donation.restaurant.restaurant_name,
+            'food': donation.food_description,
+            'pickup_address': donation.pickup_address,
+            'lat': donation.restaurant.latitude,
+            'lon': donation.restaurant.longitude,
+            'leg_km': round(float(matrix[previous, node]), 2),
+        })
+
+    camp = None
+    if path[-1] > len(pickups):
+        chosen = camps[path[-1] - len(pickups) - 1]
+        camp = {
+            'pk': chosen.pk,
+            'name': chosen.name,
+            'latitude': chosen.latitude,
+            'longitude': chosen.longitude,
+            'leg_km': round(float(matrix[path[-2], path[-1]]), 2),
+        }
+
+    routed = {row[0] for row in pickups}
+    return {
+        'start': {'lat': start[0], 'lon': start[1]},
+        'stops': stops,
+        'camp': camp,
+        'carrying': [row[0] for row in active if row[1] == 'COLLECTED'],
+        'unrouted': [row[0] for row in active if row[1] == 'ACCEPTED' and row[0] not in routed],
+        'total_km': round(length, 2),
+        'converged': converged,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
@@ -0,0 +1,8 @@
+# portal/routing.py
+from django.urls import path
+
+from . import consumers
+
+websocket_urlpatterns = [
+    path('ws/feed/', consumers.DonationFeedConsumer.as_asgi(), name='donation_feed'),
+]
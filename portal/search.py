@@ -0,0 +1,265 @@
+# portal/search.py
+"""
+Full-text search over donations, restaurants, NGOs and camps.
+
+Each searchable object has one ``SearchEntry`` row holding its text. The
+signal handlers in ``portal/signals.py`` rewrite that row whenever a field
+feeding it changes. Matching runs against a database full-text index on the
+entries rather than ``LIKE '%term%'`` scans over the source tables:
+
+* ``MySQLFullTextBackend``: a FULLTEXT index queried in boolean mode.
+* ``SQLiteFTS5Backend``: an FTS5 table kept in step by triggers, for tests
+  and small deployments.
+* ``SimpleSearchBackend``: ``icontains`` on the entries, for anything else.
+
+Every word of the query must match, as a prefix ("spi" finds "Spice"), and
+results are ordered by the backend's relevance score. Views only call
+``search(queryset, query)``; ``SEARCH_BACKEND`` picks a backend explicitly,
+otherwise one is chosen from the database vendor.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Value, When
+from django.utils.module_loading import import_string
+
+from .models import Donation, DonationCamp, NGOProfile, RestaurantProfile, SearchEntry
+
+MAX_TERMS = 8
+WORD_RE = re.compile(r'[^\W_]+')
+
+
+# --- Documents ---
+
+class Document:
+    """How one model is turned into search text."""
+
+    def __init__(self, kind, model, fields, build):
+        self.kind = kind
+        self.model = model
+        self.fields = fields  # attnames whose change means re-indexing
+        self.build = build
+
+    def snapshot(self, instance):
+        # Read from __dict__ so deferred fields don't trigger queries.
+        return tuple(instance.__dict__.get(f) for f in self.fields)
+
+    def body(self, instance):
+        return ' '.join(str(part) for part in self.build(instance) if part)
+
+
+DOCUMENTS = {
+    doc.model: doc for doc in [
+        Document('donation', Donation, ('restaurant_id', 'food_description', 'pickup_address'),
+                 lambda d: [d.restaurant.restaurant_name, d.food_description, d.pickup_address]),
+        Document('restaurant', RestaurantProfile, ('restaurant_name', 'address'),
+                 lambda r: [r.restaurant_name, r.address]),
+        Document('ngo', NGOProfile, ('ngo_name', 'address'),
+                 lambda n: [n.ngo_name, n.address]),
+        Document('camp', DonationCamp, ('name', 'location_address'),
+                 lambda c: [c.name, c.location_address]),
+    ]
+}
+
+
+def terms(query):
+    """Lower-cased words of ``query``, at most ``MAX_TERMS`` of them."""
+    return WORD_RE.findall(query.lower())[:MAX_TERMS]
+
+
+# --- Backends ---
+
+class SimpleSearchBackend:
+    """Unranked ``icontains`` matching; works on any database."""
+
+    def install(self, schema_editor):
+        pass
+
+    def uninstall(self, schema_editor):
+        pass
+
+    def search(self, kind, words, within, limit):
+        entries = SearchEntry.objects.filter(kind=kind, object_id__in=within.values('pk'))
+        for word in words:
+            entries = entries.filter(body__icontains=word)
+        return list(entries.order_by('-object_id').values_list('object_id', flat=True)[:limit])
+
+
+class SQLiteFTS5Backend(SimpleSearchBackend):
+    """
+    FTS5 external-content table over ``portal_searchentry``, ranked by bm25.
+    Triggers on the entry table keep it in sync, so indexing is plain ORM.
+    """
+    table = 'portal_searchentry_fts'
+
+    def install(self, schema_editor):
+        execute = schema_editor.execute
+        execute(
+            f"CREATE VIRTUAL TABLE {self.table} USING fts5("
+            "body, content='portal_searchentry', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        execute(
+            "CREATE TRIGGER portal_searchentry_ai AFTER INSERT ON portal_searchentry BEGIN "
+            f"INSERT INTO {self.table}(rowid, body) VALUES (new.id, new.body); END"
+        )
+        execute(
+            "CREATE TRIGGER portal_searchentry_ad AFTER DELETE ON portal_searchentry BEGIN "
+            f"INSERT INTO {self.table}({self.table}, rowid, body) VALUES ('delete', old.id, old.body); END"
+        )
+        execute(
+            "CREATE TRIGGER portal_searchentry_au AFTER UPDATE ON portal_searchentry BEGIN "
+            f"INSERT INTO {self.table}({self.table}, rowid, body) VALUES ('delete', old.id, old.body); "
+            f"INSERT INTO {self.table}(rowid, body) VALUES (new.id, new.body); END"
+        )
+        execute(f"INSERT INTO {self.table}({self.table}) VALUES ('rebuild')")
+
+    def uninstall(self, schema_editor):
+        for trigger in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS portal_searchentry_{trigger}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def search(self, kind, words, within, limit):
+        match = ' '.join('"%s"*' % word for word in words)
+        within_sql, within_params = within.values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT e.object_id FROM {self.table} f "
+                "JOIN portal_searchentry e ON e.id = f.rowid "
+                f"WHERE {self.table} MATCH %s AND e.kind = %s AND e.object_id IN ({within_sql}) "
+                f"ORDER BY bm25({self.table}), e.object_id DESC LIMIT %s",
+                [match, kind, *within_params, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class MySQLFullTextBackend(SimpleSearchBackend):
+    """
+    InnoDB FULLTEXT index on ``portal_searchentry.body``, boolean mode.
+
+    Words shorter than ``innodb_ft_min_token_size`` are not indexed; queries
+    made only of such words fall back to ``icontains``.
+    """
+    index = 'portal_searchentry_body_ft'
+    min_token_size = 3
+
+    def install(self, schema_editor):
+        schema_editor.execute(f"ALTER TABLE portal_searchentry ADD FULLTEXT INDEX {self.index} (body)")
+
+    def uninstall(self, schema_editor):
+        schema_editor.execute(f"ALTER TABLE portal_searchentry DROP INDEX {self.index}")
+
+    def search(self, kind, words, within, limit):
+        indexed = [w for w in words if len(w) >= self.min_token_size]
+        if not indexed:
+            return super().search(kind, words, within, limit)
+        match = ' '.join('+%s*' % word for word in indexed)
+        within_sql, within_params = within.values('pk').query.sql_with_params()
+        entries = SearchEntry.objects.filter(kind=kind)
+        for word in words:
+            if word not in indexed:
+                entries = entries.filter(body__icontains=word)
+        entries_sql, entries_params = entries.values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT object_id FROM portal_searchentry "
+                "WHERE MATCH(body) AGAINST (%s IN BOOLEAN MODE) "
+                f"AND id IN ({entries_sql}) AND object_id IN ({within_sql}) "
+                "ORDER BY MATCH(body) AGAINST (%s IN BOOLEAN MODE) DESC, object_id DESC LIMIT %s",
+                [match, *entries_params, *within_params, match, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+VENDOR_BACKENDS = {
+    'mysql': MySQLFullTextBackend,
+    'sqlite': SQLiteFTS5Backend,
+}
+
+_backends = {}
+
+
+def get_backend(vendor=None):
+    """The configured backend, or the default one for ``vendor``."""
+    path = getattr(settings, 'SEARCH_BACKEND', None)
+    vendor = vendor or connection.vendor
+    key = path or vendor
+    if key not in _backends:
+        backend_class = import_string(path) if path else VENDOR_BACKENDS.get(vendor, SimpleSearchBackend)
+        _backends[key] = backend_class()
+    return _backends[key]
+
+
+# --- Querying ---
+
+def search(queryset, query, limit=None):
+    """
+    Restrict ``queryset`` to the best matches for ``query``, annotated with
+    ``search_rank`` (0 is the most relevant). At most ``SEARCH_RESULT_LIMIT``
+    rows survive.
+    """
+    limit = limit or getattr(settings, 'SEARCH_RESULT_LIMIT', 200)
+    words = terms(query)
+    ids = []
+    if words:
+        ids = get_backend().search(DOCUMENTS[queryset.model].kind, words, queryset, limit)
+    if not ids:
+        return queryset.none().annotate(search_rank=Value(0, output_field=IntegerField()))
+    return queryset.filter(pk__in=ids).annotate(search_rank=Case(
+        *[When(pk=pk, then=Value(rank)) for rank, pk in enumerate(ids)],
+        output_field=IntegerField(),
+    ))
+
+
+# --- Indexing ---
+
+def index_objects(model, objects):
+    """Write (or rewrite) the entries for ``objects`` of ``model``."""
+    document = DOCUMENTS[model]
+    entries = [SearchEntry(kind=document.kind, object_id=obj.pk, body=document.body(obj)) for obj in objects]
+    if not entries:
+        return 0
+    SearchEntry.objects.filter(kind=document.kind, object_id__in=[e.object_id for e in entries]).delete()
+    SearchEntry.objects.bulk_create(entries, batch_size=500)
+    return len(entries)
+
+
+def remove_objects(model, object_ids):
+    SearchEntry.objects.filter(kind=DOCUMENTS[model].kind, object_id__in=list(object_ids)).delete()
+
+
+def index_instance(instance, created=False):
+    """Re-index ``instance`` if it is new or a field feeding its text changed."""
+    document = DOCUMENTS[type(instance)]
+    current = document.snapshot(instance)
+    if not created and getattr(instance, '_search_original', None) == current:
+        return
+    SearchEntry.objects.update_or_create(
+        kind=document.kind, object_id=instance.pk, defaults={'body': document.body(instance)},
+    )
+    if isinstance(instance, RestaurantProfile) and not created:
+        # Donation text includes the restaurant name.
+        rebuild_model(Donation, Donation.objects.filter(restaurant=instance))
+    instance._search_original = current
+
+
+def rebuild_model(model, queryset=None, chunk_size=1000):
+    """Re-index every object of ``model`` (or of ``queryset``)."""
+    queryset = model.objects.all() if queryset is None else queryset
+    if model is Donation:
+        queryset = queryset.select_related('restaurant')
+    queryset = queryset.order_by('pk')
+    total, last_pk = 0, 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            return total
+        total += index_objects(model, chunk)
+        last_pk = chunk[-1].pk
+
+
+def rebuild():
+    """Re-index everything. Returns the number of entries written."""
+    SearchEntry.objects.all().delete()
+    return sum(rebuild_model(model) for model in DOCUMENTS)
@@ -0,0 +1,430 @@
+# portal/seeding.py
+"""
+Synthetic data at production scale.
+
+``seed()`` (and the ``seed_scale`` management command) fills the database
+with restaurants, NGOs, volunteers, camps, memberships and donations in every
+status, so slow pages can be reproduced locally. The data is shaped like the
+real thing rather than uniform noise:
+
+* Everyone lives in one of a handful of cities, around a few hotspots per
+  city, so spatial queries see dense and sparse areas.
+* Donations cluster around lunch and dinner, grow towards the present, and
+  move through accepted / collected / delivered / verified with log-normal
+  delays. Active donations are recent; history spans ``days``.
+* A few restaurants, volunteers and camps account for most of the history,
+  as on any real platform, so their pages grow with the dataset.
+
+Everything comes from one seeded numpy generator, so the same seed and
+``end`` time give the same rows. Rows go in chunk by chunk, each chunk in its
+own transaction, with no per-row signals or password hashing: people, camps
+and memberships through ``bulk_create``, donations (the bulk of the volume)
+as plain ``executemany`` rows, since preparing model instances value by
+value is what would otherwise cap throughput. Derived tables (leaderboard,
+search index) are rebuilt once at the end.
+"""
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import leaderboard, page_cache, search, stats, transitions
+from .geo import camp_index, location_cell
+from .models import Donation, DonationCamp, NGOProfile, NGOVolunteer, RestaurantProfile, User, VolunteerProfile
+
+# (city, latitude, longitude, share of the population)
+CITIES = [
+    ('Delhi', 28.6139, 77.2090, 0.22),
+    ('Mumbai', 19.0760, 72.8777, 0.20),
+    ('Bengaluru', 12.9716, 77.5946, 0.15),
+    ('Kolkata', 22.5726, 88.3639, 0.12),
+    ('Chennai', 13.0827, 80.2707, 0.10),
+    ('Hyderabad', 17.3850, 78.4867, 0.10),
+    ('Pune', 18.5204, 73.8567, 0.06),
+    ('Ahmedabad', 23.0225, 72.5714, 0.05),
+]
+HOTSPOTS_PER_CITY = 6
+HOTSPOT_SPREAD_DEGREES = 0.08  # hotspots around the city centre
+LOCAL_SPREAD_DEGREES = 0.02  # people around a hotspot
+
+STATUSES = ['PENDING', 'ACCEPTED', 'COLLECTED', 'VERIFYING', 'DELIVERED']
+STATUS_WEIGHTS = {'PENDING': 0.03, 'ACCEPTED': 0.006, 'COLLECTED': 0.004, 'VERIFYING': 0.01, 'DELIVERED': 0.95}
+
+# Median minutes (and log-normal sigma) from one step to the next.
+ACCEPT_DELAY = (15, 0.8)
+COLLECT_DELAY = (25, 0.6)
+DELIVER_DELAY = (30, 0.6)
+VERIFY_DELAY = (180, 1.0)
+
+FOOD = ['veg thalis', 'meal boxes', 'kg rice', 'kg dal', 'rotis', 'biryani portions', 'sandwiches', 'kg vegetables',
+        'fruit boxes', 'loaves of bread']
+
+DONATION_CHUNK_SIZE = 10000
+DONATION_COLUMNS = [
+    'restaurant', 'food_description', 'quantity', 'pickup_address', 'status', 'assigned_volunteer', 'target_camp',
+    'created_at', 'accepted_at', 'collected_at', 'delivered_at', 'verified_at', 'rating',
+]
+
+
+def defaults(donations):
+    """Population sizes that fit ``donations`` when none are given."""
+    ngos = max(1, donations // 2000)
+    return {
+        'restaurants': max(1, donations // 200),
+        'ngos': ngos,
+        'volunteers': max(1, donations // 100),
+        'camps': ngos * 3,
+    }
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Let ``bulk_create`` keep given values for ``auto_now_add`` fields."""
+    saved = [(field, field.auto_now_add) for field in fields]
+    for field, _ in saved:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in saved:
+            field.auto_now_add = value
+
+
+def _field(model, name):
+    return model._meta.get_field(name)
+
+
+def _datetimes(seconds):
+    """Epoch seconds (NaN for none) to aware datetimes."""
+    return [None if s != s else datetime.fromtimestamp(s, tz=dt_timezone.utc) for s in seconds.tolist()]
+
+
+def _db_timestamps(seconds):
+    """
+    Epoch seconds (NaN for none) as the naive UTC strings Django itself
+    writes for aware datetimes, formatted in one vectorised step.
+    """
+    missing = np.isnan(seconds)
+    micros = (np.nan_to_num(seconds) * 1e6).astype(np.int64).astype('datetime64[us]')
+    stamps = np.char.replace(np.datetime_as_string(micros, unit='us'), 'T', ' ').astype(object)
+    stamps[missing] = None
+    return stamps.tolist()
+
+
+def insert_rows(model, fields, rows):
+    """One ``executemany`` INSERT of ready-to-store ``rows`` for ``fields`` of ``model``."""
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(model._meta.get_field(name).column) for name in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(f'INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({placeholders})', rows)
+
+
+def _chunks(total, size):
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+class Seeder:
+    def __init__(self, seed=0, end=None, days=365, prefix='seed', chunk_size=DONATION_CHUNK_SIZE, log=None):
+        self.rng = np.random.default_rng(seed)
+        self.end = (end or timezone.now()).timestamp()
+        self.days = days
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.log = log or (lambda message: None)
+        self.password = make_password(None)  # unusable, computed once
+
+        shares = np.array([c[3] for c in CITIES])
+        self.city_shares = shares / shares.sum()
+        centres = np.array([(c[1], c[2]) for c in CITIES])
+        self.hotspots = centres[:, None, :] + self.rng.normal(0, HOTSPOT_SPREAD_DEGREES, (len(CITIES), HOTSPOTS_PER_CITY, 2))
+
+    # --- Helpers ---
+
+    def cities(self, count):
+        """City of each of ``count`` people; every city gets one before any gets two."""
+        first = np.arange(min(count, len(CITIES)))
+        rest = self.rng.choice(len(CITIES), count - len(first), p=self.city_shares)
+        return np.concatenate([first, rest]).astype(int)
+
+    def points(self, cities, spread=LOCAL_SPREAD_DEGREES):
+        spots = self.hotspots[cities, self.rng.integers(0, HOTSPOTS_PER_CITY, len(cities))]
+        return spots + self.rng.normal(0, spread, spots.shape)
+
+    def past(self, count, days=None):
+        """Epoch seconds over the last ``days``, denser towards the present."""
+        days = days or self.days
+        return self.end - days * 86400 * (1 - np.sqrt(self.rng.random(count)))
+
+    def skewed(self, pools, cities, power):
+        """
+        Pick one member of each row's city pool. ``power`` > 1 favours the
+        first members, giving the long tail of real activity.
+        """
+        picked = np.zeros(len(cities), dtype=np.int64)
+        for city, pool in enumerate(pools):
+            mask = cities == city
+            count = int(mask.sum())
+            if count:
+                picked[mask] = pool[(len(pool) * self.rng.random(count) ** power).astype(int)]
+        return picked
+
+    def deal(self, pools, orders, dealt, cities, mask):
+        """
+        Hand the ``mask`` rows round-robin to each city's pool in ``orders``,
+        counting turns in ``dealt`` across calls. Returns the picks and the
+        rows left over once every member has ``MAX_ACTIVE_PICKUPS``.
+        """
+        picked = np.zeros(len(cities), dtype=np.int64)
+        full = np.zeros(len(cities), dtype=bool)
+        for city, pool in enumerate(pools):
+            rows = np.flatnonzero(mask & (cities == city))
+            if not len(rows):
+                continue
+            turns = dealt[city] + np.arange(len(rows))
+            dealt[city] += len(rows)
+            picked[rows] = pool[orders[city][turns % len(pool)]]
+            full[rows] = turns >= len(pool) * transitions.MAX_ACTIVE_PICKUPS
+        return picked, full
+
+    def delays(self, count, delay):
+        median, sigma = delay
+        return median * 60 * self.rng.lognormal(0, sigma, count)
+
+    def users(self, kind, count, user_type, joined):
+        prefix = f'{self.prefix}-{kind}-'
+        for start, size in _chunks(count, self.chunk_size):
+            User.objects.bulk_create([
+                User(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', password=self.password,
+                     user_type=user_type, date_joined=joined[i])
+                for i in range(start, start + size)
+            ])
+        by_name = dict(User.objects.filter(username__startswith=prefix).values_list('username', 'pk').iterator())
+        return np.array([by_name[f'{prefix}{i}'] for i in range(count)], dtype=np.int64)
+
+    def bulk(self, model, objects):
+        for start, size in _chunks(len(objects), self.chunk_size):
+            model.objects.bulk_create(objects[start:start + size])
+
+    # --- Populations ---
+
+    def restaurants(self, count):
+        cities = self.cities(count)
+        joined = _datetimes(self.past(count, self.days * 2))
+        ids = self.users('restaurant', count, 'RESTAURANT', joined)
+        coords = self.points(cities)
+        with explicit_timestamps(_field(RestaurantProfile, 'created_at')):
+            self.bulk(RestaurantProfile, [
+                RestaurantProfile(user_id=pk, restaurant_name=f'{CITIES[c][0]} Kitchen {i}',
+                                  address=f'{i} Market Road, {CITIES[c][0]}', phone_number=f'9{i:09d}',
+                                  latitude=lat, longitude=lon, created_at=joined[i])
+                for i, (pk, c, (lat, lon)) in enumerate(zip(ids.tolist(), cities.tolist(), coords.tolist()))
+            ])
+        self.log(f'{count} restaurants')
+        return ids, cities
+
+    def ngos(self, count):
+        cities = self.cities(count)
+        joined = _datetimes(self.past(count, self.days * 2))
+        ids = self.users('ngo', count, 'NGO', joined)
+        coords = self.points(cities)
+        with explicit_timestamps(_field(NGOProfile, 'created_at')):
+            self.bulk(NGOProfile, [
+                NGOProfile(user_id=pk, ngo_name=f'{CITIES[c][0]} Food Relief {i}',
+                           registration_number=f'{self.prefix.upper()}-{i:08d}', address=f'{i} Relief Lane, {CITIES[c][0]}',
+                           contact_person=f'Coordinator {i}', latitude=lat, longitude=lon, created_at=joined[i])
+                for i, (pk, c, (lat, lon)) in enumerate(zip(ids.tolist(), cities.tolist(), coords.tolist()))
+            ])
+        self.log(f'{count} NGOs')
+        return ids, cities
+
+    def volunteers(self, count):
+        cities = self.cities(count)
+        joined = _datetimes(self.past(count, self.days * 2))
+        ids = self.users('volunteer', count, 'VOLUNTEER', joined)
+        coords = self.points(cities, spread=LOCAL_SPREAD_DEGREES * 2)
+        located = self.rng.random(count) < 0.9
+        opted_in = self.rng.random(count) < 0.2
+        objects = []
+        for i, (pk, c, (lat, lon)) in enumerate(zip(ids.tolist(), cities.tolist(), coords.tolist())):
+            if not located[i]:
+                lat = lon = None
+            objects.append(VolunteerProfile(
+                user_id=pk, full_name=f'Volunteer {i}', phone_number=f'8{i:09d}', latitude=lat, longitude=lon,
+                location_cell=location_cell(lat, lon), dispatch_opt_in=bool(opted_in[i]), created_at=joined[i],
+            ))
+        with explicit_timestamps(_field(VolunteerProfile, 'created_at')):
+            self.bulk(VolunteerProfile, objects)
+        self.log(f'{count} volunteers')
+        return ids, cities
+
+    def memberships(self, volunteer_ids, volunteer_cities, ngo_pools):
+        """One to three NGOs per volunteer, from their own city."""
+        count = len(volunteer_ids)
+        sizes = np.array([len(pool) for pool in ngo_pools])[volunteer_cities]
+        wanted = np.minimum(self.rng.integers(1, 4, count), sizes)
+        first = (sizes * self.rng.random(count) ** 2).astype(int)
+        joined = _datetimes(self.past(count))
+        objects = []
+        for i in range(count):
+            pool = ngo_pools[volunteer_cities[i]]
+            for k in range(wanted[i]):
+                objects.append(NGOVolunteer(ngo_id=int(pool[(first[i] + k) % sizes[i]]),
+                                            volunteer_id=int(volunteer_ids[i]), date_joined=joined[i]))
+        with explicit_timestamps(_field(NGOVolunteer, 'date_joined')):
+            self.bulk(NGOVolunteer, objects)
+        self.log(f'{len(objects)} memberships')
+
+    def camps(self, count, ngo_ids, ngo_cities):
+        """Every NGO gets a camp before any gets two; most NGOs have one running."""
+        owners = np.concatenate([np.arange(min(count, len(ngo_ids))),
+                                 self.rng.integers(0, len(ngo_ids), max(0, count - len(ngo_ids)))]).astype(int)
+        cities = ngo_cities[owners]
+        coords = self.points(cities)
+        started = self.past(count)
+        first = np.zeros(count, dtype=bool)
+        first[:min(count, len(ngo_ids))] = True
+        active = first & (self.rng.random(count) < 0.8)
+        completed = np.where(active, np.nan, np.minimum(started + self.delays(count, (7 * 24 * 60, 0.7)), self.end))
+        starts, completions = _datetimes(started), _datetimes(completed)
+        with explicit_timestamps(_field(DonationCamp, 'created_at')):
+            self.bulk(DonationCamp, [
+                DonationCamp(ngo_id=int(ngo_ids[owners[i]]), name=f'{self.prefix} camp {i}',
+                             location_address=f'{i} Camp Road, {CITIES[cities[i]][0]}', latitude=lat, longitude=lon,
+                             start_time=starts[i], is_active=bool(active[i]), completed_at=completions[i],
+                             created_at=starts[i])
+                for i, (lat, lon) in enumerate(coords.tolist())
+            ])
+        by_name = dict(DonationCamp.objects.filter(name__startswith=f'{self.prefix} camp ').values_list('name', 'pk'))
+        ids = np.array([by_name[f'{self.prefix} camp {i}'] for i in range(count)], dtype=np.int64)
+        self.log(f'{count} camps ({int(active.sum())} active)')
+        return ids, cities
+
+    def donation_times(self, statuses):
+        """``(created, accepted, collected, delivered, verified)`` epoch seconds, NaN where not reached."""
+        count = len(statuses)
+        accept, collect = self.delays(count, ACCEPT_DELAY), self.delays(count, COLLECT_DELAY)
+        deliver, verify = self.delays(count, DELIVER_DELAY), self.delays(count, VERIFY_DELAY)
+        created = np.empty(count)
+        minutes = self.rng.exponential(1, count) * 60
+
+        # History: a day towards the present, at lunch or dinner time.
+        history = statuses == 'DELIVERED'
+        day = np.floor(self.past(count) / 86400) * 86400
+        hour = np.where(self.rng.random(count) < 0.55, self.rng.normal(14.5, 1.5, count), self.rng.normal(22, 1.5, count))
+        created[history] = (day + (hour % 24) * 3600)[history]
+        # Active donations: counted back from how long they've sat in their current state.
+        recent = {
+            'PENDING': 45 * minutes,
+            'ACCEPTED': 10 * minutes + accept,
+            'COLLECTED': 15 * minutes + accept + collect,
+            'VERIFYING': 120 * minutes + accept + collect + deliver,
+        }
+        for status, age in recent.items():
+            mask = statuses == status
+            created[mask] = (self.end - age)[mask]
+
+        reached = {status: np.isin(statuses, STATUSES[i:]) for i, status in enumerate(STATUSES)}
+        accepted = np.where(reached['ACCEPTED'], created + accept, np.nan)
+        collected = np.where(reached['COLLECTED'], accepted + collect, np.nan)
+        delivered = np.where(reached['VERIFYING'], collected + deliver, np.nan)
+        verified = np.where(reached['DELIVERED'], delivered + verify, np.nan)
+        # History can't end in the future; slide late rows back a little past now.
+        overflow = np.where(history, np.nan_to_num(verified) - self.end, 0)
+        overflow = np.where(overflow > 0, overflow + self.rng.exponential(3600, count), 0)
+        return tuple(times - overflow for times in (created, accepted, collected, delivered, verified))
+
+    def donations(self, count, restaurants, volunteers, camps, weights):
+        restaurant_ids, restaurant_cities = restaurants
+        volunteer_ids, volunteer_cities = volunteers
+        camp_ids, camp_cities = camps
+        restaurant_pools = [restaurant_ids[restaurant_cities == c] for c in range(len(CITIES))]
+        volunteer_pools = [volunteer_ids[volunteer_cities == c] for c in range(len(CITIES))]
+        camp_pools = [camp_ids[camp_cities == c] for c in range(len(CITIES))]
+        # A city's donations go to its own volunteers and camps, or anyone's if it has none.
+        volunteer_pools = [pool if len(pool) else volunteer_ids for pool in volunteer_pools]
+        camp_pools = [pool if len(pool) else camp_ids for pool in camp_pools]
+        city_weights = np.array([len(pool) for pool in restaurant_pools], dtype=float)
+        city_weights /= city_weights.sum()
+        status_p = np.array([weights.get(status, 0) for status in STATUSES], dtype=float)
+        status_p /= status_p.sum()
+        addresses = dict(RestaurantProfile.objects.filter(user_id__in=restaurant_ids.tolist()).values_list('pk', 'address'))
+
+        started = time.perf_counter()
+        food_names = np.array(FOOD, dtype=object)
+        orders = [self.rng.permutation(len(pool)) for pool in volunteer_pools]
+        dealt = [0] * len(CITIES)
+        for start, size in _chunks(count, self.chunk_size):
+            cities = self.rng.choice(len(CITIES), size, p=city_weights)
+            statuses = np.array(STATUSES)[self.rng.choice(len(STATUSES), size, p=status_p)]
+            restaurant = self.skewed(restaurant_pools, cities, 2)
+            # Finished work follows the long tail; active pickups are dealt
+            # out evenly, and stay pending once everyone is at the limit.
+            finished = np.isin(statuses, ['VERIFYING', 'DELIVERED'])
+            active, full = self.deal(volunteer_pools, orders, dealt, cities, np.isin(statuses, ['ACCEPTED', 'COLLECTED']))
+            statuses[full] = 'PENDING'
+            volunteer = np.where(finished, self.skewed(volunteer_pools, cities, 3), active)
+            camp = self.skewed(camp_pools, cities, 2)
+            quantity = np.clip(self.rng.lognormal(np.log(20), 0.7, size), 1, 500).astype(int)
+            food = food_names[self.rng.integers(0, len(FOOD), size)]
+            rated = (statuses == 'DELIVERED') & (self.rng.random(size) < 0.7)
+            rating = self.rng.choice([1, 2, 3, 4, 5], size, p=[0.02, 0.03, 0.1, 0.35, 0.5])
+
+            restaurant = restaurant.tolist()
+            quantity = quantity.tolist()
+            rows = zip(
+                restaurant,
+                [f'{q} {f}' for q, f in zip(quantity, food.tolist())],
+                quantity,
+                [addresses[pk] for pk in restaurant],
+                statuses.tolist(),
+                np.where(statuses != 'PENDING', volunteer, None).tolist(),
+                np.where(finished, camp, None).tolist(),
+                *(_db_timestamps(column) for column in self.donation_times(statuses)),
+                np.where(rated, rating, None).tolist(),
+            )
+            insert_rows(Donation, DONATION_COLUMNS, list(rows))
+            done = start + size
+            if done % (self.chunk_size * 50) == 0 or done == count:
+                rate = done / (time.perf_counter() - started)
+                self.log(f'{done} / {count} donations ({rate:,.0f} rows/s)')
+
+
+def seed(donations, restaurants=None, ngos=None, volunteers=None, camps=None, seed=0, end=None, days=365,
+         prefix='seed', chunk_size=DONATION_CHUNK_SIZE, status_weights=None, rebuild=True, log=None):
+    """
+    Create the given number of each kind of row (sizes left out follow
+    ``defaults(donations)``). ``prefix`` namespaces usernames, registration
+    numbers and camp names, so several seeds can share a database. Returns
+    a summary of what was written.
+    """
+    if User.objects.filter(username__startswith=f'{prefix}-').exists():
+        raise ValueError(f"Users prefixed '{prefix}-' already exist; pick another prefix.")
+    sizes = defaults(donations)
+    sizes.update({k: v for k, v in {'restaurants': restaurants, 'ngos': ngos, 'volunteers': volunteers,
+                                    'camps': camps}.items() if v})
+    sizes['camps'] = max(sizes['camps'], sizes['ngos'])
+    started = time.perf_counter()
+    seeder = Seeder(seed=seed, end=end, days=days, prefix=prefix, chunk_size=chunk_size, log=log)
+
+    restaurant_rows = seeder.restaurants(sizes['restaurants'])
+    ngo_ids, ngo_cities = seeder.ngos(sizes['ngos'])
+    volunteer_rows = seeder.volunteers(sizes['volunteers'])
+    ngo_pools = [ngo_ids[ngo_cities == c] for c in range(len(CITIES))]
+    ngo_pools = [pool if len(pool) else ngo_ids for pool in ngo_pools]
+    seeder.memberships(*volunteer_rows, ngo_pools)
+    camp_rows = seeder.camps(sizes['camps'], ngo_ids, ngo_cities)
+    seeder.donations(donations, restaurant_rows, volunteer_rows, camp_rows, status_weights or STATUS_WEIGHTS)
+
+    if rebuild:
+        seeder.log(f'leaderboard: {leaderboard.rebuild()} entries')
+        seeder.log(f'search index: {search.rebuild()} entries')
+    camp_index.invalidate()
+    page_cache.bump_version()
+    stats.invalidate([stats.PENDING_KEY])
+    return dict(sizes, donations=donations, elapsed_s=round(time.perf_counter() - started, 1))
@@ -1,6 +1,6 @@
 # portal/serializers.py
 from rest_framework import serializers
-from .models import User, NGOProfile, VolunteerProfile, RestaurantProfile
+from .models import User, NGOProfile, VolunteerProfile, RestaurantProfile, Donation, DonationCamp, NGOVolunteer
 
 class RestaurantProfileSerializer(serializers.ModelSerializer):
     class Meta:
@@ -53,4 +53,78 @@ class UserSerializer(serializers.ModelSerializer):
         elif user_type == User.UserType.VOLUNTEER and volunteer_profile_data:
             VolunteerProfile.objects.create(user=user, **volunteer_profile_data)
         
-        return user
\ No newline at end of file
+        return user
+
+
+class SelectableFieldsSerializer(serializers.ModelSerializer):
+    """
+    Model serializer that can be narrowed to a subset of its fields with
+    ``fields=[...]``. ``Meta.columns`` maps each field to the model columns it
+    reads, so the view can load just those with ``only()``.
+    """
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def columns_for(cls, fields):
+        return sorted({column for name in fields for column in cls.Meta.columns[name]})
+
+
+class DonationSerializer(SelectableFieldsSerializer):
+    restaurant_name = serializers.CharField(source='restaurant.restaurant_name', read_only=True)
+    volunteer_name = serializers.CharField(source='assigned_volunteer.full_name', read_only=True, allow_null=True)
+    camp_name = serializers.CharField(source='target_camp.name', read_only=True, allow_null=True)
+
+    class Meta:
+        model = Donation
+        fields = [
+            'id', 'food_description', 'quantity', 'pickup_address', 'status',
+            'restaurant', 'restaurant_name', 'assigned_volunteer', 'volunteer_name', 'target_camp', 'camp_name',
+            'created_at', 'accepted_at', 'collected_at', 'delivered_at', 'verified_at', 'rating', 'review',
+        ]
+        read_only_fields = [
+            'status', 'restaurant', 'assigned_volunteer', 'target_camp',
+            'created_at', 'accepted_at', 'collected_at', 'delivered_at', 'verified_at', 'rating', 'review',
+        ]
+        columns = {
+            **{name: [name] for name in fields},
+            'restaurant': ['restaurant'],
+            'restaurant_name': ['restaurant__restaurant_name'],
+            'assigned_volunteer': ['assigned_volunteer'],
+            'volunteer_name': ['assigned_volunteer__full_name'],
+            'target_camp': ['target_camp'],
+            'camp_name': ['target_camp__name'],
+        }
+
+
+class DonationCampSerializer(SelectableFieldsSerializer):
+    ngo_name = serializers.CharField(source='ngo.ngo_name', read_only=True)
+
+    class Meta:
+        model = DonationCamp
+        fields = [
+            'id', 'ngo', 'ngo_name', 'name', 'location_address', 'latitude', 'longitude',
+            'start_time', 'is_active', 'created_at', 'completed_at',
+        ]
+        read_only_fields = ['ngo', 'created_at', 'completed_at']
+        # Form posts leave out unchecked booleans; a new camp is still open.
+        extra_kwargs = {'is_active': {'default': True}}
+        columns = {**{name: [name] for name in fields}, 'ngo_name': ['ngo__ngo_name']}
+
+
+class MembershipSerializer(SelectableFieldsSerializer):
+    ngo_name = serializers.CharField(source='ngo.ngo_name', read_only=True)
+    volunteer_name = serializers.CharField(source='volunteer.full_name', read_only=True)
+
+    class Meta:
+        model = NGOVolunteer
+        fields = ['id', 'ngo', 'ngo_name', 'volunteer', 'volunteer_name', 'date_joined']
+        read_only_fields = ['volunteer', 'date_joined']
+        columns = {
+            **{name: [name] for name in fields},
+            'ngo_name': ['ngo__ngo_name'],
+            'volunteer_name': ['volunteer__full_name'],
+        }
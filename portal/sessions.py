@@ -0,0 +1,40 @@
+# portal/sessions.py
+"""
+Session engine: Django's ``cached_db`` store that skips unchanged writes.
+
+Sessions are read from the shared cache (Redis in production) and only fall
+back to ``django_session`` on a miss, such as after a restart or an
+eviction. Writes go through to both, so the database copy is always current.
+
+Django saves a session whenever it is marked modified, which also happens
+when a view stores a value it already had or a request re-runs a step. This
+store keeps the serialized data as it was loaded and saves only if the data
+now differs, so a session is written when its contents actually change.
+
+``SESSION_STORE`` in settings picks this engine (``cache``), signed-cookie
+sessions (``cookie``: nothing stored server-side, but every request carries
+the data and the client can read it, so keep it small) or Django's plain
+database engine (``db``).
+"""
+from django.contrib.sessions.backends import cached_db
+
+
+class SessionStore(cached_db.SessionStore):
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._saved = None
+
+    def _snapshot(self, data):
+        return self.serializer().dumps(data)
+
+    def load(self):
+        data = super().load()
+        self._saved = self._snapshot(data)
+        return data
+
+    def save(self, must_create=False):
+        data = self._get_session(no_load=must_create)
+        if not must_create and self.session_key is not None and self._saved == self._snapshot(data):
+            return
+        super().save(must_create)
+        self._saved = self._snapshot(data)
@@ -0,0 +1,209 @@
+# portal/signals.py
+"""
+Model signal handlers for the portal app.
+"""
+import copy
+
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_save
+from django.db import transaction
+from django.dispatch import receiver
+
+from . import images, page_cache, search, stats
+from .models import Donation, DonationCamp, NGOProfile, NGOVolunteer, RestaurantProfile, VolunteerProfile
+from .geo import camp_index, location_cell
+
+
+# --- Spatial index maintenance ---
+
+# The index is shared by the whole process, so it only changes once the
+# saving transaction commits; a rollback leaves it untouched.
+
+@receiver(post_save, sender=DonationCamp)
+def update_camp_index(sender, instance, **kwargs):
+    camp = copy.copy(instance)  # as saved, not as edited before the commit
+    transaction.on_commit(lambda: camp_index.update_from_camp(camp))
+
+
+@receiver(post_delete, sender=DonationCamp)
+def remove_from_camp_index(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: camp_index.discard(pk))
+
+
+# --- Volunteer location cells (used for geo-targeted notifications) ---
+
+@receiver(pre_save, sender=VolunteerProfile)
+def set_volunteer_location_cell(sender, instance, **kwargs):
+    instance.location_cell = location_cell(instance.latitude, instance.longitude)
+
+
+
+# --- Dashboard statistics invalidation ---
+
+def _donation_row(instance):
+    # Read from __dict__ so deferred fields don't trigger a query.
+    values = instance.__dict__
+    return (values.get('restaurant_id'), values.get('assigned_volunteer_id'), values.get('target_camp_id'))
+
+
+@receiver(post_init, sender=Donation)
+def remember_donation_links(sender, instance, **kwargs):
+    instance._stats_original = _donation_row(instance)
+
+
+@receiver(post_save, sender=Donation)
+def invalidate_donation_stats(sender, instance, **kwargs):
+    rows = {_donation_row(instance), getattr(instance, '_stats_original', _donation_row(instance))}
+    stats.invalidate_donations(rows)
+    instance._stats_original = _donation_row(instance)
+
+
+@receiver(post_delete, sender=Donation)
+def invalidate_deleted_donation_stats(sender, instance, **kwargs):
+    stats.invalidate_donations([_donation_row(instance)])
+
+
+@receiver(post_save, sender=DonationCamp)
+@receiver(post_delete, sender=DonationCamp)
+def invalidate_camp_stats(sender, instance, **kwargs):
+    stats.invalidate([stats.ngo_key(instance.ngo_id)])
+
+
+@receiver(post_save, sender=NGOVolunteer)
+@receiver(post_delete, sender=NGOVolunteer)
+def invalidate_membership_stats(sender, instance, **kwargs):
+    stats.invalidate([stats.ngo_key(instance.ngo_id), stats.volunteer_key(instance.volunteer_id)])
+
+
+@receiver(m2m_changed, sender=NGOVolunteer)
+def invalidate_membership_stats_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    # ngo.volunteers.add()/remove() bypass NGOVolunteer.save()/delete().
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if isinstance(instance, NGOProfile):
+        ngo_ids, volunteer_ids = [instance.pk], pk_set
+        if action == 'pre_clear':
+            volunteer_ids = NGOVolunteer.objects.filter(ngo=instance).values_list('volunteer_id', flat=True)
+    else:
+        ngo_ids, volunteer_ids = pk_set, [instance.pk]
+        if action == 'pre_clear':
+            ngo_ids = NGOVolunteer.objects.filter(volunteer=instance).values_list('ngo_id', flat=True)
+    if action == 'post_clear':
+        return
+    stats.invalidate(
+        [stats.ngo_key(pk) for pk in ngo_ids or []]
+        + [stats.volunteer_key(pk) for pk in volunteer_ids or []]
+    )
+
+
+
+# --- Public map / landing page cache ---
+
+MAP_RESTAURANT_FIELDS = ('latitude', 'longitude', 'restaurant_name', 'address')
+
+
+def _restaurant_map_entry(instance):
+    return tuple(instance.__dict__.get(field) for field in MAP_RESTAURANT_FIELDS)
+
+
+@receiver(post_init, sender=RestaurantProfile)
+def remember_restaurant_map_entry(sender, instance, **kwargs):
+    instance._map_original = _restaurant_map_entry(instance)
+
+
+@receiver(post_save, sender=RestaurantProfile)
+def bump_map_version_for_restaurant(sender, instance, created, **kwargs):
+    if created or instance._map_original != _restaurant_map_entry(instance):
+        page_cache.bump_version()
+    instance._map_original = _restaurant_map_entry(instance)
+
+
+# Camp markers show their NGO's name; deleting an NGO deletes its camps.
+@receiver(post_init, sender=NGOProfile)
+def remember_ngo_map_name(sender, instance, **kwargs):
+    instance._map_original = instance.__dict__.get('ngo_name')
+
+
+@receiver(post_save, sender=NGOProfile)
+def bump_map_version_for_ngo(sender, instance, created, **kwargs):
+    if not created and instance._map_original != instance.__dict__.get('ngo_name'):
+        page_cache.bump_version()
+    instance._map_original = instance.__dict__.get('ngo_name')
+
+
+@receiver(post_delete, sender=RestaurantProfile)
+@receiver(post_save, sender=DonationCamp)
+@receiver(post_delete, sender=DonationCamp)
+def bump_map_version(sender, instance, **kwargs):
+    page_cache.bump_version()
+
+
+# --- Search index ---
+
+@receiver(post_init, sender=Donation)
+@receiver(post_init, sender=RestaurantProfile)
+@receiver(post_init, sender=NGOProfile)
+@receiver(post_init, sender=DonationCamp)
+def remember_search_fields(sender, instance, **kwargs):
+    instance._search_original = search.DOCUMENTS[sender].snapshot(instance)
+
+
+@receiver(post_save, sender=Donation)
+@receiver(post_save, sender=RestaurantProfile)
+@receiver(post_save, sender=NGOProfile)
+@receiver(post_save, sender=DonationCamp)
+def update_search_entry(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        search.index_instance(instance, created)
+
+
+@receiver(post_delete, sender=Donation)
+@receiver(post_delete, sender=RestaurantProfile)
+@receiver(post_delete, sender=NGOProfile)
+@receiver(post_delete, sender=DonationCamp)
+def remove_search_entry(sender, instance, **kwargs):
+    search.remove_objects(sender, [instance.pk])
+
+
+# --- Image variants and superseded files (see portal/images.py) ---
+
+def _image_names(instance):
+    # Read from __dict__ so deferred fields don't trigger a query.
+    values = instance.__dict__
+    return {
+        field: getattr(values[field], 'name', values[field]) or ''
+        for field in images.image_fields(type(instance)) if field in values
+    }
+
+
+@receiver(post_init, sender=RestaurantProfile)
+@receiver(post_init, sender=NGOProfile)
+@receiver(post_init, sender=VolunteerProfile)
+def remember_image_names(sender, instance, **kwargs):
+    instance._images_original = _image_names(instance)
+
+
+@receiver(post_save, sender=RestaurantProfile)
+@receiver(post_save, sender=NGOProfile)
+@receiver(post_save, sender=VolunteerProfile)
+def queue_image_processing(sender, instance, raw=False, **kwargs):
+    current = _image_names(instance)
+    original = instance._images_original
+    changes = [
+        (field, name, original[field]) for field, name in current.items()
+        if field in original and name != original[field]
+    ]
+    instance._images_original = current
+    if changes and not raw:
+        label, pk = sender._meta.label, instance.pk
+        transaction.on_commit(lambda: images.pipeline.submit(images.process, label, pk, changes))
+
+
+@receiver(post_delete, sender=RestaurantProfile)
+@receiver(post_delete, sender=NGOProfile)
+@receiver(post_delete, sender=VolunteerProfile)
+def queue_image_deletion(sender, instance, **kwargs):
+    names = list(_image_names(instance).values())
+    names += [name for manifest in (instance.image_variants or {}).values() for name in images.variant_files(manifest)]
+    if any(names):
+        transaction.on_commit(lambda: images.pipeline.submit(images.delete_files, names))
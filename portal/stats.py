@@ -0,0 +1,141 @@
+# portal/stats.py
+"""
+Dashboard counters for restaurants, NGOs and volunteers.
+
+Each role's counters come from a single conditional-aggregation query and are
+cached per profile. The signal handlers in ``portal/signals.py`` delete
+exactly the entries a change can affect, so a repeat dashboard load normally
+runs no counting queries at all.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Donation, DonationCamp, NGOProfile, NGOVolunteer, VolunteerProfile
+
+ACTIVE_STATUSES = ['ACCEPTED', 'COLLECTED']
+
+
+def _timeout():
+    return getattr(settings, 'STATS_CACHE_TIMEOUT', 300)
+
+
+def restaurant_key(restaurant_id):
+    return f'stats:restaurant:{restaurant_id}'
+
+
+def ngo_key(ngo_id):
+    return f'stats:ngo:{ngo_id}'
+
+
+def volunteer_key(volunteer_id):
+    return f'stats:volunteer:{volunteer_id}'
+
+
+PENDING_KEY = 'stats:pending_donations'
+
+
+def _count_subquery(queryset, group_field):
+    """Correlated ``COUNT(*)`` of ``queryset`` rows whose ``group_field`` is the outer pk."""
+    counted = (
+        queryset.filter(**{group_field: OuterRef('pk')})
+        .order_by()
+        .values(group_field)
+        .annotate(c=Count('pk'))
+        .values('c')
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+# --- Counters ---
+
+def get_restaurant_stats(restaurant_id):
+    key = restaurant_key(restaurant_id)
+    stats = cache.get(key)
+    if stats is None:
+        stats = Donation.objects.filter(restaurant_id=restaurant_id).aggregate(
+            total_donations=Count('pk'),
+            pending_donations=Count('pk', filter=Q(status='PENDING')),
+            active_donations=Count('pk', filter=Q(status__in=ACTIVE_STATUSES)),
+            completed_donations=Count('pk', filter=Q(status='DELIVERED')),
+        )
+        cache.set(key, stats, _timeout())
+    return stats
+
+
+def get_ngo_stats(ngo_id):
+    key = ngo_key(ngo_id)
+    stats = cache.get(key)
+    if stats is None:
+        stats = NGOProfile.objects.filter(pk=ngo_id).annotate(
+            active_camps=_count_subquery(DonationCamp.objects.filter(is_active=True), 'ngo'),
+            total_volunteers=_count_subquery(NGOVolunteer.objects.all(), 'ngo'),
+            donations_to_verify=_count_subquery(Donation.objects.filter(status='VERIFYING'), 'target_camp__ngo'),
+            total_donations_received=_count_subquery(Donation.objects.filter(status='DELIVERED'), 'target_camp__ngo'),
+        ).values('active_camps', 'total_volunteers', 'donations_to_verify', 'total_donations_received').first() or {}
+        cache.set(key, stats, _timeout())
+    return stats
+
+
+def get_pending_donation_count():
+    count = cache.get(PENDING_KEY)
+    if count is None:
+        count = Donation.objects.filter(status='PENDING').count()
+        cache.set(PENDING_KEY, count, _timeout())
+    return count
+
+
+def get_volunteer_stats(volunteer_id):
+    key = volunteer_key(volunteer_id)
+    stats = cache.get(key)
+    if stats is None:
+        stats = VolunteerProfile.objects.filter(pk=volunteer_id).annotate(
+            active_pickups=_count_subquery(Donation.objects.filter(status__in=ACTIVE_STATUSES), 'assigned_volunteer'),
+            completed_deliveries=_count_subquery(Donation.objects.filter(status='DELIVERED'), 'assigned_volunteer'),
+            registered_ngos_count=_count_subquery(NGOVolunteer.objects.all(), 'volunteer'),
+        ).values('active_pickups', 'completed_deliveries', 'registered_ngos_count').first() or {}
+        cache.set(key, stats, _timeout())
+    stats = dict(stats)
+    stats['registered_ngos'] = stats.pop('registered_ngos_count', 0)
+    stats['available_donations'] = get_pending_donation_count()
+    return stats
+
+
+# --- Invalidation ---
+
+def invalidate(keys):
+    """
+    Drop cache entries now and again once the surrounding transaction
+    commits, so a reader can't re-cache pre-commit numbers in between.
+    """
+    keys = [k for k in set(keys) if k]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def keys_for_donations(rows):
+    """
+    Cache keys affected by changes to donations described by
+    ``(restaurant_id, assigned_volunteer_id, target_camp_id)`` tuples.
+    """
+    rows = list(rows)
+    keys = [PENDING_KEY]
+    camp_ids = set()
+    for restaurant_id, volunteer_id, camp_id in rows:
+        keys.append(restaurant_key(restaurant_id))
+        if volunteer_id:
+            keys.append(volunteer_key(volunteer_id))
+        if camp_id:
+            camp_ids.add(camp_id)
+    if camp_ids:
+        ngo_ids = DonationCamp.objects.filter(pk__in=camp_ids).values_list('ngo_id', flat=True)
+        keys.extend(ngo_key(ngo_id) for ngo_id in set(ngo_ids))
+    return keys
+
+
+def invalidate_donations(rows):
+    invalidate(keys_for_donations(rows))
@@ -1,6 +1,9 @@
 from django import template
+from django.core.files.storage import default_storage
 from django.urls import reverse
 
+from ..images import pick_variant
+
 register = template.Library()
 
 @register.simple_tag
@@ -15,4 +18,22 @@ def get_dashboard_url(user):
     elif user.user_type == 'VOLUNTEER':
         return reverse('volunteer_dashboard')
     # For new users, send them to complete their profile
-    return reverse('register_step_2')
\ No newline at end of file
+    return reverse('register_step_2')
+
+@register.simple_tag
+def image_url(instance, field, width, fmt='webp'):
+    """
+    URL of the smallest resized copy of ``instance.<field>`` at least
+    ``width`` pixels wide (``fmt`` 'webp', or 'fallback' for JPEG/PNG).
+    Until the copies are ready this is the original; '' if there is no image.
+    """
+    image = getattr(instance, field, None)
+    if not image:
+        return ''
+    manifest = (getattr(instance, 'image_variants', None) or {}).get(field)
+    if manifest and manifest['source'] == image.name:
+        return default_storage.url(pick_variant(manifest, int(width), fmt))
+    try:
+        return image.url
+    except ValueError:
+        return ''
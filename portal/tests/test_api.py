@@ -0,0 +1,146 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from portal.models import Donation, DonationCamp, NGOProfile, NGOVolunteer, RestaurantProfile, User, VolunteerProfile
+
+
+@override_settings(PAGE_SIZE=3)
+class PortalAPITests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.restaurant = RestaurantProfile.objects.create(
+            user=User.objects.create(username='restaurant', user_type='RESTAURANT'),
+            restaurant_name='Spice Route', address='x',
+        )
+        self.ngo = NGOProfile.objects.create(
+            user=User.objects.create(username='ngo', user_type='NGO'),
+            ngo_name='NGO', registration_number='R1', address='x', contact_person='y',
+        )
+        self.volunteer = VolunteerProfile.objects.create(
+            user=User.objects.create(username='volunteer', user_type='VOLUNTEER'), full_name='V',
+        )
+        self.camp = DonationCamp.objects.create(ngo=self.ngo, name='Camp', location_address='x', start_time=timezone.now())
+
+    def donate(self, count, **fields):
+        return [
+            Donation.objects.create(restaurant=self.restaurant, food_description=f'Meal {i}', quantity=1,
+                                    pickup_address='x', **fields)
+            for i in range(count)
+        ]
+
+    def walk(self, url):
+        ids, pages = [], []
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                body = self.client.get(url).json()
+            pages.append(len(queries))
+            ids.extend(row['id'] for row in body['results'])
+            url = body['next']
+        return ids, pages
+
+    def test_cursor_pages_cover_the_restaurants_donations_at_a_fixed_query_count(self):
+        donations = self.donate(8)
+        self.client.force_login(self.restaurant.user)
+
+        ids, pages = self.walk(reverse('api_donations'))
+        self.assertEqual(ids, [d.pk for d in reversed(donations)])
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(len(set(pages)), 1)
+
+    def test_fields_narrow_the_response_and_the_columns_loaded(self):
+        self.donate(2, assigned_volunteer=self.volunteer, status='ACCEPTED')
+        self.client.force_login(self.volunteer.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            body = self.client.get(reverse('api_donations'), {'fields': 'id,status'}).json()
+        self.assertEqual([set(row) for row in body['results']], [{'id', 'status'}] * 2)
+        sql = queries[-1]['sql']
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('food_description', sql)
+
+        body = self.client.get(reverse('api_donations'), {'fields': 'id,restaurant_name,camp_name'}).json()
+        self.assertEqual(body['results'][0], {'id': body['results'][0]['id'], 'restaurant_name': 'Spice Route', 'camp_name': None})
+
+    def test_unchanged_list_is_not_modified(self):
+        self.donate(2)
+        self.client.force_login(self.restaurant.user)
+        url = reverse('api_donations')
+
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('private', first['Cache-Control'])
+        again = self.client.get(url, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b'')
+
+        self.donate(1)
+        changed = self.client.get(url, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+
+    def test_lists_are_scoped_to_the_user(self):
+        pending, = self.donate(1)
+        mine, = self.donate(1, assigned_volunteer=self.volunteer, status='ACCEPTED')
+        delivered, = self.donate(1, assigned_volunteer=self.volunteer, status='VERIFYING', target_camp=self.camp)
+        self.client.force_login(self.volunteer.user)
+
+        ids = lambda params={}: [row['id'] for row in self.client.get(reverse('api_donations'), params).json()['results']]
+        self.assertEqual(ids(), [delivered.pk, mine.pk])
+        self.assertEqual(ids({'status': 'PENDING'}), [pending.pk])
+        self.assertEqual(self.client.get(reverse('api_donations'), {'status': 'LOST'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('api_donation_detail', args=[mine.pk])).status_code, 200)
+
+        self.client.force_login(self.ngo.user)
+        self.assertEqual(ids(), [delivered.pk])
+        self.assertEqual(self.client.get(reverse('api_donation_detail', args=[mine.pk])).status_code, 404)
+
+    def test_restaurant_posts_a_donation_with_its_token(self):
+        token = Token.objects.create(user=self.restaurant.user)
+        data = {'food_description': 'Rice', 'quantity': 4, 'pickup_address': 'Back door', 'status': 'DELIVERED'}
+
+        response = self.client.post(reverse('api_donations'), data, headers={'Authorization': f'Token {token.key}'})
+        self.assertEqual(response.status_code, 201)
+        donation = Donation.objects.get(pk=response.json()['id'])
+        self.assertEqual((donation.restaurant, donation.status), (self.restaurant, 'PENDING'))
+
+        self.client.force_login(self.volunteer.user)
+        self.assertEqual(self.client.post(reverse('api_donations'), data).status_code, 403)
+
+    def test_ngo_opens_and_completes_a_camp(self):
+        self.client.force_login(self.ngo.user)
+        response = self.client.post(reverse('api_camps'), {
+            'name': 'Riverside', 'location_address': 'x', 'start_time': timezone.now().isoformat(),
+        })
+        self.assertEqual(response.status_code, 201)
+        url = reverse('api_camp_detail', args=[response.json()['id']])
+
+        response = self.client.patch(url, {'is_active': False}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.json()['completed_at'])
+        self.assertEqual(len(self.client.get(reverse('api_camps'), {'active': 'true'}).json()['results']), 1)
+
+        self.client.force_login(self.volunteer.user)
+        self.assertEqual([c['name'] for c in self.client.get(reverse('api_camps')).json()['results']], ['Camp'])
+        self.assertEqual(self.client.patch(reverse('api_camp_detail', args=[self.camp.pk]), {'name': 'Mine'},
+                                           content_type='application/json').status_code, 403)
+
+    def test_volunteer_registers_with_an_ngo_once_and_leaves(self):
+        self.client.force_login(self.volunteer.user)
+        response = self.client.post(reverse('api_memberships'), {'ngo': self.ngo.pk})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['ngo_name'], 'NGO')
+        self.assertEqual(self.client.post(reverse('api_memberships'), {'ngo': self.ngo.pk}).status_code, 400)
+
+        self.client.force_login(self.ngo.user)
+        body = self.client.get(reverse('api_memberships')).json()
+        self.assertEqual([row['volunteer_name'] for row in body['results']], ['V'])
+
+        self.client.force_login(self.volunteer.user)
+        response = self.client.delete(reverse('api_membership_detail', args=[body['results'][0]['id']]))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(NGOVolunteer.objects.exists())
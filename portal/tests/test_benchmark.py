@@ -0,0 +1,22 @@
+from django.test import TestCase
+
+from portal import benchmark
+
+
+class BenchmarkTests(TestCase):
+    def test_every_scenario_succeeds_on_a_small_dataset(self):
+        report = benchmark.run([40], repeat=2)
+        views = report['runs'][0]['views']
+        self.assertEqual(set(views), {s.name for s in benchmark.SCENARIOS})
+        for scenario in benchmark.SCENARIOS:
+            result = views[scenario.name]
+            self.assertTrue(all(200 <= s < 400 for s in result['statuses']), (scenario.name, result['statuses']))
+            if scenario.method == 'get':
+                self.assertGreater(result['bytes'], 0, scenario.name)
+            self.assertLessEqual(result['p50_ms'], result['max_ms'])
+
+    def test_compare_flags_more_queries(self):
+        report = {'runs': [{'size': 10, 'views': {'index': {'queries': 5, 'p50_ms': 1.0}}}]}
+        baseline = {'runs': [{'size': 10, 'views': {'index': {'queries': 3, 'p50_ms': 1.0}}}]}
+        self.assertEqual(len(benchmark.compare(report, baseline)), 1)
+        self.assertEqual(benchmark.compare(baseline, baseline), [])
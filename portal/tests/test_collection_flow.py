@@ -3,6 +3,7 @@ from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta
 from portal.models import Donation, VolunteerProfile, User, RestaurantProfile
+from portal.expiry import release_expired_acceptances
 
 class VolunteerCollectionFlowTests(TestCase):
     def setUp(self):
@@ -62,7 +63,7 @@ class VolunteerCollectionFlowTests(TestCase):
         donation.save()
 
         # Trigger cleanup
-        self.client.get(reverse('volunteer_manage_pickups'))
+        release_expired_acceptances()
 
         donation.refresh_from_db()
         self.assertEqual(donation.status, 'COLLECTED')
@@ -96,8 +97,8 @@ class VolunteerCollectionFlowTests(TestCase):
             collected_at=old_time + timedelta(minutes=10)
         )
 
-        # Trigger cleanup via the view
-        self.client.get(reverse('volunteer_manage_pickups'))
+        # Trigger cleanup via the sweeper
+        release_expired_acceptances()
 
         d_accepted.refresh_from_db()
         d_collected.refresh_from_db()
@@ -109,3 +110,25 @@ class VolunteerCollectionFlowTests(TestCase):
         # Verify d_collected is untouched
         self.assertEqual(d_collected.status, 'COLLECTED')
         self.assertEqual(d_collected.assigned_volunteer, self.volunteer_profile)
+
+    def test_pickups_view_does_not_release_acceptances(self):
+        """
+        Expiry is the sweeper's job; the read view must not write.
+        """
+        donation = Donation.objects.create(
+            restaurant=self.restaurant_profile,
+            food_description='Stale',
+            quantity=10,
+            pickup_address='123 Main St',
+            status='ACCEPTED',
+            assigned_volunteer=self.volunteer_profile,
+            accepted_at=timezone.now() - timedelta(minutes=40)
+        )
+
+        self.client.get(reverse('volunteer_manage_pickups'))
+        donation.refresh_from_db()
+        self.assertEqual(donation.status, 'ACCEPTED')
+
+        self.assertEqual(release_expired_acceptances(batch_size=1), 1)
+        donation.refresh_from_db()
+        self.assertEqual(donation.status, 'PENDING')
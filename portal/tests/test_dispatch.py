@@ -0,0 +1,98 @@
+import itertools
+import random
+
+import numpy as np
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from portal import dispatch, transitions
+from portal.models import Donation, DonationCamp, NGOProfile, NGOVolunteer, RestaurantProfile, User, VolunteerProfile
+
+
+class AssignmentTests(TestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(3)
+        for _ in range(50):
+            rows, cols = rng.randint(1, 5), rng.randint(1, 5)
+            cost = np.array([[rng.random() * 10 for _ in range(cols)] for _ in range(rows)])
+            r, c = dispatch.linear_sum_assignment(cost)
+            self.assertEqual(len(set(r)), min(rows, cols))
+            self.assertEqual(len(set(c)), min(rows, cols))
+            if rows <= cols:
+                best = min(sum(cost[i, p[i]] for i in range(rows)) for p in itertools.permutations(range(cols), rows))
+            else:
+                best = min(sum(cost[p[j], j] for j in range(cols)) for p in itertools.permutations(range(rows), cols))
+            self.assertAlmostEqual(cost[r, c].sum(), best)
+
+
+class DispatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.ngo = NGOProfile.objects.create(
+            user=User.objects.create(username='ngo', user_type='NGO'),
+            ngo_name='NGO', registration_number='R1', address='x', contact_person='y',
+        )
+        DonationCamp.objects.create(ngo=self.ngo, name='Camp', location_address='x', start_time=timezone.now())
+        self.west = self.volunteer('west', 77.10)
+        self.east = self.volunteer('east', 77.30)
+
+    def volunteer(self, name, lon, opted_in=True, member=True):
+        volunteer = VolunteerProfile.objects.create(
+            user=User.objects.create(username=name, user_type='VOLUNTEER'), full_name=name,
+            latitude=28.6, longitude=lon, dispatch_opt_in=opted_in,
+        )
+        if member:
+            NGOVolunteer.objects.create(ngo=self.ngo, volunteer=volunteer)
+        return volunteer
+
+    def donation(self, lon, count=1):
+        restaurant = RestaurantProfile.objects.create(
+            user=User.objects.create(username=f'r{RestaurantProfile.objects.count()}', user_type='RESTAURANT'),
+            restaurant_name='R', address='x', latitude=28.6, longitude=lon,
+        )
+        return [Donation.objects.create(restaurant=restaurant, food_description='Meals', quantity=1, pickup_address='x')
+                for _ in range(count)]
+
+    def matched(self):
+        return {donation_id: volunteer.pk for donation_id, volunteer, _ in dispatch.plan()}
+
+    def test_each_donation_goes_to_the_closest_free_volunteer(self):
+        west_side = self.donation(77.12)[0]
+        east_side = self.donation(77.28)[0]
+        self.assertEqual(self.matched(), {west_side.pk: self.west.pk, east_side.pk: self.east.pk})
+
+    def test_capacity_opt_in_membership_and_radius(self):
+        self.volunteer('lazy', 77.29, opted_in=False)
+        self.volunteer('loner', 77.29, member=False)
+        for donation in self.donation(77.30, count=transitions.MAX_ACTIVE_PICKUPS - 1):
+            Donation.objects.filter(pk=donation.pk).update(status='ACCEPTED', assigned_volunteer=self.east)
+        near_east = self.donation(77.29, count=3)
+        far_away = self.donation(78.50)[0]
+
+        matched = self.matched()
+        self.assertNotIn(far_away.pk, matched)
+        # East has one slot left, west is ~18 km away and the others don't qualify.
+        self.assertEqual(sorted(matched.values()), [self.east.pk])
+        self.assertIn(matched.popitem()[0], [d.pk for d in near_east])
+
+    @override_settings(DISPATCH_MODE='assign')
+    def test_assign_mode_accepts_through_the_transition(self):
+        donation = self.donation(77.12)[0]
+        summary = dispatch.run()
+        self.assertEqual((summary['matched'], summary['assigned']), (1, 1))
+        donation.refresh_from_db()
+        self.assertEqual((donation.status, donation.assigned_volunteer_id), ('ACCEPTED', self.west.pk))
+        self.assertIsNotNone(donation.accepted_at)
+
+    def test_suggestions_are_highlighted_for_the_volunteer(self):
+        donation = self.donation(77.12)[0]
+        self.assertEqual(dispatch.run(mode=dispatch.SUGGEST)['matched'], 1)
+        donation.refresh_from_db()
+        self.assertEqual(donation.status, 'PENDING')
+
+        self.client.force_login(self.west.user)
+        response = self.client.get(reverse('volunteer_manage_pickups'))
+        self.assertEqual(response.context['suggested_ids'], {donation.pk})
+        self.assertContains(response, 'Suggested for you')
@@ -0,0 +1,140 @@
+import random
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from geopy.distance import geodesic
+
+from portal.geo import CampSpatialIndex, camp_index, nearby_donations
+from portal.models import Donation, DonationCamp, NGOProfile, RestaurantProfile, User, VolunteerProfile
+
+
+class CampSpatialIndexTests(TestCase):
+    def setUp(self):
+        self.rng = random.Random(42)
+        self.ngos = []
+        for i in range(3):
+            user = User.objects.create_user(username=f'ngo{i}', password='password123', user_type='NGO')
+            self.ngos.append(NGOProfile.objects.create(
+                user=user, ngo_name=f'NGO {i}', registration_number=f'REG{i}',
+                address='Somewhere', contact_person='Contact'
+            ))
+        for i in range(60):
+            DonationCamp.objects.create(
+                ngo=self.rng.choice(self.ngos),
+                name=f'Camp {i}',
+                location_address='Somewhere',
+                latitude=28.4 + self.rng.random() * 0.5,
+                longitude=76.9 + self.rng.random() * 0.5,
+                start_time=timezone.now(),
+            )
+
+    def brute_force(self, lat, lon, ngo_ids):
+        best = None
+        for camp in DonationCamp.objects.filter(ngo__in=ngo_ids, is_active=True):
+            dist = geodesic((lat, lon), (camp.latitude, camp.longitude)).km
+            if best is None or dist < best[0]:
+                best = (dist, camp.pk)
+        return best
+
+    def test_nearest_matches_brute_force(self):
+        index = CampSpatialIndex(cell_degrees=0.05)
+        for _ in range(25):
+            lat = 28.2 + self.rng.random() * 0.9
+            lon = 76.7 + self.rng.random() * 0.9
+            ngo_ids = [ngo.pk for ngo in self.rng.sample(self.ngos, 2)]
+            result = index.nearest(lat, lon, k=1, ngo_ids=ngo_ids)
+            self.assertEqual(result[0][1], self.brute_force(lat, lon, ngo_ids)[1])
+
+    def test_signals_keep_index_in_sync(self):
+        camp_index.rebuild()
+        with self.captureOnCommitCallbacks(execute=True):
+            camp = DonationCamp.objects.create(
+                ngo=self.ngos[0], name='Exact Spot', location_address='Here',
+                latitude=10.0, longitude=10.0, start_time=timezone.now(),
+            )
+        self.assertEqual(camp_index.nearest(10.0, 10.0)[0][1], camp.pk)
+
+        camp.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            camp.save()
+        self.assertNotEqual(camp_index.nearest(10.0, 10.0)[0][1], camp.pk)
+
+    def test_rolled_back_changes_leave_index_alone(self):
+        camp_index.rebuild()
+        try:
+            with transaction.atomic():
+                DonationCamp.objects.create(
+                    ngo=self.ngos[0], name='Phantom', location_address='Here',
+                    latitude=10.0, longitude=10.0, start_time=timezone.now(),
+                )
+                DonationCamp.objects.all().delete()
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(len(camp_index), DonationCamp.objects.count())
+
+
+class NearbyDonationsTests(TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        for i in range(40):
+            user = User.objects.create(username=f'restaurant{i}', user_type='RESTAURANT')
+            restaurant = RestaurantProfile.objects.create(
+                user=user, restaurant_name=f'Restaurant {i}', address='Somewhere',
+                latitude=28.0 + rng.random() * 2, longitude=77.0 + rng.random() * 2,
+            )
+            Donation.objects.create(restaurant=restaurant, food_description='Rice', quantity=5, pickup_address='Somewhere')
+
+    def test_matches_brute_force_within_radius(self):
+        lat, lon, radius = 28.9, 77.9, 40
+        expected = sorted(
+            (geodesic((lat, lon), (d.restaurant.latitude, d.restaurant.longitude)).km, d.pk)
+            for d in Donation.objects.select_related('restaurant')
+        )
+        # Haversine and geodesic differ slightly, so stay clear of the boundary.
+        expected = [pk for dist, pk in expected if dist < radius * 0.99]
+
+        results = nearby_donations(Donation.objects.filter(status='PENDING'), lat, lon, radius_km=radius, limit=100)
+        pks = [d.pk for d in results]
+        self.assertTrue(set(expected) <= set(pks))
+        self.assertEqual([d.distance_km for d in results], sorted(d.distance_km for d in results))
+        self.assertTrue(all(d.distance_km <= radius for d in results))
+
+    def test_limit_keeps_closest(self):
+        results = nearby_donations(Donation.objects.all(), 29.0, 78.0, radius_km=500, limit=5)
+        everything = nearby_donations(Donation.objects.all(), 29.0, 78.0, radius_km=500, limit=100)
+        self.assertEqual([d.pk for d in results], [d.pk for d in everything[:5]])
+
+
+@override_settings(NEARBY_DONATIONS_LIMIT=3, NEARBY_DONATIONS_MAX_RADIUS_KM=50)
+class NearbyDonationsAPITests(TestCase):
+    def setUp(self):
+        for i in range(5):
+            restaurant = RestaurantProfile.objects.create(
+                user=User.objects.create(username=f'restaurant{i}', user_type='RESTAURANT'),
+                restaurant_name=f'Restaurant {i}', address='Somewhere', latitude=29.0 + i * 0.01, longitude=78.0,
+            )
+            Donation.objects.create(restaurant=restaurant, food_description='Rice', quantity=5, pickup_address='Somewhere')
+        volunteer = VolunteerProfile.objects.create(
+            user=User.objects.create(username='volunteer', user_type='VOLUNTEER'), full_name='V',
+        )
+        self.client.force_login(volunteer.user)
+
+    def get(self, **params):
+        return self.client.get(reverse('nearby_donations_api'), {'lat': 29.0, 'lon': 78.0, **params})
+
+    def test_limit_and_radius_are_bounded(self):
+        for limit, expected in (('-1', 1), ('0', 1), ('2', 2), ('100', 3)):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.get(radius=50, limit=limit).json()['count'], expected)
+        self.assertEqual(self.get(radius=500).json()['radius_km'], 50)
+
+    def test_non_finite_or_negative_values_are_rejected(self):
+        for params in ({'radius': '-5'}, {'radius': '0'}, {'radius': 'nan'}, {'radius': 'inf'},
+                       {'lat': 'nan', 'lon': 'nan'}, {'lon': 'abc'}):
+            with self.subTest(**params):
+                response = self.get(**params)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['message'], 'A valid location is required.')
@@ -0,0 +1,108 @@
+import io
+import shutil
+import struct
+import tempfile
+import zlib
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from portal import images
+from portal.models import User, VolunteerProfile
+
+
+def image_file(name='photo.png', size=(600, 400), fmt='PNG', mode='RGB'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, 'orange').save(buffer, fmt)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{fmt.lower()}')
+
+
+def png_header(width, height):
+    """A PNG that declares ``width`` x ``height`` pixels but holds no image data."""
+    def chunk(kind, data=b''):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)) + chunk(b'IEND')
+
+
+class UploadCheckTests(TestCase):
+    def assertRejected(self, file, code):
+        with self.assertRaises(ValidationError) as caught:
+            images.check_upload(file)
+        self.assertEqual(caught.exception.code, code)
+
+    def test_decompression_bombs_are_refused_from_the_header(self):
+        self.assertRejected(SimpleUploadedFile('bomb.png', png_header(100_000, 100_000)), 'too_many_pixels')
+        with override_settings(IMAGE_MAX_PIXELS=10_000):
+            self.assertRejected(SimpleUploadedFile('big.png', png_header(200, 200)), 'too_many_pixels')
+
+    def test_size_and_format_limits(self):
+        with override_settings(IMAGE_MAX_UPLOAD_BYTES=100):
+            self.assertRejected(image_file(), 'file_too_large')
+        self.assertRejected(image_file('photo.bmp', fmt='BMP'), 'invalid_format')
+        self.assertRejected(SimpleUploadedFile('notes.png', b'not an image'), 'invalid_image')
+        upload = image_file()
+        images.check_upload(upload)
+        self.assertEqual(upload.tell(), 0)
+
+
+@override_settings(IMAGE_PIPELINE_ASYNC=False)
+class ImagePipelineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.volunteer = VolunteerProfile.objects.create(
+            user=User.objects.create(username='volunteer', user_type='VOLUNTEER'), full_name='V',
+        )
+        self.client.force_login(self.volunteer.user)
+
+    def upload(self, file):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('volunteer_profile'), {'full_name': 'V', 'profile_picture': file})
+        self.assertEqual(response.status_code, 302)
+        self.volunteer.refresh_from_db()
+        return self.volunteer.image_variants['profile_picture']
+
+    def test_upload_gets_webp_and_fallback_variants_that_templates_pick_from(self):
+        manifest = self.upload(image_file())
+        self.assertEqual(manifest['source'], self.volunteer.profile_picture.name)
+        self.assertEqual(sorted(manifest['sizes'], key=int), ['64', '128', '256'])
+        small = manifest['sizes']['128']
+        with default_storage.open(small['webp']) as f, Image.open(f) as variant:
+            self.assertEqual((variant.format, variant.size), ('WEBP', (128, 85)))
+        self.assertTrue(small['jpeg'].endswith('.jpg'))
+
+        template = Template("{% load portal_extras %}{% image_url profile 'profile_picture' 100 %}")
+        self.assertEqual(template.render(Context({'profile': self.volunteer})), default_storage.url(small['webp']))
+
+    def test_replacing_and_deleting_remove_superseded_files(self):
+        first = self.upload(image_file())
+        first_files = [first['source']] + images.variant_files(first)
+        second = self.upload(image_file('logo.png', size=(100, 100), mode='RGBA'))
+
+        self.assertFalse(any(default_storage.exists(name) for name in first_files))
+        self.assertEqual((list(second['sizes']), second['fallback']), (['64', '100'], 'png'))
+        second_files = [second['source']] + images.variant_files(second)
+        self.assertTrue(all(default_storage.exists(name) for name in second_files))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.volunteer.delete()
+        self.assertFalse(any(default_storage.exists(name) for name in second_files))
+
+    def test_rejected_upload_is_reported_on_the_form(self):
+        response = self.client.post(reverse('volunteer_profile'), {
+            'full_name': 'V', 'profile_picture': SimpleUploadedFile('bomb.png', png_header(100_000, 100_000)),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('profile_picture', response.context['form'].errors)
+        self.volunteer.refresh_from_db()
+        self.assertFalse(self.volunteer.profile_picture)
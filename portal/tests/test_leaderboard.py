@@ -0,0 +1,117 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from portal import leaderboard
+from portal.models import Donation, DonationCamp, LeaderboardEntry, NGOProfile, RestaurantProfile, User, VolunteerProfile
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        self.ngo_user = User.objects.create_user(username='ngo', password='password123', user_type='NGO')
+        self.ngo = NGOProfile.objects.create(user=self.ngo_user, ngo_name='NGO', registration_number='R1', address='x', contact_person='y')
+        self.camp = DonationCamp.objects.create(ngo=self.ngo, name='Camp', location_address='x', start_time=timezone.now())
+        self.restaurant = RestaurantProfile.objects.create(
+            user=User.objects.create(username='restaurant', user_type='RESTAURANT'), restaurant_name='Restaurant', address='x',
+        )
+        self.alice = VolunteerProfile.objects.create(user=User.objects.create(username='alice', user_type='VOLUNTEER'), full_name='Alice')
+        self.bob = VolunteerProfile.objects.create(user=User.objects.create(username='bob', user_type='VOLUNTEER'), full_name='Bob')
+        self.client.login(username='ngo', password='password123')
+
+    def drop_off(self, volunteer):
+        return Donation.objects.create(
+            restaurant=self.restaurant, food_description='Rice', quantity=1, pickup_address='x',
+            status='VERIFYING', assigned_volunteer=volunteer, target_camp=self.camp, delivered_at=timezone.now(),
+        )
+
+    def verify_and_rate(self, donation, rating=None):
+        self.client.post(reverse('confirm_delivery', args=[donation.pk]))
+        if rating:
+            self.client.post(reverse('rate_donation', args=[donation.pk]), {'rating': rating})
+
+    def test_views_maintain_every_window_and_scope(self):
+        self.verify_and_rate(self.drop_off(self.alice), rating=5)
+        self.verify_and_rate(self.drop_off(self.bob), rating=2)
+        self.verify_and_rate(self.drop_off(self.bob))
+
+        for window in LeaderboardEntry.Window.values:
+            for scope in (LeaderboardEntry.GLOBAL_SCOPE, self.ngo.pk):
+                board = leaderboard.top(window=window, scope=scope)
+                # Alice: 1 + 5*2 = 11, Bob: 2 + 2*2 = 6
+                self.assertEqual([(e.volunteer_id, e.score) for e in board], [(self.alice.pk, 11.0), (self.bob.pk, 6.0)])
+
+        self.assertEqual(leaderboard.rank_of(self.bob.pk)[0], 2)
+
+    def test_confirming_twice_counts_once_and_rerating_replaces(self):
+        donation = self.drop_off(self.alice)
+        self.verify_and_rate(donation, rating=2)
+        self.verify_and_rate(donation, rating=4)
+
+        _, entry = leaderboard.rank_of(self.alice.pk)
+        self.assertEqual((entry.deliveries, entry.rating_count, entry.avg_rating), (1, 1, 4.0))
+
+    def test_rebuild_matches_incremental_updates(self):
+        self.verify_and_rate(self.drop_off(self.alice), rating=3)
+        self.verify_and_rate(self.drop_off(self.bob), rating=5)
+        self.verify_and_rate(self.drop_off(self.alice))
+
+        def snapshot():
+            return sorted(LeaderboardEntry.objects.values_list(
+                'window', 'period_start', 'scope', 'volunteer_id', 'deliveries', 'rating_sum', 'rating_count', 'score'
+            ))
+
+        incremental = snapshot()
+        leaderboard.rebuild()
+        self.assertEqual(snapshot(), incremental)
+
+    def test_ngo_scope_must_be_an_ngo_id(self):
+        url = reverse('volunteer_leaderboard')
+        self.assertEqual(self.client.get(url, {'ngo': self.ngo.pk}).status_code, 200)
+        for bad in ('abc', '1.5', self.ngo.pk + 1):
+            with self.subTest(ngo=bad):
+                self.assertEqual(self.client.get(url, {'ngo': bad}).status_code, 404)
+
+
+class LeaderboardMigrationTests(TransactionTestCase):
+    before = [('portal', '0006_volunteerprofile_location_cell')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def test_migration_backfills_the_boards_from_history(self):
+        latest = MigrationExecutor(connection).loader.graph.leaf_nodes('portal')
+        self.addCleanup(self.migrate, latest)
+        apps = self.migrate(self.before)
+
+        User = apps.get_model('portal', 'User')
+        NGOProfile = apps.get_model('portal', 'NGOProfile')
+        ngo = NGOProfile.objects.create(user=User.objects.create(username='ngo', user_type='NGO'), ngo_name='NGO',
+                                        registration_number='R1', address='x', contact_person='y')
+        camp = apps.get_model('portal', 'DonationCamp').objects.create(
+            ngo=ngo, name='Camp', location_address='x', start_time=timezone.now())
+        restaurant = apps.get_model('portal', 'RestaurantProfile').objects.create(
+            user=User.objects.create(username='restaurant', user_type='RESTAURANT'), restaurant_name='R', address='x')
+        VolunteerProfile = apps.get_model('portal', 'VolunteerProfile')
+        alice, bob = (
+            VolunteerProfile.objects.create(user=User.objects.create(username=name, user_type='VOLUNTEER'), full_name=name)
+            for name in ('alice', 'bob')
+        )
+        Donation = apps.get_model('portal', 'Donation')
+        for volunteer, camp_or_none, rating in ((alice, camp, 5), (alice, None, None), (bob, camp, 2)):
+            Donation.objects.create(restaurant=restaurant, food_description='Rice', quantity=1, pickup_address='x',
+                                    status='DELIVERED', assigned_volunteer=volunteer, target_camp=camp_or_none,
+                                    delivered_at=timezone.now(), rating=rating)
+
+        self.migrate(latest)
+        migrated = sorted(LeaderboardEntry.objects.values_list(
+            'window', 'period_start', 'scope', 'volunteer_id', 'deliveries', 'rating_sum', 'rating_count', 'score'
+        ))
+        self.assertEqual(len(migrated), 3 * 2 * 2)  # 3 windows x 2 volunteers x global and NGO boards
+        leaderboard.rebuild()
+        self.assertEqual(sorted(LeaderboardEntry.objects.values_list(
+            'window', 'period_start', 'scope', 'volunteer_id', 'deliveries', 'rating_sum', 'rating_count', 'score'
+        )), migrated)
@@ -0,0 +1,111 @@
+import os
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from portal import expiry, metrics, transitions
+from portal.models import Donation, DonationCamp, NGOProfile, RestaurantProfile, User, VolunteerProfile
+from portal.notifications import PushDispatcher
+
+PID = os.getpid()
+
+
+class ExpositionTests(TestCase):
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram('test_seconds', 'Test.', buckets=(1, 10))
+        for value in (0.5, 5, 50):
+            histogram.observe(value)
+        self.assertEqual(histogram.expose().splitlines()[2:], [
+            f'test_seconds_bucket{{pid="{PID}",le="1.0"}} 1',
+            f'test_seconds_bucket{{pid="{PID}",le="10.0"}} 2',
+            f'test_seconds_bucket{{pid="{PID}",le="+Inf"}} 3',
+            f'test_seconds_sum{{pid="{PID}"}} 55.5',
+            f'test_seconds_count{{pid="{PID}"}} 3',
+        ])
+
+    def test_shared_counter_is_labelled_only_without_a_shared_cache(self):
+        counter = metrics.SharedCounter('test_events', 'Test.')
+        counter.inc()
+        self.assertEqual(counter.expose().splitlines()[2], f'test_events_total{{pid="{PID}"}} 1')
+        with mock.patch('portal.metrics.cache_is_shared', return_value=True):
+            self.assertEqual(counter.expose().splitlines()[2], 'test_events_total 1')
+        counter.clear()
+
+
+class LifecycleMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        restaurant = RestaurantProfile.objects.create(
+            user=User.objects.create(username='restaurant', user_type='RESTAURANT'), restaurant_name='R', address='x',
+        )
+        self.ngo = NGOProfile.objects.create(
+            user=User.objects.create(username='ngo', user_type='NGO'),
+            ngo_name='NGO', registration_number='R1', address='x', contact_person='y',
+        )
+        self.camp = DonationCamp.objects.create(ngo=self.ngo, name='Camp', location_address='x', start_time=timezone.now())
+        self.volunteer = VolunteerProfile.objects.create(
+            user=User.objects.create(username='volunteer', user_type='VOLUNTEER'), full_name='V',
+        )
+        self.donations = [Donation.objects.create(restaurant=restaurant, food_description='Meals', quantity=1,
+                                                  pickup_address='x') for _ in range(2)]
+
+    def test_waits_are_observed_at_each_step(self):
+        posted = self.donations[0].created_at
+        donation_id = self.donations[0].pk
+        transitions.accept(donation_id, self.volunteer, now=posted + timedelta(minutes=3))
+        transitions.collect(donation_id, self.volunteer, now=posted + timedelta(minutes=20))
+        delivered = posted + timedelta(minutes=50)
+        transitions.deliver_to_camp(self.volunteer, self.camp, now=delivered)
+        transitions.verify_deliveries(self.ngo, [donation_id], now=delivered + timedelta(hours=2))
+
+        text = metrics.render()
+        self.assertIn(f'connect2give_donation_time_to_accept_seconds_bucket{{pid="{PID}",le="300.0"}} 1', text)
+        self.assertIn(f'connect2give_donation_time_to_accept_seconds_bucket{{pid="{PID}",le="120.0"}} 0', text)
+        self.assertIn(f'connect2give_donation_time_to_collect_seconds_sum{{pid="{PID}"}} 1020.0', text)
+        self.assertIn(f'connect2give_donation_time_to_verify_seconds_sum{{pid="{PID}"}} 7200.0', text)
+
+    def test_timeouts_and_queue_depth(self):
+        stale = timezone.now() - timedelta(hours=1)
+        Donation.objects.filter(pk=self.donations[0].pk).update(
+            status='ACCEPTED', assigned_volunteer=self.volunteer, accepted_at=stale,
+        )
+        Donation.objects.filter(pk=self.donations[1].pk).update(status='VERIFYING')
+        self.assertIn('connect2give_donations_queue_depth{status="ACCEPTED"} 1', metrics.render())
+
+        self.assertEqual(expiry.release_expired_acceptances(), 1)
+        text = metrics.render()
+        self.assertIn(f'connect2give_acceptances_timed_out_total{{pid="{PID}"}} 1', text)
+        self.assertIn('connect2give_donations_queue_depth{status="PENDING"} 1', text)
+        self.assertIn('connect2give_donations_queue_depth{status="VERIFYING"} 1', text)
+
+    def test_push_outcomes(self):
+        dispatcher = PushDispatcher()
+        subscription = {'endpoint': 'https://push.example.com/abc', 'keys': {}}
+        with mock.patch.object(dispatcher, '_headers_for', return_value={}), \
+                mock.patch('portal.notifications.WebPusher') as pusher, self.assertLogs('portal.notifications', 'WARNING'):
+            pusher.return_value.send.return_value = mock.Mock(status_code=201)
+            dispatcher.send(subscription, '{}')
+            pusher.return_value.send.return_value = mock.Mock(status_code=410, reason='Gone')
+            dispatcher.send(subscription, '{}')
+            pusher.return_value.send.side_effect = ConnectionError('down')
+            dispatcher.send(subscription, '{}')
+        self.assertEqual([metrics.PUSH_SENDS.value(outcome=o) for o in ('sent', 'rejected', 'error')], [1, 1, 1])
+
+
+class EndpointTests(TestCase):
+    def test_scrape(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertContains(response, '# TYPE connect2give_donation_time_to_accept_seconds histogram')
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,41 @@
+from django.test import TestCase
+
+from portal.models import NGOProfile, User, VolunteerProfile
+from portal.notifications import select_recipients
+
+
+class SelectRecipientsTests(TestCase):
+    def make_volunteer(self, name, lat, lon, subscribed=True):
+        user = User.objects.create(username=name, user_type='VOLUNTEER')
+        return VolunteerProfile.objects.create(
+            user=user, full_name=name, latitude=lat, longitude=lon,
+            webpush_subscription=f'{{"endpoint": "https://push.example.com/{name}"}}' if subscribed else None,
+        )
+
+    def setUp(self):
+        self.near = self.make_volunteer('near', 28.61, 77.21)
+        self.edge = self.make_volunteer('edge', 28.68, 77.21)   # ~8 km north
+        self.far = self.make_volunteer('far', 19.07, 72.87)     # another city
+        self.unsubscribed = self.make_volunteer('quiet', 28.60, 77.20, subscribed=False)
+
+    def test_only_volunteers_within_radius_are_selected(self):
+        considered, subscriptions = select_recipients(28.6, 77.2, radius_km=10)
+        self.assertEqual(considered, 2)
+        self.assertEqual(sorted(subscriptions), sorted([self.near.webpush_subscription, self.edge.webpush_subscription]))
+
+        considered, subscriptions = select_recipients(28.6, 77.2, radius_km=3)
+        self.assertEqual(subscriptions, [self.near.webpush_subscription])
+
+    def test_ngo_filter(self):
+        ngo_user = User.objects.create(username='ngo', user_type='NGO')
+        ngo = NGOProfile.objects.create(user=ngo_user, ngo_name='NGO', registration_number='R1', address='x', contact_person='y')
+        ngo.volunteers.add(self.edge)
+
+        _, subscriptions = select_recipients(28.6, 77.2, radius_km=10, ngo_ids=[ngo.pk])
+        self.assertEqual(subscriptions, [self.edge.webpush_subscription])
+
+    def test_location_cell_follows_profile_updates(self):
+        self.far.latitude, self.far.longitude = 28.62, 77.22
+        self.far.save()
+        _, subscriptions = select_recipients(28.6, 77.2, radius_km=10)
+        self.assertIn(self.far.webpush_subscription, subscriptions)
@@ -0,0 +1,65 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from portal.models import DonationCamp, NGOProfile, RestaurantProfile, User
+
+
+class LandingPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.ngo = NGOProfile.objects.create(
+            user=User.objects.create(username='ngo', user_type='NGO'),
+            ngo_name='NGO', registration_number='R1', address='x', contact_person='y',
+        )
+        self.restaurant = RestaurantProfile.objects.create(
+            user=User.objects.create(username='restaurant', user_type='RESTAURANT'),
+            restaurant_name='Spice Route', address='x', latitude=28.6, longitude=77.2,
+        )
+
+    def test_repeat_visits_skip_the_database_and_honour_etags(self):
+        first = self.client.get(reverse('index'))
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('public', first['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse('index'))
+        self.assertEqual(second.content, first.content)
+
+        not_modified = self.client.get(reverse('index'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+
+    def test_camp_and_location_changes_bump_the_version(self):
+        etag = self.client.get(reverse('index'))['ETag']
+
+        DonationCamp.objects.create(ngo=self.ngo, name='Riverside Camp', location_address='x',
+                                    latitude=28.7, longitude=77.3, start_time=timezone.now())
+        response = self.client.get(reverse('index'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Riverside Camp')
+        etag = response['ETag']
+
+        self.restaurant.phone_number = '12345'
+        self.restaurant.save()
+        self.assertEqual(self.client.get(reverse('index'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.restaurant.latitude = 28.65
+        self.restaurant.save()
+        self.assertEqual(self.client.get(reverse('index'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_renaming_an_ngo_refreshes_its_camp_markers(self):
+        DonationCamp.objects.create(ngo=self.ngo, name='Riverside Camp', location_address='x',
+                                    latitude=28.7, longitude=77.3, start_time=timezone.now())
+        etag = self.client.get(reverse('index'))['ETag']
+
+        self.ngo.contact_person = 'z'
+        self.ngo.save()
+        self.assertEqual(self.client.get(reverse('index'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.ngo.ngo_name = 'Food Bank'
+        self.ngo.save()
+        response = self.client.get(reverse('index'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Food Bank')
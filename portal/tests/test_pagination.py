@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from portal.geo import nearby_donations
+from portal.models import Donation, RestaurantProfile, User, VolunteerProfile
+from portal.pagination import keyset_paginate
+
+
+def walk(queryset, ordering, page_size):
+    """Follow cursors to the end and return every row in page order."""
+    rows, cursor = [], None
+    while True:
+        page = keyset_paginate(queryset, ordering, cursor, page_size)
+        rows.extend(page.items)
+        if not page.has_next:
+            return rows
+        cursor = page.next_cursor
+
+
+@override_settings(PAGE_SIZE=4)
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.restaurant = RestaurantProfile.objects.create(
+            user=User.objects.create(username='restaurant', user_type='RESTAURANT'),
+            restaurant_name='Spice Route', address='x', latitude=28.6, longitude=77.2,
+        )
+        now = timezone.now()
+        for i in range(11):
+            donation = Donation.objects.create(restaurant=self.restaurant, food_description=f'Meal {i}',
+                                               quantity=1, pickup_address='x')
+            # Pairs of rows share a timestamp and every third one has no
+            # delivery time, so ties and NULLs both cross page boundaries.
+            Donation.objects.filter(pk=donation.pk).update(
+                created_at=now - timedelta(minutes=i // 2),
+                delivered_at=None if i % 3 == 0 else now - timedelta(minutes=i // 2),
+            )
+
+    def test_pages_cover_every_row_once_in_order(self):
+        queryset = Donation.objects.all()
+        for ordering in [('-created_at', '-pk'), ('-delivered_at', '-pk'), ('delivered_at', 'pk')]:
+            with self.subTest(ordering=ordering):
+                rows = walk(queryset, ordering, page_size=3)
+                expected = list(keyset_paginate(queryset, ordering, page_size=100).items)
+                self.assertEqual([d.pk for d in rows], [d.pk for d in expected])
+                self.assertEqual(len(rows), 11)
+
+    def test_invalid_cursor_restarts_from_first_page(self):
+        first = keyset_paginate(Donation.objects.all(), ('-created_at', '-pk'))
+        broken = keyset_paginate(Donation.objects.all(), ('-created_at', '-pk'), cursor='not-a-cursor')
+        self.assertEqual([d.pk for d in broken], [d.pk for d in first])
+
+    def test_restaurant_history_fragments(self):
+        self.client.force_login(self.restaurant.user)
+        response = self.client.get(reverse('restaurant_donations'))
+        next_url = response.context['donations'].next_url
+        self.assertIn('fragment=donations', next_url)
+
+        seen = [d.pk for d in response.context['donations']]
+        while next_url:
+            fragment = self.client.get(next_url)
+            self.assertEqual(fragment.status_code, 200)
+            self.assertNotIn(b'<html', fragment.content)
+            seen.extend(d.pk for d in fragment.context['donations'])
+            next_url = fragment['X-Next-Url']
+        self.assertEqual(sorted(seen), sorted(Donation.objects.values_list('pk', flat=True)))
+
+    def test_nearby_donations_continue_after_cursor(self):
+        other = RestaurantProfile.objects.create(
+            user=User.objects.create(username='other', user_type='RESTAURANT'),
+            restaurant_name='Far Away', address='x', latitude=28.65, longitude=77.25,
+        )
+        for i in range(3):
+            Donation.objects.create(restaurant=other, food_description='Far', quantity=1, pickup_address='x')
+
+        everything = nearby_donations(Donation.objects.all(), 28.6, 77.2, radius_km=50)
+        paged, after = [], None
+        while True:
+            batch = nearby_donations(Donation.objects.all(), 28.6, 77.2, radius_km=50, limit=4, after=after)
+            if not batch:
+                break
+            paged.extend(batch)
+            after = (batch[-1].distance_km, batch[-1].pk)
+        self.assertEqual([d.pk for d in paged], [d.pk for d in everything])
+        self.assertEqual(len(paged), 14)
+
+    def test_volunteer_available_list_pages_by_distance(self):
+        volunteer = VolunteerProfile.objects.create(
+            user=User.objects.create(username='volunteer', user_type='VOLUNTEER'),
+            full_name='V', phone_number='1', address='x', latitude=28.6, longitude=77.2,
+        )
+        self.client.force_login(volunteer.user)
+        page = self.client.get(reverse('volunteer_manage_pickups')).context['available_donations']
+        self.assertEqual(len(page), 4)
+        fragment = self.client.get(page.next_url)
+        self.assertTrue(set(d.pk for d in fragment.context['available_donations']).isdisjoint(d.pk for d in page))
+
+    def test_empty_follow_up_page_adds_no_empty_state_row(self):
+        volunteer = VolunteerProfile.objects.create(
+            user=User.objects.create(username='volunteer', user_type='VOLUNTEER'),
+            full_name='V', phone_number='1', address='x', latitude=28.6, longitude=77.2,
+        )
+        self.client.force_login(volunteer.user)
+        page = self.client.get(reverse('volunteer_manage_pickups')).context['available_donations']
+        # Everything after the first page is taken before the client scrolls.
+        Donation.objects.exclude(pk__in=[d.pk for d in page]).update(status='ACCEPTED')
+        fragment = self.client.get(page.next_url)
+        self.assertEqual(len(fragment.context['available_donations']), 0)
+        self.assertNotContains(fragment, 'empty-state')
+
+        Donation.objects.update(status='ACCEPTED')
+        self.assertContains(self.client.get(reverse('volunteer_manage_pickups')), 'There are no available donations right now.')
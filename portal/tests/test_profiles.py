@@ -0,0 +1,42 @@
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from portal.backends import ModelBackend, profile_of
+from portal.models import NGOProfile, User
+
+
+# Production store (with Redis); sessions then cost no query.
+@override_settings(SESSION_ENGINE='portal.sessions')
+class RequestProfileTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.ngo = NGOProfile.objects.create(
+            user=User.objects.create(username='ngo', user_type='NGO'),
+            ngo_name='Food Bank', registration_number='R1', address='x', contact_person='y',
+        )
+
+    def test_user_and_profile_load_in_one_query(self):
+        self.client.force_login(self.ngo.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('ngo_settings'))
+        self.assertContains(response, 'Food Bank')
+        tables = [q['sql'].split(' FROM ')[1].split()[0] for q in queries]
+        self.assertEqual(tables, ['"portal_user"'])
+        self.assertEqual(response.wsgi_request.profile, self.ngo)
+
+    def test_users_without_a_profile_have_none(self):
+        newcomer = User.objects.create(username='new')
+        loaded = ModelBackend().get_user(newcomer.pk)
+        with self.assertNumQueries(0):
+            self.assertIsNone(profile_of(loaded))
+            self.assertFalse(hasattr(loaded, 'ngo_profile'))
+
+    def test_sessions_from_the_stock_backend_stay_signed_in(self):
+        self.client.force_login(self.ngo.user, backend='django.contrib.auth.backends.ModelBackend')
+        response = self.client.get(reverse('ngo_settings'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY], 'portal.backends.ModelBackend')
@@ -0,0 +1,145 @@
+"""
+Query budgets per view.
+
+Every page is rendered against a small dataset (one row of everything) and
+a large one (a hundred), from a cold cache. The query count must not grow
+with the data, and must stay within the budget declared for its URL name,
+so a template that starts touching a relation per row, or a view that
+loses a ``select_related``, fails here instead of in production.
+"""
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from portal import leaderboard
+from portal.geo import camp_index
+from portal.models import (
+    Badge, Donation, DonationCamp, NGOProfile, NGOVolunteer, RestaurantProfile, User, VolunteerBadge, VolunteerProfile,
+)
+
+# URL name (plus query string) -> most queries the page may run, cold cache.
+BUDGETS = {
+    'index': 2,
+    'restaurant_dashboard': 3,
+    'restaurant_donations': 2,
+    'restaurant_profile': 2,
+    'restaurant_settings': 1,
+    'ngo_dashboard_overview': 2,
+    'ngo_manage_camps': 5,
+    'ngo_manage_camps?view=history': 5,
+    'ngo_manage_volunteers': 2,
+    'ngo_profile': 2,
+    'ngo_settings': 1,
+    'volunteer_dashboard': 6,
+    'volunteer_manage_pickups': 7,
+    'volunteer_manage_pickups?view=delivery_route': 10,
+    'volunteer_manage_pickups?view=history': 7,
+    'volunteer_manage_camps': 3,
+    'volunteer_profile': 2,
+    'volunteer_settings': 1,
+    'volunteer_leaderboard': 5,
+    'nearby_donations_api': 3,
+    'volunteer_route_api': 6,
+    'api_donations': 2,
+    'api_camps': 2,
+    'api_memberships': 2,
+    'admin:portal_donation_changelist': 4,
+    'admin:portal_donationcamp_changelist': 4,
+    'admin:portal_ngovolunteer_changelist': 4,
+    'admin:portal_leaderboardentry_changelist': 4,
+}
+
+ROLE_PAGES = {
+    'anonymous': ['index'],
+    'restaurant': [name for name in BUDGETS if name.startswith('restaurant_')] + ['api_donations'],
+    'ngo': [name for name in BUDGETS if name.startswith('ngo_')] + ['api_camps', 'api_memberships'],
+    'volunteer': [name for name in BUDGETS if name.startswith(('volunteer_', 'nearby_'))],
+    'admin': [name for name in BUDGETS if name.startswith('admin:')],
+}
+
+
+# Budgets assume the production session store (with Redis), so sessions cost
+# no query; the test process's memory cache stands in for Redis.
+@override_settings(SESSION_ENGINE='portal.sessions')
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        camp_index.invalidate()
+        self.restaurant = self.make_restaurant('restaurant')
+        self.ngo = NGOProfile.objects.create(
+            user=User.objects.create(username='ngo', user_type='NGO'),
+            ngo_name='NGO', registration_number='NGO-0', address='x', contact_person='y', latitude=28.6, longitude=77.2,
+        )
+        self.volunteer = self.make_volunteer('volunteer')
+        self.badge = Badge.objects.create(name='First delivery', description='x')
+        self.admin = User.objects.create(username='admin', is_staff=True, is_superuser=True)
+        self.rows = 0
+
+    def make_restaurant(self, name):
+        return RestaurantProfile.objects.create(
+            user=User.objects.create(username=name, user_type='RESTAURANT'),
+            restaurant_name=name, address='x', latitude=28.61, longitude=77.21,
+        )
+
+    def make_volunteer(self, name):
+        volunteer = VolunteerProfile.objects.create(
+            user=User.objects.create(username=name, user_type='VOLUNTEER'), full_name=name, latitude=28.6, longitude=77.2,
+        )
+        NGOVolunteer.objects.create(ngo=self.ngo, volunteer=volunteer)
+        return volunteer
+
+    def grow_to(self, rows):
+        """Add rows of every kind until there are ``rows`` of each."""
+        now = timezone.now()
+        for i in range(self.rows, rows):
+            other_restaurant = self.make_restaurant(f'restaurant-{i}')
+            other_volunteer = self.make_volunteer(f'volunteer-{i}')
+            camp = DonationCamp.objects.create(ngo=self.ngo, name=f'Camp {i}', location_address='x',
+                                               latitude=28.62, longitude=77.22, start_time=now, is_active=i % 2 == 0,
+                                               completed_at=None if i % 2 == 0 else now)
+            donate = lambda restaurant, **kwargs: Donation.objects.create(  # noqa: E731
+                restaurant=restaurant, food_description='Meals', quantity=1, pickup_address='x', **kwargs)
+            # Open donations from many restaurants, the restaurant's own history,
+            # the volunteer's history and the NGO's verification queue.
+            donate(other_restaurant)
+            donate(self.restaurant, status='DELIVERED', assigned_volunteer=self.volunteer, target_camp=camp,
+                   accepted_at=now, delivered_at=now, verified_at=now, rating=4)
+            donate(other_restaurant, status='VERIFYING', assigned_volunteer=other_volunteer, target_camp=camp,
+                   accepted_at=now, delivered_at=now)
+            if i < 5:
+                donate(other_restaurant, status='ACCEPTED', assigned_volunteer=self.volunteer, accepted_at=now)
+            VolunteerBadge.objects.create(volunteer=other_volunteer, badge=self.badge)
+        self.rows = rows
+        leaderboard.rebuild()
+
+    def queries_per_page(self):
+        counts = {}
+        for role, names in ROLE_PAGES.items():
+            self.client.logout()
+            if role != 'anonymous':
+                user = getattr(self, role)
+                self.client.force_login(getattr(user, 'user', user))
+            for key in names:
+                name, _, query = key.partition('?')
+                cache.clear()
+                camp_index.invalidate()
+                # Cold application caches, but a warm session, as in production.
+                self.client.session.load()
+                with CaptureQueriesContext(connection) as captured:
+                    response = self.client.get(reverse(name) + (f'?{query}' if query else ''))
+                self.assertEqual(response.status_code, 200, key)
+                counts[key] = len(captured)
+        return counts
+
+    def test_query_counts_stay_flat_and_within_budget(self):
+        self.grow_to(1)
+        small = self.queries_per_page()
+        self.grow_to(100)
+        large = self.queries_per_page()
+        for key, budget in BUDGETS.items():
+            with self.subTest(key):
+                self.assertEqual(large[key], small[key], f'{key} runs more queries with more rows')
+                self.assertLessEqual(large[key], budget, f'{key} is over its query budget')
@@ -0,0 +1,108 @@
+import json
+from unittest import mock
+
+from asgiref.testing import ApplicationCommunicator
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from portal import realtime, transitions
+from portal.consumers import DonationFeedConsumer
+from portal.models import Donation, DonationCamp, NGOProfile, RestaurantProfile, User, VolunteerProfile
+
+
+class FeedClient(ApplicationCommunicator):
+    """Minimal WebSocket test client (channels.testing needs daphne)."""
+
+    def __init__(self, user):
+        super().__init__(DonationFeedConsumer.as_asgi(), {
+            'type': 'websocket', 'path': '/ws/feed/', 'headers': [], 'subprotocols': [], 'user': user,
+        })
+
+    async def connect(self):
+        await self.send_input({'type': 'websocket.connect'})
+        return (await self.receive_output(1))['type'] == 'websocket.accept'
+
+    async def receive_json(self):
+        return json.loads((await self.receive_output(1))['text'])
+
+    async def disconnect(self):
+        await self.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await self.wait(1)
+
+
+class LiveFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.restaurant = RestaurantProfile.objects.create(
+            user=User.objects.create(username='restaurant', user_type='RESTAURANT'),
+            restaurant_name='Spice Route', address='x', latitude=28.6, longitude=77.2,
+        )
+        self.near = VolunteerProfile.objects.create(
+            user=User.objects.create(username='near', user_type='VOLUNTEER'), full_name='N',
+            latitude=28.62, longitude=77.21,
+        )
+        self.far = VolunteerProfile.objects.create(
+            user=User.objects.create(username='far', user_type='VOLUNTEER'), full_name='F',
+            latitude=19.07, longitude=72.87,
+        )
+        self.ngo = NGOProfile.objects.create(
+            user=User.objects.create(username='ngo', user_type='NGO'),
+            ngo_name='NGO', registration_number='R1', address='x', contact_person='y',
+        )
+        self.camp = DonationCamp.objects.create(ngo=self.ngo, name='Camp', location_address='x', start_time=timezone.now())
+        self.donation = Donation.objects.create(restaurant=self.restaurant, food_description='Meals',
+                                                quantity=1, pickup_address='x')
+
+    async def connect(self, user):
+        client = FeedClient(user)
+        self.assertTrue(await client.connect())
+        return client
+
+    async def asyncTearDown(self):
+        await get_channel_layer().flush()
+
+    async def test_new_donation_reaches_nearby_volunteers_and_restaurant(self):
+        near = await self.connect(self.near.user)
+        far = await self.connect(self.far.user)
+        restaurant = await self.connect(self.restaurant.user)
+
+        await database_sync_to_async(realtime.send)(realtime.CREATED, [self.donation.pk])
+
+        expected = {'event': 'created', 'donations': [
+            {'id': self.donation.pk, 'status': 'PENDING', 'status_display': 'Pending Pickup'},
+        ]}
+        self.assertEqual(await near.receive_json(), expected)
+        self.assertEqual(await restaurant.receive_json(), expected)
+        self.assertTrue(await far.receive_nothing())
+        for client in (near, far, restaurant):
+            await client.disconnect()
+
+    async def test_drop_off_reaches_the_ngo_but_not_other_volunteers(self):
+        await database_sync_to_async(Donation.objects.filter(pk=self.donation.pk).update)(
+            status='VERIFYING', assigned_volunteer=self.far, target_camp=self.camp,
+        )
+        ngo = await self.connect(self.ngo.user)
+        near = await self.connect(self.near.user)
+
+        await database_sync_to_async(realtime.send)(realtime.DELIVERED, [self.donation.pk])
+
+        message = await ngo.receive_json()
+        self.assertEqual((message['event'], message['donations'][0]['status']), ('delivered', 'VERIFYING'))
+        self.assertTrue(await near.receive_nothing())
+        await ngo.disconnect()
+        await near.disconnect()
+
+    async def test_anonymous_sockets_are_refused(self):
+        self.assertFalse(await FeedClient(AnonymousUser()).connect())
+
+    def test_transitions_publish_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            transitions.accept(self.donation.pk, self.near)
+        with mock.patch('portal.realtime.send') as send:
+            for callback in callbacks:
+                callback()
+        send.assert_called_once_with('accepted', [self.donation.pk], None)
@@ -0,0 +1,92 @@
+import random
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from portal import routes
+from portal.geo import camp_index
+from portal.models import Donation, DonationCamp, NGOProfile, NGOVolunteer, RestaurantProfile, User, VolunteerProfile
+
+
+class OrderingTests(TestCase):
+    def test_two_opt_never_loses_to_nearest_neighbour(self):
+        rng = random.Random(7)
+        for _ in range(20):
+            points = [(28.5 + rng.random() * 0.3, 77.0 + rng.random() * 0.3) for _ in range(12)]
+            matrix = routes.distance_matrix(points)
+            stops, end = list(range(1, 11)), 11
+            length, path, converged = routes.order_stops(matrix, 0, stops, [end])
+            self.assertTrue(converged)
+            self.assertEqual((path[0], sorted(path[1:-1]), path[-1]), (0, stops, end))
+            greedy = routes.nearest_neighbour(matrix, 0, stops) + [end]
+            self.assertLessEqual(length, routes.path_length(matrix, greedy) + 1e-9)
+
+    def test_budget_stops_improvement_with_a_valid_path(self):
+        points = [(28.5 + i * 0.01, 77.0 + (i % 3) * 0.02) for i in range(8)]
+        matrix = routes.distance_matrix(points)
+        _, path, converged = routes.order_stops(matrix, 0, range(1, 8), [], budget=0)
+        self.assertFalse(converged)
+        self.assertEqual(sorted(path), list(range(8)))
+
+
+class PlanRouteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        camp_index.invalidate()
+        ngo = NGOProfile.objects.create(
+            user=User.objects.create(username='ngo', user_type='NGO'),
+            ngo_name='NGO', registration_number='R1', address='x', contact_person='y',
+        )
+        self.volunteer = VolunteerProfile.objects.create(
+            user=User.objects.create(username='volunteer', user_type='VOLUNTEER'), full_name='V',
+            latitude=28.60, longitude=77.20,
+        )
+        NGOVolunteer.objects.create(ngo=ngo, volunteer=self.volunteer)
+        # One camp next to the volunteer, one past the pickups heading east.
+        self.home_camp = DonationCamp.objects.create(ngo=ngo, name='Home', location_address='x',
+                                                     latitude=28.60, longitude=77.19, start_time=timezone.now())
+        self.east_camp = DonationCamp.objects.create(ngo=ngo, name='East', location_address='x',
+                                                     latitude=28.60, longitude=77.40, start_time=timezone.now())
+        self.pickups = []
+        for i, lon in enumerate([77.35, 77.25, 77.30]):
+            restaurant = RestaurantProfile.objects.create(
+                user=User.objects.create(username=f'r{i}', user_type='RESTAURANT'),
+                restaurant_name=f'R{i}', address='x', latitude=28.60, longitude=lon,
+            )
+            self.pickups.append(Donation.objects.create(
+                restaurant=restaurant, food_description='Meals', quantity=1, pickup_address='x',
+                status='ACCEPTED', assigned_volunteer=self.volunteer, accepted_at=timezone.now(),
+            ))
+
+    def test_orders_pickups_and_ends_at_the_best_camp(self):
+        route = routes.plan_route(self.volunteer)
+        self.assertEqual([stop['id'] for stop in route['stops']], [self.pickups[i].pk for i in (1, 2, 0)])
+        self.assertEqual(route['camp']['pk'], self.east_camp.pk)
+        self.assertAlmostEqual(route['total_km'], 19.5, delta=0.5)
+
+    @override_settings(ROUTE_CAMP_CANDIDATES=1)
+    def test_stale_index_entries_do_not_hide_camps_further_out(self):
+        north_camp = DonationCamp.objects.create(ngo=self.home_camp.ngo, name='North', location_address='x',
+                                                 latitude=29.00, longitude=77.30, start_time=timezone.now())
+        camp_index.rebuild()
+        # Completed behind the index's back (no signals).
+        DonationCamp.objects.filter(pk__in=[self.home_camp.pk, self.east_camp.pk]).update(is_active=False)
+        self.assertEqual(routes.plan_route(self.volunteer)['camp']['pk'], north_camp.pk)
+
+    def test_cached_until_the_active_set_changes(self):
+        first = routes.plan_route(self.volunteer)
+        with self.assertNumQueries(2):
+            self.assertEqual(routes.plan_route(self.volunteer), first)
+
+        Donation.objects.filter(pk=self.pickups[0].pk).update(status='COLLECTED')
+        changed = routes.plan_route(self.volunteer)
+        self.assertEqual(changed['carrying'], [self.pickups[0].pk])
+        self.assertEqual(len(changed['stops']), 2)
+
+    def test_route_api(self):
+        self.client.force_login(self.volunteer.user)
+        data = self.client.get(reverse('volunteer_route_api')).json()
+        self.assertTrue(data['success'])
+        self.assertEqual(len(data['stops']), 3)
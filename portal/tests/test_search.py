@@ -0,0 +1,110 @@
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from portal import search
+from portal.models import Donation, NGOProfile, RestaurantProfile, SearchEntry, User, VolunteerProfile
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.spice = RestaurantProfile.objects.create(
+            user=User.objects.create(username='spice', user_type='RESTAURANT'),
+            restaurant_name='Spice Route', address='Connaught Place',
+        )
+        self.bakery = RestaurantProfile.objects.create(
+            user=User.objects.create(username='bakery', user_type='RESTAURANT'),
+            restaurant_name='Daily Bread Bakery', address='Karol Bagh',
+        )
+        self.curry = Donation.objects.create(restaurant=self.spice, food_description='Paneer curry',
+                                             quantity=10, pickup_address='Connaught Place')
+        self.bread = Donation.objects.create(restaurant=self.bakery, food_description='Bread loaves',
+                                             quantity=20, pickup_address='Karol Bagh, near the spice market')
+
+    def matches(self, query, queryset=None):
+        queryset = Donation.objects.all() if queryset is None else queryset
+        return list(search.search(queryset, query).order_by('search_rank').values_list('pk', flat=True))
+
+    def test_prefix_terms_all_have_to_match(self):
+        self.assertEqual(self.matches('spi rou'), [self.curry.pk])
+        self.assertEqual(self.matches('bread karol'), [self.bread.pk])
+        self.assertEqual(self.matches('paneer bagh'), [])
+
+    def test_ranking_prefers_more_occurrences(self):
+        # "spice" appears in the restaurant name and the address of one
+        # donation, and only in the address of the other.
+        self.curry.pickup_address = 'Spice Market Lane'
+        self.curry.save()
+        self.assertEqual(self.matches('spice'), [self.curry.pk, self.bread.pk])
+
+    def test_search_is_limited_to_the_queryset(self):
+        Donation.objects.filter(pk=self.curry.pk).update(status='DELIVERED')
+        self.assertEqual(self.matches('spice', Donation.objects.filter(status='PENDING')), [self.bread.pk])
+
+    def test_index_follows_saves_renames_and_deletes(self):
+        self.bakery.restaurant_name = 'Golden Crust'
+        self.bakery.save()
+        self.assertEqual(self.matches('golden'), [self.bread.pk])
+
+        self.bread.delete()
+        self.assertFalse(SearchEntry.objects.filter(kind='donation', object_id=self.bread.pk).exists())
+        self.assertEqual(self.matches('golden'), [])
+
+    def test_unrelated_saves_do_not_rewrite_entries(self):
+        self.curry.status = 'ACCEPTED'
+        with self.assertNumQueries(1):
+            self.curry.save(update_fields=['status'])
+
+    @override_settings(SEARCH_BACKEND='portal.search.SimpleSearchBackend')
+    def test_simple_backend_matches_the_same_rows(self):
+        self.assertEqual(sorted(self.matches('spi')), sorted([self.curry.pk, self.bread.pk]))
+
+    def test_rebuild_restores_missing_entries(self):
+        SearchEntry.objects.all().delete()
+        self.assertEqual(search.rebuild(), 4)
+        self.assertEqual(self.matches('paneer'), [self.curry.pk])
+
+    def test_views_use_the_index(self):
+        NGOProfile.objects.create(user=User.objects.create(username='ngo', user_type='NGO'),
+                                  ngo_name='Feeding Hands', registration_number='R1', address='Saket', contact_person='x')
+        volunteer = VolunteerProfile.objects.create(
+            user=User.objects.create(username='volunteer', user_type='VOLUNTEER'), full_name='V',
+        )
+        self.client.force_login(volunteer.user)
+
+        response = self.client.get(reverse('volunteer_manage_pickups'), {'q': 'loaves'})
+        self.assertEqual([d.pk for d in response.context['available_donations']], [self.bread.pk])
+
+        response = self.client.get(reverse('volunteer_manage_camps'), {'q': 'feed'})
+        self.assertEqual([n.ngo_name for n in response.context['available_ngos']], ['Feeding Hands'])
+
+
+class SearchMigrationTests(TransactionTestCase):
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def test_migration_indexes_existing_rows(self):
+        latest = MigrationExecutor(connection).loader.graph.leaf_nodes('portal')
+        self.addCleanup(self.migrate, latest)
+        apps = self.migrate([('portal', '0007_leaderboardentry')])
+
+        User = apps.get_model('portal', 'User')
+        restaurant = apps.get_model('portal', 'RestaurantProfile').objects.create(
+            user=User.objects.create(username='restaurant', user_type='RESTAURANT'),
+            restaurant_name='Spice Route', address='MG Road',
+        )
+        apps.get_model('portal', 'Donation').objects.create(
+            restaurant=restaurant, food_description='Paneer curry', quantity=1, pickup_address='Back door',
+        )
+
+        self.migrate(latest)
+        migrated = sorted(SearchEntry.objects.values_list('kind', 'object_id', 'body'))
+        self.assertEqual(list(search.search(Donation.objects.all(), 'spice pan').values_list('food_description', flat=True)),
+                         ['Paneer curry'])
+        search.rebuild()
+        self.assertEqual(sorted(SearchEntry.objects.values_list('kind', 'object_id', 'body')), migrated)
@@ -0,0 +1,54 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count
+from django.test import TestCase
+
+from portal import seeding
+from portal.models import Donation, DonationCamp, NGOVolunteer, RestaurantProfile, User, VolunteerProfile
+
+END = datetime(2025, 6, 1, 12, tzinfo=dt_timezone.utc)
+
+
+class SeedTests(TestCase):
+    def snapshot(self):
+        return list(Donation.objects.order_by('pk').values_list(
+            'restaurant__restaurant_name', 'status', 'assigned_volunteer__full_name', 'created_at', 'verified_at', 'rating',
+        ))
+
+    def test_every_status_and_consistent_lifecycle(self):
+        summary = seeding.seed(3000, seed=1, end=END, chunk_size=500)
+        self.assertEqual(Donation.objects.count(), 3000)
+        self.assertEqual((RestaurantProfile.objects.count(), VolunteerProfile.objects.count(), DonationCamp.objects.count()),
+                         (summary['restaurants'], summary['volunteers'], summary['camps']))
+        self.assertTrue(NGOVolunteer.objects.exists())
+        self.assertEqual(set(Donation.objects.values_list('status', flat=True)), set(seeding.STATUSES))
+        self.assertFalse(Donation.objects.filter(status='PENDING', assigned_volunteer__isnull=False).exists())
+        self.assertFalse(Donation.objects.filter(status='DELIVERED', verified_at__isnull=True).exists())
+        self.assertFalse(Donation.objects.filter(verified_at__gt=END).exists())
+        for donation in Donation.objects.exclude(status='PENDING')[:200]:
+            self.assertLess(donation.created_at, donation.accepted_at)
+        # Timestamps are the seeded ones, not the insert time.
+        self.assertLess(Donation.objects.order_by('created_at').first().created_at, END.replace(month=3))
+        self.assertFalse(User.objects.exclude(password__startswith='!').exists())
+        self.assertFalse(VolunteerProfile.objects.filter(latitude__isnull=False, location_cell__isnull=True).exists())
+
+    def test_same_seed_same_rows(self):
+        seeding.seed(300, seed=5, end=END, prefix='a')
+        first = self.snapshot()
+        Donation.objects.all().delete()
+        User.objects.all().delete()
+        seeding.seed(300, seed=5, end=END, prefix='a')
+        self.assertEqual(self.snapshot(), first)
+
+    def test_active_pickups_stay_under_the_limit(self):
+        seeding.seed(5000, seed=2, end=END, volunteers=100, status_weights={'ACCEPTED': 0.05, 'DELIVERED': 0.95})
+        busiest = (Donation.objects.filter(status__in=['ACCEPTED', 'COLLECTED']).values('assigned_volunteer')
+                   .annotate(n=Count('pk')).order_by('-n').first())
+        self.assertLessEqual(busiest['n'], 10)
+
+    def test_command_refuses_a_used_prefix(self):
+        call_command('seed_scale', donations=50, seed=3, stdout=open('/dev/null', 'w'))
+        with self.assertRaises(CommandError):
+            call_command('seed_scale', donations=50, seed=3, stdout=open('/dev/null', 'w'))
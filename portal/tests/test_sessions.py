@@ -0,0 +1,62 @@
+from django.contrib.auth.hashers import check_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from portal.models import User
+from portal.sessions import SessionStore
+
+
+def session_queries(queries):
+    return [q['sql'] for q in queries if 'django_session' in q['sql']]
+
+
+@override_settings(SESSION_ENGINE='portal.sessions')
+class SessionStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='ngo', user_type='NGO')
+
+    def test_signed_in_requests_read_the_session_from_the_cache(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('ngo_settings'))
+        self.assertEqual(session_queries(queries), [])
+
+        # After an eviction the database copy is used and re-cached.
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('ngo_settings'))
+        self.assertEqual(response.wsgi_request.user, self.user)
+        self.assertEqual(len(session_queries(queries)), 1)
+
+    def test_unchanged_sessions_are_not_written(self):
+        store = SessionStore()
+        store['step'] = {'n': 1}
+        store.save()
+
+        store = SessionStore(store.session_key)
+        store['step'] = {'n': 1}
+        with self.assertNumQueries(0):
+            store.save()
+        store['step']['n'] = 2
+        with CaptureQueriesContext(connection) as queries:
+            store.save()
+        self.assertTrue(any(q['sql'].startswith('UPDATE') for q in queries))
+        cache.clear()
+        self.assertEqual(SessionStore(store.session_key)['step'], {'n': 2})
+
+    def test_registration_keeps_only_the_password_hash_in_the_session(self):
+        self.client.post(reverse('register_step_1'), {
+            'full_name': 'Asha Rao', 'email': 'asha@example.com', 'password': 'pw-12345678', 'password2': 'pw-12345678',
+        })
+        stored = self.client.session['registration_data']['password']
+        self.assertNotEqual(stored, 'pw-12345678')
+
+        self.client.post(reverse('register_step_2'), {'user_type': 'VOLUNTEER', 'full_name': 'Asha Rao', 'address': 'x'})
+        user = User.objects.get(email='asha@example.com')
+        self.assertEqual((user.username, user.first_name), ('asha', 'Asha'))
+        self.assertTrue(check_password('pw-12345678', user.password))
+        self.assertTrue(self.client.login(username='asha', password='pw-12345678'))
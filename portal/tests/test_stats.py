@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from portal.models import Donation, DonationCamp, NGOProfile, RestaurantProfile, User, VolunteerProfile
+from portal.stats import get_ngo_stats, get_restaurant_stats, get_volunteer_stats
+
+
+class DashboardStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.restaurant = RestaurantProfile.objects.create(
+            user=User.objects.create(username='restaurant', user_type='RESTAURANT'),
+            restaurant_name='Restaurant', address='Somewhere',
+        )
+        self.volunteer = VolunteerProfile.objects.create(
+            user=User.objects.create(username='volunteer', user_type='VOLUNTEER'), full_name='Volunteer',
+        )
+        self.ngo = NGOProfile.objects.create(
+            user=User.objects.create(username='ngo', user_type='NGO'),
+            ngo_name='NGO', registration_number='R1', address='x', contact_person='y',
+        )
+        self.camp = DonationCamp.objects.create(ngo=self.ngo, name='Camp', location_address='x', start_time=timezone.now())
+
+    def donate(self, **kwargs):
+        return Donation.objects.create(restaurant=self.restaurant, food_description='Rice', quantity=1, pickup_address='x', **kwargs)
+
+    def test_repeat_reads_hit_the_cache(self):
+        self.donate()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_restaurant_stats(self.restaurant.pk)['pending_donations'], 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_ngo_stats(self.ngo.pk)['active_camps'], 1)
+        with self.assertNumQueries(2):
+            self.assertEqual(get_volunteer_stats(self.volunteer.pk)['available_donations'], 1)
+        with self.assertNumQueries(0):
+            get_restaurant_stats(self.restaurant.pk)
+            get_ngo_stats(self.ngo.pk)
+            get_volunteer_stats(self.volunteer.pk)
+
+    def test_donation_changes_invalidate_every_affected_role(self):
+        donation = self.donate()
+        get_restaurant_stats(self.restaurant.pk)
+        get_ngo_stats(self.ngo.pk)
+        get_volunteer_stats(self.volunteer.pk)
+
+        donation.status = 'ACCEPTED'
+        donation.assigned_volunteer = self.volunteer
+        donation.save()
+        self.assertEqual(get_restaurant_stats(self.restaurant.pk)['active_donations'], 1)
+        self.assertEqual(get_volunteer_stats(self.volunteer.pk)['active_pickups'], 1)
+        self.assertEqual(get_volunteer_stats(self.volunteer.pk)['available_donations'], 0)
+
+        donation.status = 'VERIFYING'
+        donation.target_camp = self.camp
+        donation.save()
+        self.assertEqual(get_ngo_stats(self.ngo.pk)['donations_to_verify'], 1)
+        self.assertEqual(get_volunteer_stats(self.volunteer.pk)['active_pickups'], 0)
+
+    def test_membership_changes_invalidate_ngo_and_volunteer(self):
+        get_ngo_stats(self.ngo.pk)
+        get_volunteer_stats(self.volunteer.pk)
+
+        self.ngo.volunteers.add(self.volunteer)
+        self.assertEqual(get_ngo_stats(self.ngo.pk)['total_volunteers'], 1)
+        self.assertEqual(get_volunteer_stats(self.volunteer.pk)['registered_ngos'], 1)
+
+        self.volunteer.registered_ngos.remove(self.ngo)
+        self.assertEqual(get_ngo_stats(self.ngo.pk)['total_volunteers'], 0)
+        self.assertEqual(get_volunteer_stats(self.volunteer.pk)['registered_ngos'], 0)
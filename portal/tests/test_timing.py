@@ -0,0 +1,43 @@
+import json
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from portal.models import RestaurantProfile, User
+
+
+class RequestTimingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='restaurant', user_type='RESTAURANT')
+        RestaurantProfile.objects.create(user=self.user, restaurant_name='R', address='x')
+        self.client.force_login(self.user)
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=1)
+    def test_sampled_request_reports_queries_templates_and_view(self):
+        with CaptureQueriesContext(connection) as captured, self.assertLogs('portal.timing', 'INFO') as logs:
+            response = self.client.get(reverse('restaurant_dashboard'))
+        header = response['Server-Timing']
+        self.assertRegex(header, r'^db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+, view;dur=[\d.]+, total;dur=[\d.]+$')
+        self.assertEqual(int(re.search(r'"(\d+) queries"', header).group(1)), len(captured))
+
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((record['view'], record['status'], record['queries']), ('restaurant_dashboard', 200, len(captured)))
+        self.assertGreater(record['template_ms'], 0)
+        self.assertLessEqual(record['view_ms'], record['total_ms'])
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0, REQUEST_TIMING_SLOW_MS=0)
+    def test_unsampled_request_logs_only_when_slow(self):
+        with self.assertLogs('portal.timing', 'INFO') as logs:
+            response = self.client.get(reverse('restaurant_dashboard'))
+        self.assertNotIn('Server-Timing', response)
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertFalse(record['sampled'])
+        self.assertNotIn('queries', record)
+
+        with override_settings(REQUEST_TIMING_SLOW_MS=60000), self.assertNoLogs('portal.timing'):
+            self.client.get(reverse('restaurant_dashboard'))
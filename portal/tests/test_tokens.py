@@ -0,0 +1,77 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from portal import tokens
+from portal.models import Donation, RestaurantProfile, User
+
+
+class TokenAuthTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        tokens.revocations.clear()
+        user = User.objects.create(username='restaurant', user_type='RESTAURANT')
+        user.set_password('pw')
+        user.save()
+        self.restaurant = RestaurantProfile.objects.create(user=user, restaurant_name='Spice Route', address='x')
+        Donation.objects.create(restaurant=self.restaurant, food_description='Rice', quantity=1, pickup_address='x')
+        response = self.client.post(reverse('api_login'), {'username': 'restaurant', 'password': 'pw'})
+        self.pair = {key: response.json()[key] for key in ('access', 'refresh')}
+
+    def get(self, access):
+        return self.client.get(reverse('api_donations'), headers={'Authorization': f'Bearer {access}'})
+
+    def test_access_token_authenticates_without_auth_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(self.pair['access'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertEqual([q['sql'].split(' FROM ')[1].split()[0] for q in queries], ['"portal_donation"'])
+
+    def test_refresh_rotates_the_pair(self):
+        response = self.client.post(reverse('api_token_refresh'), {'refresh': self.pair['refresh']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get(response.json()['access']).status_code, 200)
+
+        again = self.client.post(reverse('api_token_refresh'), {'refresh': self.pair['refresh']})
+        self.assertEqual(again.status_code, 401)
+        self.assertEqual(self.client.post(reverse('api_token_refresh'), {'refresh': self.pair['access']}).status_code, 401)
+
+    def test_revoke_logs_out_both_tokens(self):
+        response = self.client.post(reverse('api_token_revoke'), {'refresh': self.pair['refresh']},
+                                    headers={'Authorization': f'Bearer {self.pair["access"]}'})
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get(self.pair['access']).status_code, 401)
+        self.assertEqual(self.client.post(reverse('api_token_refresh'), {'refresh': self.pair['refresh']}).status_code, 401)
+
+    def test_used_refresh_tokens_are_refused_by_every_worker(self):
+        response = self.client.post(reverse('api_token_refresh'), {'refresh': self.pair['refresh']})
+        self.assertEqual(response.status_code, 200)
+        logged_out = response.json()['refresh']
+        self.client.post(reverse('api_token_revoke'), {'refresh': logged_out})
+
+        # Another worker with its own (per-process) cache.
+        cache.clear()
+        tokens.revocations.clear()
+        for token in (self.pair['refresh'], logged_out):
+            self.assertEqual(self.client.post(reverse('api_token_refresh'), {'refresh': token}).status_code, 401)
+
+    @override_settings(JWT_REVOCATION_SYNC_SECONDS=0)
+    def test_other_workers_pick_up_revocations(self):
+        other_worker = tokens.RevocationList()
+        other_worker.sync()
+        tokens.revocations.revoke(tokens.decode(self.pair['access'], tokens.ACCESS))
+        self.assertTrue(other_worker.is_revoked_locally(tokens.decode(self.pair['access'], tokens.ACCESS)['jti']))
+
+    def test_expired_and_tampered_tokens_are_rejected(self):
+        with mock.patch('portal.tokens.time.time', return_value=time.time() - 3600):
+            stale = tokens.issue_pair(self.restaurant.user)['access']
+        response = self.get(stale)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+        self.assertEqual(self.get(self.pair['access'][:-2] + 'xx').status_code, 401)
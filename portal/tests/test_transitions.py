@@ -0,0 +1,197 @@
+import json
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from portal import transitions
+from portal.models import (
+    Donation, DonationCamp, LeaderboardEntry, NGOProfile, RestaurantProfile, User, VolunteerProfile,
+)
+from portal.stats import get_ngo_stats
+
+
+class TransitionTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.restaurant = RestaurantProfile.objects.create(
+            user=User.objects.create(username='restaurant', user_type='RESTAURANT'),
+            restaurant_name='Spice Route', address='x',
+        )
+        self.ngo = NGOProfile.objects.create(
+            user=User.objects.create(username='ngo', user_type='NGO'),
+            ngo_name='NGO', registration_number='R1', address='x', contact_person='y',
+        )
+        self.other_ngo = NGOProfile.objects.create(
+            user=User.objects.create(username='other-ngo', user_type='NGO'),
+            ngo_name='Other', registration_number='R2', address='x', contact_person='y',
+        )
+        self.camp = DonationCamp.objects.create(ngo=self.ngo, name='Camp', location_address='x', start_time=timezone.now())
+        self.other_camp = DonationCamp.objects.create(ngo=self.other_ngo, name='Elsewhere', location_address='x', start_time=timezone.now())
+        self.volunteer = VolunteerProfile.objects.create(
+            user=User.objects.create(username='volunteer', user_type='VOLUNTEER'), full_name='V',
+        )
+        self.someone_else = VolunteerProfile.objects.create(
+            user=User.objects.create(username='someone', user_type='VOLUNTEER'), full_name='S',
+        )
+
+    def donation(self, status, volunteer=None, camp=None):
+        return Donation.objects.create(
+            restaurant=self.restaurant, food_description='Meals', quantity=1, pickup_address='x', status=status,
+            assigned_volunteer=None if status == 'PENDING' else volunteer or self.volunteer, target_camp=camp,
+        )
+
+
+class BulkTransitionTests(TransitionTestCase):
+    def by_id(self, results):
+        return {item['id']: item['result'] for item in results}
+
+    def test_deliver_moves_only_active_pickups_with_one_timestamp(self):
+        accepted = self.donation('ACCEPTED')
+        collected = self.donation('COLLECTED')
+        verifying = self.donation('VERIFYING', camp=self.camp)
+        foreign = self.donation('ACCEPTED', volunteer=self.someone_else)
+
+        results = transitions.deliver_to_camp(
+            self.volunteer, self.camp, [accepted.pk, collected.pk, verifying.pk, foreign.pk, 999999]
+        )
+        self.assertEqual(self.by_id(results), {
+            accepted.pk: 'updated', collected.pk: 'updated', verifying.pk: 'invalid_status',
+            foreign.pk: 'not_found', 999999: 'not_found',
+        })
+        moved = Donation.objects.filter(pk__in=[accepted.pk, collected.pk])
+        self.assertEqual({d.status for d in moved}, {'VERIFYING'})
+        self.assertEqual({d.target_camp_id for d in moved}, {self.camp.pk})
+        self.assertEqual(len({d.delivered_at for d in moved}), 1)
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.status, 'ACCEPTED')
+
+    def test_verify_is_guarded_counted_once_and_invalidates_stats(self):
+        first = self.donation('VERIFYING', camp=self.camp)
+        second = self.donation('VERIFYING', camp=self.camp)
+        elsewhere = self.donation('VERIFYING', camp=self.other_camp)
+        self.assertEqual(get_ngo_stats(self.ngo.pk)['donations_to_verify'], 2)
+
+        results = transitions.verify_deliveries(self.ngo, [first.pk, second.pk, elsewhere.pk])
+        self.assertEqual(self.by_id(results), {first.pk: 'updated', second.pk: 'updated', elsewhere.pk: 'not_found'})
+        self.assertEqual(get_ngo_stats(self.ngo.pk)['donations_to_verify'], 0)
+
+        again = transitions.verify_deliveries(self.ngo, [first.pk])
+        self.assertEqual(again, [{'id': first.pk, 'result': 'invalid_status', 'status': 'DELIVERED'}])
+        entry = LeaderboardEntry.objects.get(window='ALL', scope=LeaderboardEntry.GLOBAL_SCOPE, volunteer=self.volunteer)
+        self.assertEqual(entry.deliveries, 2)
+
+    def test_batch_endpoints_report_per_item_results(self):
+        accepted = self.donation('ACCEPTED')
+        self.client.force_login(self.volunteer.user)
+        response = self.client.post(
+            reverse('deliver_donations_batch', args=[self.camp.pk]),
+            json.dumps({'donation_ids': [accepted.pk]}), content_type='application/json',
+        )
+        self.assertEqual(response.json()['results'], [{'id': accepted.pk, 'result': 'updated', 'status': 'VERIFYING'}])
+
+        self.client.force_login(self.ngo.user)
+        url = reverse('confirm_deliveries_batch')
+        response = self.client.post(url, json.dumps({'donation_ids': [accepted.pk]}), content_type='application/json')
+        self.assertEqual(response.json()['updated'], 1)
+        response = self.client.post(url, json.dumps({'donation_ids': 'nope'}), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class CompareAndSwapTests(TransitionTestCase):
+    def test_accept_is_a_single_guarded_update(self):
+        donation = self.donation('PENDING')
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(transitions.accept(donation.pk, self.volunteer), transitions.UPDATED)
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('food_description', updates[0])
+        # Only the volunteer's own row is locked, never the donation.
+        self.assertFalse(any('FOR UPDATE' in q['sql'] and 'portal_donation' in q['sql'] for q in queries.captured_queries))
+
+        self.assertEqual(transitions.accept(donation.pk, self.someone_else), transitions.INVALID_STATUS)
+        donation.refresh_from_db()
+        self.assertEqual(donation.assigned_volunteer, self.volunteer)
+
+    def test_pickup_cap_is_enforced(self):
+        for _ in range(transitions.MAX_ACTIVE_PICKUPS - 1):
+            self.donation('COLLECTED')
+        self.assertEqual(transitions.accept(self.donation('PENDING').pk, self.volunteer), transitions.UPDATED)
+
+        extra = self.donation('PENDING')
+        self.assertEqual(transitions.accept(extra.pk, self.volunteer), transitions.LIMIT_REACHED)
+        extra.refresh_from_db()
+        self.assertEqual((extra.status, extra.assigned_volunteer_id, extra.accepted_at), ('PENDING', None, None))
+
+    def test_collect_checks_owner_and_status(self):
+        accepted = self.donation('ACCEPTED')
+        self.assertEqual(transitions.collect(accepted.pk, self.someone_else), transitions.FORBIDDEN)
+        self.assertEqual(transitions.collect(accepted.pk, self.volunteer), transitions.UPDATED)
+        self.assertEqual(transitions.collect(accepted.pk, self.volunteer), transitions.INVALID_STATUS)
+        self.assertEqual(transitions.collect(999999, self.volunteer), transitions.NOT_FOUND)
+
+    def test_accept_endpoint(self):
+        donation = self.donation('PENDING')
+        self.client.force_login(self.volunteer.user)
+        self.assertTrue(self.client.post(reverse('accept_donation', args=[donation.pk])).json()['success'])
+        self.client.force_login(self.someone_else.user)
+        response = self.client.post(reverse('accept_donation', args=[donation.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class AcceptRaceTests(TransactionTestCase):
+    def test_interleaved_accepts_at_the_cap_keep_one(self):
+        restaurant = RestaurantProfile.objects.create(
+            user=User.objects.create(username='restaurant', user_type='RESTAURANT'), restaurant_name='R', address='x',
+        )
+        volunteer = VolunteerProfile.objects.create(
+            user=User.objects.create(username='volunteer', user_type='VOLUNTEER'), full_name='V',
+        )
+        donate = lambda status: Donation.objects.create(  # noqa: E731
+            restaurant=restaurant, food_description='Meals', quantity=1, pickup_address='x', status=status,
+            assigned_volunteer=None if status == 'PENDING' else volunteer,
+        )
+        for _ in range(transitions.MAX_ACTIVE_PICKUPS - 1):
+            donate('COLLECTED')
+        first, second = donate('PENDING'), donate('PENDING')
+
+        # The first accept has counted 9 pickups and not yet written; the
+        # second one runs in that window.
+        counted, second_done = threading.Event(), threading.Event()
+        count = transitions.active_pickup_count
+
+        def count_then_pause(v):
+            result = count(v)
+            if threading.current_thread().name == 'first':
+                counted.set()
+                second_done.wait(timeout=1)
+            return result
+
+        results = {}
+
+        def run(name, donation):
+            try:
+                results[name] = transitions.accept(donation.pk, volunteer)
+            finally:
+                if name == 'second':
+                    second_done.set()
+                connection.close()
+
+        with mock.patch.object(transitions, 'active_pickup_count', count_then_pause):
+            threads = [threading.Thread(target=run, args=('first', first), name='first'),
+                       threading.Thread(target=run, args=('second', second), name='second')]
+            threads[0].start()
+            counted.wait(timeout=5)
+            threads[1].start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(sorted(results.values()), [transitions.LIMIT_REACHED, transitions.UPDATED])
+        self.assertEqual(transitions.active_pickup_count(volunteer), transitions.MAX_ACTIVE_PICKUPS)
@@ -0,0 +1,212 @@
+# portal/tokens.py
+"""
+Stateless signed tokens for the REST API.
+
+``POST /api/login/`` hands out a short-lived *access* token and a long-lived
+*refresh* token, both HS256 JWTs. The access token carries ``user_id`` and
+``user_type``, so ``JWTAuthentication`` can authenticate a request without
+looking up a token row or the user: ``request.user`` is a ``User`` with just
+those two fields loaded (anything else is fetched on first use, as with a
+deferred queryset field). ``POST /api/token/refresh/`` trades a refresh token
+for a new pair and retires the old one; ``POST /api/token/revoke/`` logs out.
+
+Used and logged-out refresh tokens are recorded in ``RetiredRefreshToken``
+until they would have expired anyway. The insert of a token's ``jti`` is
+what claims it, so each refresh token is traded in once across all workers,
+whatever the cache backend is.
+
+Revoked access tokens are checked against a copy of the revocation list held
+in process memory, so the hot path costs no database or cache round trip.
+That copy picks up other workers' revocations from the cache every
+``JWT_REVOCATION_SYNC_SECONDS``. Revocations are appended to a numbered log
+in the cache (``cache.incr`` hands out the numbers), so concurrent writers
+never overwrite each other and a sync only reads the entries it has not
+seen yet. Without a shared cache (no ``REDIS_URL``) a revoked access token
+stays usable on other workers until it expires, at most
+``JWT_ACCESS_TOKEN_LIFETIME`` seconds.
+"""
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import jwt
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, router, transaction
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+
+from .models import RetiredRefreshToken, User
+
+ALGORITHM = 'HS256'
+ACCESS = 'access'
+REFRESH = 'refresh'
+LEEWAY = 10  # seconds of clock skew tolerated between workers
+
+_LOG_KEY = 'jwt:revocations:{}'
+_LOG_SEQUENCE_KEY = 'jwt:revocations'
+
+
+class TokenError(Exception):
+    """The token is malformed, expired, revoked or of the wrong type."""
+
+
+def _signing_key():
+    return getattr(settings, 'JWT_SIGNING_KEY', '') or settings.SECRET_KEY
+
+
+def _lifetime(token_type):
+    if token_type == ACCESS:
+        return getattr(settings, 'JWT_ACCESS_TOKEN_LIFETIME', 300)
+    return getattr(settings, 'JWT_REFRESH_TOKEN_LIFETIME', 14 * 24 * 3600)
+
+
+def _encode(user, token_type, now):
+    payload = {
+        'type': token_type,
+        'jti': uuid.uuid4().hex,
+        'user_id': user.pk,
+        'user_type': user.user_type,
+        'iat': now,
+        'exp': now + _lifetime(token_type),
+    }
+    return jwt.encode(payload, _signing_key(), algorithm=ALGORITHM)
+
+
+def issue_pair(user):
+    """``{'access': ..., 'refresh': ...}`` for ``user``."""
+    now = int(time.time())
+    return {'access': _encode(user, ACCESS, now), 'refresh': _encode(user, REFRESH, now)}
+
+
+def decode(token, token_type):
+    """Verified claims of ``token``; raises ``TokenError``."""
+    try:
+        payload = jwt.decode(
+            token, _signing_key(), algorithms=[ALGORITHM], leeway=LEEWAY,
+            options={'require': ['exp', 'jti', 'user_id', 'type']},
+        )
+    except jwt.ExpiredSignatureError:
+        raise TokenError('Token has expired.')
+    except jwt.InvalidTokenError:
+        raise TokenError('Token is invalid.')
+    if payload['type'] != token_type:
+        raise TokenError(f'Expected a {token_type} token.')
+    return payload
+
+
+def retire_refresh_token(payload):
+    """
+    Record a refresh token as used. Returns False if it already was, by this
+    or any other worker.
+    """
+    expires_at = datetime.fromtimestamp(payload['exp'], tz=dt_timezone.utc)
+    try:
+        with transaction.atomic():
+            RetiredRefreshToken.objects.create(jti=payload['jti'], expires_at=expires_at)
+    except IntegrityError:
+        return False
+    return True
+
+
+class RevocationList:
+    """Revoked access tokens; refresh tokens go to ``retire_refresh_token``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revoked = {}  # jti -> exp
+        self._seen = 0
+        self._synced_at = None
+
+    def revoke(self, payload):
+        if payload['type'] == REFRESH:
+            retire_refresh_token(payload)
+            return
+        jti, exp = payload['jti'], payload['exp']
+        ttl = max(int(exp - time.time()) + LEEWAY, 1)
+        cache.add(_LOG_SEQUENCE_KEY, 0, None)
+        try:
+            number = cache.incr(_LOG_SEQUENCE_KEY)
+        except ValueError:  # evicted between add and incr
+            number = 1
+            cache.set(_LOG_SEQUENCE_KEY, number, None)
+        cache.set(_LOG_KEY.format(number), (jti, exp), ttl)
+        with self._lock:
+            self._revoked[jti] = exp
+
+    def is_revoked_locally(self, jti):
+        """Checked against process memory, synced at most every few seconds."""
+        interval = getattr(settings, 'JWT_REVOCATION_SYNC_SECONDS', 5)
+        if self._synced_at is None or time.monotonic() - self._synced_at >= interval:
+            self.sync()
+        return jti in self._revoked
+
+    def sync(self):
+        latest = cache.get(_LOG_SEQUENCE_KEY, 0)
+        # A sequence behind ours means the cache was flushed; read it all again.
+        start = self._seen if latest >= self._seen else 0
+        entries = cache.get_many([_LOG_KEY.format(n) for n in range(start + 1, latest + 1)])
+        now = time.time()
+        with self._lock:
+            for jti, exp in entries.values():
+                self._revoked[jti] = exp
+            self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp + LEEWAY > now}
+            self._seen = latest
+            self._synced_at = time.monotonic()
+
+    def clear(self):
+        """Forget the in-memory copy (for tests)."""
+        with self._lock:
+            self._revoked.clear()
+            self._seen = 0
+            self._synced_at = None
+
+
+revocations = RevocationList()
+
+
+def refresh(token):
+    """Trade a refresh token for a new pair; the old one can't be used again."""
+    payload = decode(token, REFRESH)
+    user = User.objects.filter(pk=payload['user_id'], is_active=True).only('pk', 'user_type').first()
+    if user is None:
+        raise TokenError('User not found.')
+    if not retire_refresh_token(payload):
+        raise TokenError('Token has been revoked.')
+    # Refreshes are rare, so they also clear out rows past their expiry.
+    RetiredRefreshToken.objects.filter(expires_at__lt=timezone.now() - timedelta(seconds=LEEWAY)).delete()
+    return issue_pair(user)
+
+
+def token_user(payload):
+    """
+    A ``User`` carrying only ``pk`` and ``user_type`` from the token. Other
+    fields are deferred and load on first access.
+    """
+    db = router.db_for_read(User)
+    return User.from_db(db, ['id', 'user_type'], [payload['user_id'], payload['user_type']])
+
+
+class JWTAuthentication(BaseAuthentication):
+    """``Authorization: Bearer <access token>``; ``request.auth`` is the claims dict."""
+
+    keyword = b'bearer'
+
+    def authenticate(self, request):
+        parts = get_authorization_header(request).split()
+        if not parts or parts[0].lower() != self.keyword:
+            return None
+        if len(parts) != 2:
+            raise exceptions.AuthenticationFailed('Invalid bearer header.')
+        try:
+            payload = decode(parts[1].decode('latin-1'), ACCESS)
+        except TokenError as e:
+            raise exceptions.AuthenticationFailed(str(e))
+        if revocations.is_revoked_locally(payload['jti']):
+            raise exceptions.AuthenticationFailed('Token has been revoked.')
+        return token_user(payload), payload
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="api"'
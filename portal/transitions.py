@@ -0,0 +1,235 @@
+# portal/transitions.py
+"""
+Donation state machine.
+
+    PENDING -> ACCEPTED -> COLLECTED -> VERIFYING -> DELIVERED
+    ACCEPTED -> VERIFYING   (delivered without a separate pickup step)
+    ACCEPTED -> PENDING     (acceptance expired, see expiry.py)
+
+Every transition is a compare-and-swap: one conditional UPDATE whose WHERE
+clause repeats the expected status and ownership, with the affected row
+count telling whether it won. No donation is read under
+``select_for_update``, so volunteers racing for the same donation never
+queue on a row lock; the losers just see zero rows updated. (``accept``
+locks the accepting volunteer's own profile row to enforce the pickup cap.) Only the columns a transition changes
+are written, and since ``.update()`` skips model signals the cached
+counters are invalidated here. Moves are also published to the live feed
+(``realtime.py``) once they commit.
+
+Bulk transitions stamp every row of a batch with the same timestamp, and
+that stamp is how the rows this call actually moved are told apart from
+rows a concurrent request moved at the same time.
+
+Outcomes, per donation:
+
+* ``updated``: moved by this call.
+* ``not_found``: doesn't exist, or isn't the caller's.
+* ``forbidden``: exists but belongs to someone else (single transitions).
+* ``invalid_status``: not in a status this transition starts from.
+* ``conflict``: was eligible when read but changed before the UPDATE.
+* ``limit_reached``: the volunteer already has ``MAX_ACTIVE_PICKUPS``.
+"""
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import leaderboard, metrics, realtime, stats
+from .models import Donation, DonationCamp, VolunteerProfile
+
+UPDATED = 'updated'
+NOT_FOUND = 'not_found'
+FORBIDDEN = 'forbidden'
+INVALID_STATUS = 'invalid_status'
+CONFLICT = 'conflict'
+LIMIT_REACHED = 'limit_reached'
+
+ACTIVE_STATUSES = ['ACCEPTED', 'COLLECTED']
+DELIVERABLE_STATUSES = ACTIVE_STATUSES
+MAX_ACTIVE_PICKUPS = 10
+
+
+def batch_limit():
+    return getattr(settings, 'TRANSITION_BATCH_LIMIT', 200)
+
+
+# --- Single donations ---
+
+def _invalidate(donation_id, volunteer):
+    """Drop the cached counters around ``donation_id``; returns its ``(created_at, accepted_at)``."""
+    rows = list(Donation.objects.filter(pk=donation_id).values_list(
+        'restaurant_id', 'target_camp_id', 'created_at', 'accepted_at',
+    ))
+    stats.invalidate_donations((restaurant_id, volunteer.pk, camp_id) for restaurant_id, camp_id, _, _ in rows)
+    return rows[0][2:] if rows else (None, None)
+
+
+def _failure(donation_id, volunteer, from_statuses):
+    """Explain why a CAS on ``donation_id`` updated nothing."""
+    row = Donation.objects.filter(pk=donation_id).values_list('status', 'assigned_volunteer_id').first()
+    if row is None:
+        return NOT_FOUND
+    status, volunteer_id = row
+    if volunteer is not None and volunteer_id not in (None, volunteer.pk):
+        return FORBIDDEN
+    return INVALID_STATUS if status not in from_statuses else CONFLICT
+
+
+def active_pickup_count(volunteer):
+    return Donation.objects.filter(assigned_volunteer=volunteer, status__in=ACTIVE_STATUSES).count()
+
+
+def accept(donation_id, volunteer, now=None):
+    """
+    PENDING -> ACCEPTED for ``volunteer``.
+
+    The pickup cap needs the count and the write to agree, so each accept
+    locks the volunteer's profile row and then counts and swaps inside the
+    same transaction. Accepts by one volunteer therefore run one at a time,
+    while different volunteers racing for a donation still only meet at
+    the compare-and-swap.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        list(VolunteerProfile.objects.select_for_update().filter(pk=volunteer.pk).values_list('pk'))
+        if active_pickup_count(volunteer) >= MAX_ACTIVE_PICKUPS:
+            return LIMIT_REACHED
+        won = Donation.objects.filter(pk=donation_id, status='PENDING').update(
+            status='ACCEPTED', assigned_volunteer=volunteer, accepted_at=now,
+        )
+    if not won:
+        return _failure(donation_id, None, ['PENDING'])
+
+    created_at, _ = _invalidate(donation_id, volunteer)
+    metrics.observe_wait(metrics.TIME_TO_ACCEPT, created_at, now)
+    realtime.publish(realtime.ACCEPTED, [donation_id])
+    return UPDATED
+
+
+def collect(donation_id, volunteer, now=None):
+    """ACCEPTED -> COLLECTED, only by the volunteer who accepted it."""
+    now = now or timezone.now()
+    won = Donation.objects.filter(pk=donation_id, assigned_volunteer=volunteer, status='ACCEPTED').update(
+        status='COLLECTED', collected_at=now,
+    )
+    if not won:
+        return _failure(donation_id, volunteer, ['ACCEPTED'])
+    _, accepted_at = _invalidate(donation_id, volunteer)
+    metrics.observe_wait(metrics.TIME_TO_COLLECT, accepted_at, now)
+    realtime.publish(realtime.COLLECTED, [donation_id])
+    return UPDATED
+
+
+# --- Batches ---
+
+def _transition(scope, donation_ids, from_statuses, changes, stamp_field):
+    """
+    Apply ``changes`` to the donations of ``scope`` listed in
+    ``donation_ids`` (or all of ``scope`` in ``from_statuses`` when None).
+
+    Returns ``(results, moved)`` where ``moved`` holds ``(pk, restaurant_id,
+    volunteer_id, camp_id)`` for the rows this call changed.
+    """
+    if donation_ids is None:
+        current = list(scope.filter(status__in=from_statuses).values_list('pk', 'status')[:batch_limit()])
+        donation_ids = [pk for pk, _ in current]
+    else:
+        donation_ids = list(dict.fromkeys(donation_ids))[:batch_limit()]
+        current = list(scope.filter(pk__in=donation_ids).values_list('pk', 'status'))
+    statuses = dict(current)
+    eligible = [pk for pk in donation_ids if statuses.get(pk) in from_statuses]
+
+    moved = []
+    if eligible:
+        with transaction.atomic():
+            scope.filter(pk__in=eligible, status__in=from_statuses).update(**changes)
+            moved = list(
+                scope.filter(pk__in=eligible, status=changes['status'], **{stamp_field: changes[stamp_field]})
+                .values_list('pk', 'restaurant_id', 'assigned_volunteer_id', 'target_camp_id')
+            )
+            # .update() skips the model signals, so drop the cached counters here.
+            stats.invalidate_donations(row[1:] for row in moved)
+
+    moved_ids = {row[0] for row in moved}
+    results = []
+    for pk in donation_ids:
+        if pk in moved_ids:
+            result = UPDATED
+        elif pk not in statuses:
+            result = NOT_FOUND
+        elif pk in eligible:
+            result = CONFLICT
+        else:
+            result = INVALID_STATUS
+        results.append({
+            'id': pk,
+            'result': result,
+            'status': changes['status'] if pk in moved_ids else statuses.get(pk),
+        })
+    return results, moved
+
+
+def deliver_to_camp(volunteer, camp, donation_ids=None, now=None):
+    """
+    ACCEPTED/COLLECTED -> VERIFYING for ``volunteer``'s donations, dropped off
+    at ``camp``. With ``donation_ids`` None, every active pickup is delivered.
+    """
+    now = now or timezone.now()
+    results, moved = _transition(
+        Donation.objects.filter(assigned_volunteer=volunteer),
+        donation_ids,
+        DELIVERABLE_STATUSES,
+        {'status': 'VERIFYING', 'target_camp': camp, 'delivered_at': now},
+        'delivered_at',
+    )
+    realtime.publish(realtime.DELIVERED, [row[0] for row in moved])
+    return results
+
+
+def verify_deliveries(ngo, donation_ids, now=None):
+    """VERIFYING -> DELIVERED for donations dropped off at ``ngo``'s camps."""
+    now = now or timezone.now()
+    # A subquery rather than a join: MySQL can't UPDATE a joined query
+    # directly, and Django would then drop the status guard for a pk list.
+    scope = Donation.objects.filter(target_camp__in=DonationCamp.objects.filter(ngo=ngo).values('pk'))
+    with transaction.atomic():
+        results, moved = _transition(
+            scope,
+            donation_ids,
+            ['VERIFYING'],
+            {'status': 'DELIVERED', 'verified_at': now},
+            'verified_at',
+        )
+        if moved:
+            delivered = list(Donation.objects.filter(pk__in=[row[0] for row in moved]).values_list(
+                'assigned_volunteer_id', 'target_camp__ngo_id', 'delivered_at'
+            ))
+            leaderboard.record_deliveries(delivered)
+            for _, _, delivered_at in delivered:
+                metrics.observe_wait(metrics.TIME_TO_VERIFY, delivered_at, now)
+        realtime.publish(realtime.VERIFIED, [row[0] for row in moved])
+    return results
+
+
+def count_updated(results):
+    return sum(1 for item in results if item['result'] == UPDATED)
+
+
+def donation_ids_from_request(request):
+    """
+    ``donation_ids`` from a JSON body or form data, as ints, or None if the
+    field is absent. Raises ``ValueError`` for malformed or oversized input.
+    """
+    if request.content_type == 'application/json':
+        data = json.loads(request.body or b'{}')
+        if not isinstance(data, dict):
+            raise ValueError('Expected a JSON object.')
+        ids = data.get('donation_ids')
+    else:
+        ids = request.POST.getlist('donation_ids') or None
+    if ids is None:
+        return None
+    if not isinstance(ids, list) or len(ids) > batch_limit():
+        raise ValueError(f'donation_ids must be a list of at most {batch_limit()} ids.')
+    return [int(pk) for pk in ids]
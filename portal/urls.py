@@ -7,6 +7,9 @@ urlpatterns = [
     # --- Service Worker URL ---
     path('sw.js', views.serve_sw, name='sw'),
 
+    # --- Prometheus metrics ---
+    path('metrics', views.prometheus_metrics, name='metrics'),
+
     # --- Main Site & Auth URLs ---
     path('', views.index, name='index'),
     path('register/step-1/', views.register_step_1, name='register_step_1'),
@@ -67,12 +70,24 @@ urlpatterns = [
     path('donation/accept/<int:donation_id>/', views.accept_donation, name='accept_donation'),
     path('donation/collected/<int:donation_id>/', views.mark_as_collected, name='mark_as_collected'),
     path('donation/deliver/to/<int:camp_id>/', views.mark_as_delivered, name='mark_as_delivered'),
+    path('donation/deliver/to/<int:camp_id>/batch/', views.deliver_donations_batch, name='deliver_donations_batch'),
     path('camp/complete/<int:camp_id>/', views.mark_camp_as_completed, name='mark_camp_as_completed'),
     path('donation/confirm_delivery/<int:donation_id>/', views.confirm_delivery, name='confirm_delivery'),
+    path('donation/confirm_delivery/batch/', views.confirm_deliveries_batch, name='confirm_deliveries_batch'),
 
     # --- API URLs ---
     path('api/register/', views.RegisterAPIView.as_view(), name='api_register'),
     path('api/login/', views.LoginAPIView.as_view(), name='api_login'),
+    path('api/token/refresh/', views.TokenRefreshAPIView.as_view(), name='api_token_refresh'),
+    path('api/token/revoke/', views.TokenRevokeAPIView.as_view(), name='api_token_revoke'),
+    path('api/donations/', views.DonationListAPIView.as_view(), name='api_donations'),
+    path('api/donations/<int:pk>/', views.DonationDetailAPIView.as_view(), name='api_donation_detail'),
+    path('api/camps/', views.CampListAPIView.as_view(), name='api_camps'),
+    path('api/camps/<int:pk>/', views.CampDetailAPIView.as_view(), name='api_camp_detail'),
+    path('api/memberships/', views.MembershipListAPIView.as_view(), name='api_memberships'),
+    path('api/memberships/<int:pk>/', views.MembershipDetailAPIView.as_view(), name='api_membership_detail'),
+    path('api/donations/nearby/', views.nearby_donations_api, name='nearby_donations_api'),
+    path('api/volunteer/route/', views.volunteer_route_api, name='volunteer_route_api'),
     path('api/save-webpush-subscription/', views.save_webpush_subscription, name='save_webpush_subscription'),
     
     # --- Gamification URLs ---
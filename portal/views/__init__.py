@@ -9,7 +9,6 @@ from .api_views import *
 
 # --- HELPER & PUBLIC VIEWS ---
 from django.shortcuts import render, redirect
-import json
 from ..models import User, DonationCamp, RestaurantProfile, Donation
 from django.utils import timezone
 from django.contrib.auth.decorators import login_required
@@ -18,6 +17,10 @@ from django.urls import reverse
 from django.http import JsonResponse
 from django.http import HttpResponse
 from django.conf import settings
+from django.db import transaction
+from django.utils.crypto import constant_time_compare
+from .. import leaderboard, metrics, transitions
+from ..page_cache import cached_anonymous_page, get_camps_map_json, get_restaurants_map_json
 import os
 
 
@@ -39,35 +42,52 @@ def index(request):
         return get_user_dashboard_redirect(request.user)
         
     # The rest of the function is for non-logged-in users
-    active_camps = DonationCamp.objects.filter(is_active=True).select_related('ngo')
-    all_restaurants = RestaurantProfile.objects.filter(latitude__isnull=False, longitude__isnull=False)
-    camps_map_data = [{"lat": c.latitude, "lon": c.longitude, "name": c.name, "ngo": c.ngo.ngo_name, "address": c.location_address, "start": c.start_time.strftime('%d %b %Y, %H:%M')} for c in active_camps if c.latitude and c.longitude]
-    restaurants_map_data = [{"lat": r.latitude, "lon": r.longitude, "name": r.restaurant_name, "address": r.address} for r in all_restaurants]
-    context = {'camps_map_data': json.dumps(camps_map_data), 'restaurants_map_data': json.dumps(restaurants_map_data)}
+    return cached_anonymous_page(request, 'index', render_index)
+
+def render_index(request):
+    context = {'camps_map_data': get_camps_map_json(), 'restaurants_map_data': get_restaurants_map_json()}
     return render(request, 'index.html', context)
 
 # Action views used by multiple user types
 @login_required(login_url='login_page')
 def mark_camp_as_completed(request, camp_id):
     if request.user.user_type != 'NGO': return redirect('index')
-    camp = get_object_or_404(DonationCamp, pk=camp_id, ngo=request.user.ngo_profile)
+    camp = get_object_or_404(DonationCamp, pk=camp_id, ngo=request.profile)
     if request.method == 'POST':
         camp.is_active = False
         camp.completed_at = timezone.now()
-        camp.save()
+        camp.save(update_fields=['is_active', 'completed_at'])
     redirect_url = reverse('ngo_manage_camps') + '?view=history'
     return redirect(redirect_url)
 
 @login_required(login_url='login_page')
 def confirm_delivery(request, donation_id):
     if request.user.user_type != 'NGO': return redirect('index')
-    donation = get_object_or_404(Donation, pk=donation_id, target_camp__ngo=request.user.ngo_profile)
+    get_object_or_404(Donation, pk=donation_id, target_camp__ngo=request.profile)
     if request.method == 'POST':
-        donation.status = 'DELIVERED'
-        donation.save()
+        transitions.verify_deliveries(request.profile, [donation_id])
     redirect_url = reverse('ngo_manage_camps') + '?view=verification'
     return redirect(redirect_url)
 
+@login_required(login_url='login_page')
+def confirm_deliveries_batch(request):
+    """
+    NGO verifies several drop-offs at once. Body: ``{"donation_ids": [...]}``
+    (JSON or form data); responds with the outcome for each donation.
+    """
+    if request.user.user_type != 'NGO' or request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'Unauthorized request.'}, status=403)
+    try:
+        donation_ids = transitions.donation_ids_from_request(request)
+    except (TypeError, ValueError) as e:
+        return JsonResponse({'success': False, 'message': f'Invalid data: {e}'}, status=400)
+    if not donation_ids:
+        return JsonResponse({'success': False, 'message': 'donation_ids is required.'}, status=400)
+
+    results = transitions.verify_deliveries(request.profile, donation_ids)
+    updated = transitions.count_updated(results)
+    return JsonResponse({'success': updated > 0, 'updated': updated, 'results': results})
+
 @login_required(login_url='login_page')
 def rate_donation(request, donation_id):
     """NGO rates a completed donation delivery, always returns JSON."""
@@ -75,8 +95,6 @@ def rate_donation(request, donation_id):
         return JsonResponse({'success': False, 'message': 'Unauthorized request.'}, status=403)
     
     try:
-        donation = get_object_or_404(Donation, pk=donation_id, target_camp__ngo=request.user.ngo_profile, status='DELIVERED')
-        
         rating = request.POST.get('rating')
         review = request.POST.get('review', '')
         
@@ -87,9 +105,17 @@ def rate_donation(request, donation_id):
         if not (1 <= rating <= 5):
             raise ValueError("Rating must be between 1 and 5.")
         
-        donation.rating = rating
-        donation.review = review
-        donation.save()
+        with transaction.atomic():
+            # Locked, so concurrent ratings see each other's value and the
+            # leaderboard gets each change once.
+            donation = get_object_or_404(
+                Donation.objects.select_for_update(), pk=donation_id, target_camp__ngo=request.profile, status='DELIVERED',
+            )
+            previous_rating = donation.rating
+            donation.rating = rating
+            donation.review = review
+            donation.save(update_fields=['rating', 'review'])
+            leaderboard.record_rating(donation, previous_rating)
         
         return JsonResponse({'success': True, 'message': 'Rating submitted successfully!'})
 
@@ -107,4 +133,11 @@ def serve_sw(request):
         with open(sw_path, 'r') as f:
             return HttpResponse(f.read(), content_type='application/javascript')
     except FileNotFoundError:
-        return HttpResponse("Service worker not found.", status=404, content_type='text/plain')
\ No newline at end of file
+        return HttpResponse("Service worker not found.", status=404, content_type='text/plain')
+
+# --- Prometheus scrape endpoint ---
+def prometheus_metrics(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,9 +1,23 @@
+import logging
+
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import conditional_page
 from rest_framework import generics
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
-from ..serializers import UserSerializer
-from ..models import User
+from ..serializers import UserSerializer, DonationSerializer, DonationCampSerializer, MembershipSerializer
+from ..models import User, Donation, DonationCamp, NGOVolunteer
+from ..notifications import notify_new_donation
+from ..pagination import KeysetAPIPagination
+from .. import realtime, tokens
+
+logger = logging.getLogger(__name__)
+
 
 class RegisterAPIView(generics.CreateAPIView):
     queryset = User.objects.all()
@@ -18,5 +32,225 @@ class LoginAPIView(ObtainAuthToken):
         return Response({
             'token': token.key,
             'user_id': user.pk,
-            'user_type': user.user_type
-        })
\ No newline at end of file
+            'user_type': user.user_type,
+            **tokens.issue_pair(user),
+        })
+
+class TokenRefreshAPIView(generics.GenericAPIView):
+    """Body ``{"refresh": ...}``; returns a new access/refresh pair."""
+    permission_classes = [AllowAny]
+
+    def post(self, request, *args, **kwargs):
+        try:
+            return Response(tokens.refresh(str(request.data.get('refresh', ''))))
+        except tokens.TokenError as e:
+            return Response({'detail': str(e)}, status=401)
+
+class TokenRevokeAPIView(generics.GenericAPIView):
+    """
+    Log out: body ``{"refresh": ...}``. The access token the request was made
+    with, if any, is revoked as well.
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request, *args, **kwargs):
+        try:
+            payload = tokens.decode(str(request.data.get('refresh', '')), tokens.REFRESH)
+        except tokens.TokenError as e:
+            return Response({'detail': str(e)}, status=400)
+        tokens.revocations.revoke(payload)
+        if isinstance(request.auth, dict) and request.auth.get('user_id') == payload['user_id']:
+            tokens.revocations.revoke(request.auth)
+        return Response(status=204)
+
+
+# --- Donations, camps and memberships ---
+
+# Clients revalidate with If-None-Match; an unchanged response comes back as
+# a bodyless 304 (ETag hashed from the rendered body, GET only).
+conditional_api = method_decorator([cache_control(private=True, no_cache=True), conditional_page], name='dispatch')
+
+
+class PortalAPIView(generics.GenericAPIView):
+    """
+    Base for the portal resources. ``get_scope()`` returns the rows the
+    current user may see; on GET the queryset is narrowed with ``only()`` to
+    the columns of the requested fields (``?fields=id,status``) and joins just
+    the relations those fields read.
+    """
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetAPIPagination
+    ordering = ('-pk',)
+
+    def get_scope(self):
+        raise NotImplementedError
+
+    def require_user_type(self, *user_types):
+        if self.request.user.user_type not in user_types:
+            raise PermissionDenied(f'Only {", ".join(user_types)} users can do this.')
+
+    def requested_fields(self):
+        fields = self.get_serializer_class().Meta.fields
+        names = [name for name in self.request.query_params.get('fields', '').split(',') if name in fields]
+        return names or list(fields)
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method == 'GET':
+            kwargs.setdefault('fields', self.requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = self.get_scope()
+        serializer_class = self.get_serializer_class()
+        if self.request.method != 'GET':
+            return queryset
+        # Sort keys are read back to build the next cursor, so load them too.
+        columns = serializer_class.columns_for(self.requested_fields())
+        columns += [term.lstrip('-') for term in self.ordering if term.lstrip('-') != 'pk']
+        relations = {column.split('__')[0] for column in columns if '__' in column}
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset.only('pk', *columns)
+
+
+@conditional_api
+class DonationListAPIView(PortalAPIView, generics.ListCreateAPIView):
+    """
+    Donations of the current user: a restaurant's own, those delivered to an
+    NGO's camps, or a volunteer's pickups (``?status=PENDING`` lists the open
+    pool instead). ``?status=`` filters by status. Restaurants POST to post a
+    new donation.
+    """
+    serializer_class = DonationSerializer
+    ordering = ('-created_at', '-pk')
+
+    def get_scope(self):
+        return donation_scope(self.request)
+
+    def post(self, request, *args, **kwargs):
+        self.require_user_type(User.UserType.RESTAURANT)
+        return super().post(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        donation = serializer.save(restaurant=self.request.profile)
+        realtime.publish(realtime.CREATED, [donation.pk])
+        try:
+            notify_new_donation(donation)
+        except Exception:
+            logger.exception('Could not notify volunteers of donation %s', donation.pk)
+
+
+@conditional_api
+class DonationDetailAPIView(PortalAPIView, generics.RetrieveAPIView):
+    serializer_class = DonationSerializer
+
+    def get_scope(self):
+        return donation_scope(self.request)
+
+
+def donation_scope(request):
+    user = request.user
+    status = request.query_params.get('status')
+    if status and status not in Donation.DonationStatus.values:
+        raise ValidationError({'status': f'Must be one of {", ".join(Donation.DonationStatus.values)}.'})
+
+    donations = Donation.objects.all()
+    if status:
+        donations = donations.filter(status=status)
+    # Profiles share their user's primary key, so no profile lookup is needed.
+    if user.user_type == User.UserType.RESTAURANT:
+        return donations.filter(restaurant_id=user.pk)
+    if user.user_type == User.UserType.NGO:
+        return donations.filter(target_camp__ngo_id=user.pk)
+    if user.user_type == User.UserType.VOLUNTEER:
+        return donations if status == Donation.DonationStatus.PENDING else donations.filter(assigned_volunteer_id=user.pk)
+    return donations.none()
+
+
+@conditional_api
+class CampListAPIView(PortalAPIView, generics.ListCreateAPIView):
+    """
+    An NGO's own camps, or every active camp for other users. ``?active=``
+    (``true``/``false``) filters NGO camps. NGOs POST to open a camp.
+    """
+    serializer_class = DonationCampSerializer
+    ordering = ('-start_time', '-pk')
+
+    def get_scope(self):
+        user = self.request.user
+        if user.user_type != User.UserType.NGO:
+            return DonationCamp.objects.filter(is_active=True)
+        camps = DonationCamp.objects.filter(ngo_id=user.pk)
+        active = self.request.query_params.get('active')
+        if active in ('true', 'false'):
+            camps = camps.filter(is_active=active == 'true')
+        return camps
+
+    def post(self, request, *args, **kwargs):
+        self.require_user_type(User.UserType.NGO)
+        return super().post(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        serializer.save(ngo=self.request.profile)
+
+
+@conditional_api
+class CampDetailAPIView(PortalAPIView, generics.RetrieveUpdateAPIView):
+    """One camp; its NGO can PATCH it, and setting ``is_active`` to false completes it."""
+    serializer_class = DonationCampSerializer
+
+    def get_scope(self):
+        user = self.request.user
+        if user.user_type == User.UserType.NGO:
+            return DonationCamp.objects.filter(ngo_id=user.pk)
+        if self.request.method != 'GET':
+            raise PermissionDenied('Only the NGO running this camp can change it.')
+        return DonationCamp.objects.filter(is_active=True)
+
+    def perform_update(self, serializer):
+        camp = serializer.instance
+        if camp.is_active and serializer.validated_data.get('is_active') is False:
+            serializer.save(completed_at=timezone.now())
+        else:
+            serializer.save()
+
+
+@conditional_api
+class MembershipListAPIView(PortalAPIView, generics.ListCreateAPIView):
+    """
+    A volunteer's NGO registrations, or an NGO's registered volunteers.
+    Volunteers POST ``{"ngo": <id>}`` to register with an NGO.
+    """
+    serializer_class = MembershipSerializer
+    ordering = ('-date_joined', '-pk')
+
+    def get_scope(self):
+        return membership_scope(self.request)
+
+    def post(self, request, *args, **kwargs):
+        self.require_user_type(User.UserType.VOLUNTEER)
+        return super().post(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        volunteer = self.request.profile
+        if NGOVolunteer.objects.filter(ngo=serializer.validated_data['ngo'], volunteer=volunteer).exists():
+            raise ValidationError({'ngo': 'You are already registered with this NGO.'})
+        serializer.save(volunteer=volunteer)
+
+
+@conditional_api
+class MembershipDetailAPIView(PortalAPIView, generics.RetrieveDestroyAPIView):
+    """One registration; either the volunteer or the NGO can DELETE it."""
+    serializer_class = MembershipSerializer
+
+    def get_scope(self):
+        return membership_scope(self.request)
+
+
+def membership_scope(request):
+    user = request.user
+    if user.user_type == User.UserType.VOLUNTEER:
+        return NGOVolunteer.objects.filter(volunteer_id=user.pk)
+    if user.user_type == User.UserType.NGO:
+        return NGOVolunteer.objects.filter(ngo_id=user.pk)
+    return NGOVolunteer.objects.none()
@@ -1,6 +1,7 @@
 # portal/views/auth_views.py
 from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth.hashers import make_password
 from django.contrib import messages
 from django.contrib.messages import get_messages
 from ..models import User, RestaurantProfile, NGOProfile, VolunteerProfile
@@ -40,10 +41,12 @@ def register_step_1(request):
                 i += 1
             username = f"{username}{i}"
 
+        # Only the password hash is kept: with cookie sessions this data
+        # travels in a (signed, not encrypted) cookie.
         request.session['registration_data'] = {
             'full_name': full_name,
             'email': email,
-            'password': password,
+            'password': make_password(password),
             'username': username
         }
         return redirect('register_step_2')
@@ -72,9 +75,10 @@ def register_step_2(request):
         
         user = None
         if registration_data: # Manual registration flow
-            user = User.objects.create_user(
-                username=registration_data['username'],
-                email=registration_data['email'],
+            # Like create_user(), but with the password already hashed in step 1.
+            user = User.objects.create(
+                username=User.normalize_username(registration_data['username']),
+                email=User.objects.normalize_email(registration_data['email']),
                 password=registration_data['password'],
                 user_type=user_type,
                 first_name=registration_data.get('full_name', '').split(' ')[0],
@@ -155,8 +159,6 @@ def logout_view(request):
 def google_callback(request):
     """Handle Google OAuth callback"""
     if request.user.is_authenticated:
-        # If the user is new (user_type is still ADMIN), redirect to complete their profile
-        if request.user.user_type == User.UserType.ADMIN and not hasattr(request.user, 'restaurant_profile') and not hasattr(request.user, 'ngo_profile') and not hasattr(request.user, 'volunteer_profile'):
-            return redirect('register_step_2')
+        # New users (user_type still ADMIN) are sent on to complete their profile
         return get_user_dashboard_redirect(request.user)
     return redirect('login_page')
\ No newline at end of file
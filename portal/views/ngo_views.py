@@ -6,26 +6,43 @@ from django.contrib import messages
 from ..models import DonationCamp, Donation, NGOProfile
 from ..forms import DonationCampForm, NGOProfileForm
 from ..decorators import user_type_required
+from ..stats import get_ngo_stats
+from ..pagination import fragment_response, paginate_request, requested_fragment
 
 @login_required(login_url='login_page')
 @user_type_required('NGO')
 def ngo_dashboard_overview(request):
-    ngo_profile = request.user.ngo_profile
-    stats = {
-        'active_camps': DonationCamp.objects.filter(ngo=ngo_profile, is_active=True).count(),
-        'total_volunteers': ngo_profile.volunteers.count(),
-        'donations_to_verify': Donation.objects.filter(target_camp__ngo=ngo_profile, status='VERIFYING').count(),
-        'total_donations_received': Donation.objects.filter(target_camp__ngo=ngo_profile, status='DELIVERED').count()
-    }
+    ngo_profile = request.profile
+    stats = get_ngo_stats(ngo_profile.pk)
     context = {'stats': stats}
     return render(request, 'ngo/dashboard_overview.html', context)
 
 @login_required(login_url='login_page')
 @user_type_required('NGO')
 def ngo_manage_camps(request):
-    ngo_profile = request.user.ngo_profile
+    ngo_profile = request.profile
     view_param = request.GET.get('view', None)
 
+    completed_camps = DonationCamp.objects.filter(ngo=ngo_profile, is_active=False)
+    delivered_donations = Donation.objects.filter(
+        target_camp__ngo=ngo_profile, 
+        status='DELIVERED'
+    ).select_related('restaurant', 'assigned_volunteer', 'target_camp')
+    donations_to_verify = Donation.objects.filter(
+        target_camp__ngo=ngo_profile,
+        status='VERIFYING'
+    ).select_related('restaurant', 'assigned_volunteer', 'target_camp')
+    fragment = requested_fragment(request)
+    if fragment == 'completed':
+        page = paginate_request(request, 'completed', completed_camps, ('-completed_at', '-pk'))
+        return fragment_response(request, 'ngo/partials/completed_camp_rows.html', {'completed_camps': page}, page)
+    if fragment == 'delivered':
+        page = paginate_request(request, 'delivered', delivered_donations, ('-delivered_at', '-pk'))
+        return fragment_response(request, 'ngo/partials/delivered_donation_rows.html', {'delivered_donations': page}, page)
+    if fragment == 'verify':
+        page = paginate_request(request, 'verify', donations_to_verify, ('delivered_at', 'pk'))
+        return fragment_response(request, 'ngo/partials/verify_rows.html', {'donations_to_verify': page}, page)
+
     if request.method == 'POST':
         form = DonationCampForm(request.POST)
         if form.is_valid():
@@ -39,22 +56,13 @@ def ngo_manage_camps(request):
 
     # Optimized queries with select_related for foreign keys
     active_camps = DonationCamp.objects.filter(ngo=ngo_profile, is_active=True).order_by('start_time')
-    completed_camps = DonationCamp.objects.filter(ngo=ngo_profile, is_active=False).order_by('-completed_at')
-    donations_to_verify = Donation.objects.filter(
-        target_camp__ngo=ngo_profile, 
-        status='VERIFYING'
-    ).select_related('restaurant', 'assigned_volunteer', 'target_camp').order_by('delivered_at')
-    delivered_donations = Donation.objects.filter(
-        target_camp__ngo=ngo_profile, 
-        status='DELIVERED'
-    ).select_related('restaurant', 'assigned_volunteer', 'target_camp').order_by('-delivered_at')[:50]
     
     context = {
         'form': form, 
         'active_camps': active_camps, 
-        'completed_camps': completed_camps, 
-        'donations_to_verify': donations_to_verify,
-        'delivered_donations': delivered_donations,
+        'completed_camps': paginate_request(request, 'completed', completed_camps, ('-completed_at', '-pk')), 
+        'donations_to_verify': paginate_request(request, 'verify', donations_to_verify, ('delivered_at', 'pk')),
+        'delivered_donations': paginate_request(request, 'delivered', delivered_donations, ('-delivered_at', '-pk')),
         'active_tab': view_param
     }
     return render(request, 'ngo/manage_camps.html', context)
@@ -62,9 +70,10 @@ def ngo_manage_camps(request):
 @login_required(login_url='login_page')
 @user_type_required('NGO')
 def ngo_manage_volunteers(request):
-    ngo_profile = request.user.ngo_profile
-    # Optimized query with annotation for active deliveries count
-    registered_volunteers = ngo_profile.volunteers.annotate(
+    ngo_profile = request.profile
+    # Optimized query with annotation for active deliveries count; the
+    # template shows each volunteer's email, so fetch the users alongside.
+    registered_volunteers = ngo_profile.volunteers.select_related('user').annotate(
         active_deliveries=Count(
             'assigned_donations', 
             filter=Q(assigned_donations__status__in=['ACCEPTED', 'COLLECTED'])
@@ -2,42 +2,38 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-import json
-from ..models import Donation, DonationCamp, RestaurantProfile, VolunteerProfile
+from ..models import Donation, RestaurantProfile
 from ..forms import DonationForm, RestaurantProfileForm
+from .. import realtime
 from ..decorators import user_type_required
-from django.conf import settings
-from pywebpush import webpush
+from ..notifications import notify_new_donation
+from ..stats import get_restaurant_stats
+from ..page_cache import get_camps_map_json
+from ..pagination import fragment_response, paginate_request, requested_fragment
 
 
 @login_required(login_url='login_page')
 @user_type_required('RESTAURANT')
 def restaurant_dashboard(request):
-    restaurant_profile = request.user.restaurant_profile
-    stats = {
-        'total_donations': Donation.objects.filter(restaurant=restaurant_profile).count(),
-        'pending_donations': Donation.objects.filter(restaurant=restaurant_profile, status='PENDING').count(),
-        'active_donations': Donation.objects.filter(restaurant=restaurant_profile, status__in=['ACCEPTED', 'COLLECTED']).count(),
-        'completed_donations': Donation.objects.filter(restaurant=restaurant_profile, status='DELIVERED').count(),
-    }
-    
-    active_camps = DonationCamp.objects.filter(is_active=True).select_related('ngo')
-    camps_map_data = [
-        {"lat": c.latitude, "lon": c.longitude, "name": c.name, "ngo": c.ngo.ngo_name, "address": c.location_address} 
-        for c in active_camps if c.latitude and c.longitude
-    ]
+    restaurant_profile = request.profile
+    stats = get_restaurant_stats(restaurant_profile.pk)
     
     context = {
         'stats': stats,
-        'camps_map_data': json.dumps(camps_map_data)
+        'camps_map_data': get_camps_map_json()
     }
     return render(request, 'restaurant/dashboard.html', context)
 
 @login_required(login_url='login_page')
 @user_type_required('RESTAURANT')
 def restaurant_donations(request):
-    restaurant_profile = request.user.restaurant_profile
-    
+    restaurant_profile = request.profile
+    donations = Donation.objects.filter(restaurant=restaurant_profile)
+
+    if requested_fragment(request) == 'donations':
+        page = paginate_request(request, 'donations', donations, ('-created_at', '-pk'))
+        return fragment_response(request, 'restaurant/partials/donation_rows.html', {'donations': page}, page)
+
     if request.method == 'POST':
         form = DonationForm(request.POST)
         if form.is_valid():
@@ -45,36 +41,11 @@ def restaurant_donations(request):
             donation.restaurant = restaurant_profile
             donation.save()
             messages.success(request, 'New donation posted successfully!')
+            realtime.publish(realtime.CREATED, [donation.pk])
             
-            # Send webpush notifications
+            # Send webpush notifications in the background
             try:
-                volunteers_with_subscription = VolunteerProfile.objects.exclude(
-                    webpush_subscription__isnull=True
-                ).exclude(webpush_subscription='')
-                
-                for volunteer in volunteers_with_subscription:
-                    try:
-                        # FIX: Check if subscription data exists before parsing
-                        if not volunteer.webpush_subscription:
-                            continue
-
-                        subscription_info = json.loads(volunteer.webpush_subscription)
-                        message_data = {
-                            'title': 'New Donation Available! 🍱',
-                            'body': f'{restaurant_profile.restaurant_name} posted: {donation.food_description}',
-                            'url': '/dashboard/volunteer/pickups/'
-                        }
-                        
-                        webpush(
-                            subscription_info=subscription_info,
-                            data=json.dumps(message_data),
-                            vapid_private_key=settings.WEBPUSH_SETTINGS['VAPID_PRIVATE_KEY'],
-                            vapid_claims={
-                                "sub": f"mailto:{settings.WEBPUSH_SETTINGS['VAPID_ADMIN_EMAIL']}"
-                            }
-                        )
-                    except Exception as e:
-                        print(f"Failed to send notification to {volunteer.full_name}: {e}")
+                notify_new_donation(donation)
             except Exception as e:
                 print(f"Webpush notification error: {e}")
             
@@ -82,10 +53,9 @@ def restaurant_donations(request):
     else:
         form = DonationForm(initial={'pickup_address': restaurant_profile.address})
         
-    donations = Donation.objects.filter(restaurant=restaurant_profile).order_by('-created_at')
     context = {
         'form': form, 
-        'donations': donations,
+        'donations': paginate_request(request, 'donations', donations, ('-created_at', '-pk')),
         'default_address': restaurant_profile.address
     }
     return render(request, 'restaurant/donations.html', context)
@@ -1,33 +1,75 @@
 # portal/views/volunteer_views.py
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.utils import timezone
-from datetime import timedelta
 import json
-from ..models import Donation, DonationCamp, NGOProfile, VolunteerProfile
+import math
+from ..models import Donation, DonationCamp, LeaderboardEntry, NGOProfile, VolunteerProfile
 from ..forms import VolunteerProfileForm
 from django.contrib import messages
-from geopy.distance import geodesic
-from django.http import JsonResponse
-from django.db import transaction
+from django.http import Http404, JsonResponse
 from ..decorators import user_type_required
+from ..geo import nearby_donations
+from ..stats import get_volunteer_stats
+from ..search import search
+from ..pagination import (
+    KeysetPage, decode_values, default_page_size, encode_cursor, fragment_response,
+    link_page, paginate_request, request_cursor, requested_fragment,
+)
+from .. import dispatch, leaderboard, routes, transitions
 from django.conf import settings
 
 
+def get_available_donations(volunteer_profile, queryset=None, radius_km=None, limit=None):
+    """
+    Pending donations to show a volunteer: nearest first within the configured
+    radius when their location is known, otherwise the most recent ones.
+    """
+    if queryset is None:
+        queryset = Donation.objects.filter(status='PENDING')
+    if volunteer_profile.latitude and volunteer_profile.longitude:
+        return nearby_donations(queryset, volunteer_profile.latitude, volunteer_profile.longitude, radius_km=radius_km, limit=limit)
+    limit = limit or settings.NEARBY_DONATIONS_LIMIT
+    return list(queryset.select_related('restaurant').order_by('-created_at')[:limit])
+
+
+def paginate_available_donations(request, volunteer_profile, queryset):
+    """
+    One page of ``get_available_donations`` for the pickups list. Nearby
+    results are paged by ``(distance, pk)``, the rest by creation time.
+    """
+    if not (volunteer_profile.latitude and volunteer_profile.longitude):
+        # Search results come best match first; otherwise newest first.
+        ordering = ('search_rank', 'pk') if 'search_rank' in queryset.query.annotations else ('-created_at', '-pk')
+        return paginate_request(request, 'available', queryset.select_related('restaurant'), ordering)
+
+    after = None
+    cursor = request_cursor(request, 'available')
+    if cursor:
+        try:
+            after_km, after_pk = decode_values(cursor)
+            after = (float(after_km), int(after_pk))
+        except (TypeError, ValueError):
+            pass
+    page_size = default_page_size()
+    donations = nearby_donations(
+        queryset, volunteer_profile.latitude, volunteer_profile.longitude,
+        limit=page_size + 1, after=after,
+    )
+    page = KeysetPage(donations[:page_size])
+    if len(donations) > page_size:
+        last = donations[page_size - 1]
+        page.next_cursor = encode_cursor([last.distance_km, last.pk])
+    return link_page(request, 'available', page)
+
+
 @login_required(login_url='login_page')
 @user_type_required('VOLUNTEER')
 def volunteer_dashboard(request):
-    volunteer_profile = request.user.volunteer_profile
+    volunteer_profile = request.profile
     
-    stats = {
-        'active_pickups': Donation.objects.filter(assigned_volunteer=volunteer_profile, status__in=['ACCEPTED', 'COLLECTED']).count(),
-        'completed_deliveries': Donation.objects.filter(assigned_volunteer=volunteer_profile, status='DELIVERED').count(),
-        'registered_ngos': volunteer_profile.registered_ngos.count(),
-        'available_donations': Donation.objects.filter(status='PENDING').count(),
-    }
+    stats = get_volunteer_stats(volunteer_profile.pk)
 
-    # Optimized queries with select_related
-    available_donations = Donation.objects.filter(status='PENDING').select_related('restaurant').order_by('-created_at')
+    available_donations = get_available_donations(volunteer_profile)
     upcoming_camps = DonationCamp.objects.filter(
         ngo__in=volunteer_profile.registered_ngos.all(), 
         is_active=True
@@ -51,71 +93,63 @@ def volunteer_dashboard(request):
 @login_required(login_url='login_page')
 @user_type_required('VOLUNTEER')
 def volunteer_manage_pickups(request):
-    volunteer_profile = request.user.volunteer_profile
+    volunteer_profile = request.profile
     view = request.GET.get('view')
+    fragment = requested_fragment(request)
     
-    thirty_minutes_ago = timezone.now() - timedelta(minutes=30)
-    Donation.objects.filter(status='ACCEPTED', accepted_at__lt=thirty_minutes_ago).update(status='PENDING', assigned_volunteer=None, accepted_at=None)
-
     # Optimized queries with select_related for foreign keys
     active_donations = Donation.objects.filter(
         assigned_volunteer=volunteer_profile, 
         status__in=['ACCEPTED', 'COLLECTED']
     ).select_related('restaurant').order_by('accepted_at')
     
-    delivery_history = Donation.objects.filter(
+    history_donations = Donation.objects.filter(
         assigned_volunteer=volunteer_profile, 
         status__in=['VERIFYING', 'DELIVERED']
-    ).select_related('restaurant', 'target_camp').order_by('-delivered_at')
-    
-    available_donations = Donation.objects.filter(
-        status='PENDING'
-    ).select_related('restaurant').order_by('-created_at')
+    ).select_related('restaurant', 'target_camp')
+    if fragment == 'history':
+        page = paginate_request(request, 'history', history_donations, ('-delivered_at', '-pk'))
+        return fragment_response(request, 'volunteer/partials/history_rows.html', {'delivery_history': page}, page)
     
     # Get search query
     search_query = request.GET.get('q', '').strip()
     
+    pending_donations = Donation.objects.filter(status='PENDING')
     # Apply search filter
     if search_query:
-        from django.db.models import Q
-        available_donations = available_donations.filter(
-            Q(restaurant__restaurant_name__icontains=search_query) |
-            Q(pickup_address__icontains=search_query)
-        )
+        pending_donations = search(pending_donations, search_query)
+    can_accept = active_donations.count() < transitions.MAX_ACTIVE_PICKUPS
+    suggested_ids = dispatch.suggested_donation_ids(volunteer_profile)
+    if fragment == 'available':
+        page = paginate_available_donations(request, volunteer_profile, pending_donations)
+        return fragment_response(request, 'volunteer/partials/available_donation_rows.html', {'available_donations': page, 'can_accept': can_accept, 'suggested_ids': suggested_ids}, page)
 
     context = {
         'active_donations': active_donations,
-        'available_donations': available_donations,
-        'delivery_history': delivery_history,
+        'can_accept': can_accept,
+        'suggested_ids': suggested_ids,
         'view': view
     }
+    if view != 'delivery_route':
+        context['available_donations'] = paginate_available_donations(request, volunteer_profile, pending_donations)
+    context['delivery_history'] = paginate_request(request, 'history', history_donations, ('-delivered_at', '-pk'))
 
     if view == 'delivery_route':
         if not volunteer_profile.latitude or not volunteer_profile.longitude:
             messages.error(request, 'Please set your location in your profile before calculating routes.')
             return redirect('volunteer_profile')
         
-        volunteer_location = (volunteer_profile.latitude, volunteer_profile.longitude)
-        active_camps = DonationCamp.objects.filter(ngo__in=volunteer_profile.registered_ngos.all(), is_active=True)
-        
-        nearest_camp = None
-        min_dist = float('inf')
-
-        for camp in active_camps:
-            if camp.latitude and camp.longitude:
-                dist = geodesic(volunteer_location, (camp.latitude, camp.longitude)).km
-                if dist < min_dist:
-                    min_dist = dist
-                    nearest_camp = camp
-        
+        # Pickups in visiting order, ending at the best camp for them.
+        route = routes.plan_route(volunteer_profile)
+        nearest_camp = route['camp']
         context['nearest_camp'] = nearest_camp
-        
+        context['route_data'] = route
         if nearest_camp:
             context['nearest_camp_data'] = {
-                'name': nearest_camp.name,
-                'latitude': nearest_camp.latitude,
-                'longitude': nearest_camp.longitude,
-                'pk': nearest_camp.pk
+                'name': nearest_camp['name'],
+                'latitude': nearest_camp['latitude'],
+                'longitude': nearest_camp['longitude'],
+                'pk': nearest_camp['pk']
             }
         context['volunteer_location_data'] = {
             'lat': volunteer_profile.latitude,
@@ -125,27 +159,76 @@ def volunteer_manage_pickups(request):
     return render(request, 'volunteer/manage_pickups.html', context)
 
 
+@login_required(login_url='login_page')
+@user_type_required('VOLUNTEER')
+def nearby_donations_api(request):
+    """
+    JSON list of pending donations near a point, nearest first.
+
+    Query params: ``lat``/``lon`` (default to the volunteer's profile
+    location), ``radius`` in km (capped at the configured maximum) and
+    ``limit`` (between 1 and the configured limit).
+    """
+    volunteer_profile = request.profile
+    try:
+        lat = float(request.GET.get('lat') or volunteer_profile.latitude)
+        lon = float(request.GET.get('lon') or volunteer_profile.longitude)
+        radius_km = float(request.GET.get('radius') or settings.NEARBY_DONATIONS_RADIUS_KM)
+        limit = int(request.GET.get('limit') or settings.NEARBY_DONATIONS_LIMIT)
+        if not all(math.isfinite(value) for value in (lat, lon, radius_km)) or radius_km <= 0:
+            raise ValueError
+    except (TypeError, ValueError):
+        return JsonResponse({'success': False, 'message': 'A valid location is required.'}, status=400)
+    radius_km = min(radius_km, settings.NEARBY_DONATIONS_MAX_RADIUS_KM)
+    limit = max(1, min(limit, settings.NEARBY_DONATIONS_LIMIT))
+
+    donations = nearby_donations(Donation.objects.filter(status='PENDING'), lat, lon, radius_km=radius_km, limit=limit)
+    results = [{
+        'id': d.pk,
+        'restaurant': d.restaurant.restaurant_name,
+        'food': d.food_description,
+        'quantity': d.quantity,
+        'pickup_address': d.pickup_address,
+        'lat': d.restaurant.latitude,
+        'lon': d.restaurant.longitude,
+        'distance_km': round(d.distance_km, 2),
+    } for d in donations]
+    return JsonResponse({'success': True, 'radius_km': radius_km, 'count': len(results), 'results': results})
+
+
+@login_required(login_url='login_page')
+@user_type_required('VOLUNTEER')
+def volunteer_route_api(request):
+    """JSON pickup route through the volunteer's active donations to a camp."""
+    route = routes.plan_route(request.profile)
+    if route is None:
+        return JsonResponse({'success': False, 'message': 'Please set your location in your profile first.'}, status=400)
+    return JsonResponse({'success': True, **route})
+
+
 @login_required(login_url='login_page')
 @user_type_required('VOLUNTEER')
 def volunteer_manage_camps(request):
-    volunteer_profile = request.user.volunteer_profile
+    volunteer_profile = request.profile
     registered_ngos = volunteer_profile.registered_ngos.all()
     
     # Get search query
     search_query = request.GET.get('q', '').strip()
-    available_ngos = NGOProfile.objects.exclude(pk__in=[n.pk for n in registered_ngos])
+    available_ngos = NGOProfile.objects.exclude(volunteers=volunteer_profile)
     
+    ordering = ('ngo_name', 'pk')
     # Apply search filter
     if search_query:
-        from django.db.models import Q
-        available_ngos = available_ngos.filter(
-            Q(ngo_name__icontains=search_query) | 
-            Q(address__icontains=search_query)
-        )
+        available_ngos = search(available_ngos, search_query)
+        ordering = ('search_rank', 'pk')
+
+    page = paginate_request(request, 'ngos', available_ngos, ordering)
+    if requested_fragment(request) == 'ngos':
+        return fragment_response(request, 'volunteer/partials/ngo_rows.html', {'available_ngos': page}, page)
     
     context = {
         'registered_ngos': registered_ngos,
-        'available_ngos': available_ngos,
+        'available_ngos': page,
     }
     return render(request, 'volunteer/manage_camps.html', context)
 
@@ -181,7 +264,7 @@ def register_with_ngo(request, ngo_id):
     
     try:
         ngo = get_object_or_404(NGOProfile, pk=ngo_id)
-        volunteer = request.user.volunteer_profile
+        volunteer = request.profile
         ngo.volunteers.add(volunteer)
         return JsonResponse({'success': True, 'message': f'Successfully registered with {ngo.ngo_name}.'})
     except Exception as e:
@@ -196,7 +279,7 @@ def unregister_from_ngo(request, ngo_id):
         
     try:
         ngo = get_object_or_404(NGOProfile, pk=ngo_id)
-        volunteer = request.user.volunteer_profile
+        volunteer = request.profile
         ngo.volunteers.remove(volunteer)
         return JsonResponse({'success': True, 'message': f'Successfully unregistered from {ngo.ngo_name}.'})
     except Exception as e:
@@ -209,30 +292,14 @@ def accept_donation(request, donation_id):
     if request.method != 'POST':
         return JsonResponse({'success': False, 'message': 'Invalid request'}, status=400)
     
-    try:
-        with transaction.atomic():
-            donation = Donation.objects.select_for_update().get(pk=donation_id)
-            
-            if donation.status != 'PENDING':
-                return JsonResponse({'success': False, 'message': 'This donation is no longer available.'}, status=404)
-
-            volunteer = request.user.volunteer_profile
-
-            if Donation.objects.filter(assigned_volunteer=volunteer, status__in=['ACCEPTED', 'COLLECTED']).count() >= 10:
-                return JsonResponse({'success': False, 'message': 'You cannot accept more than 10 donations at a time.'}, status=400)
-
-            donation.assigned_volunteer = volunteer
-            donation.status = 'ACCEPTED'
-            donation.accepted_at = timezone.now()
-            donation.save()
-            
-            return JsonResponse({'success': True, 'message': 'Donation accepted! Please check your active pickups.'})
-            
-    except Donation.DoesNotExist:
+    result = transitions.accept(donation_id, request.profile)
+    if result == transitions.UPDATED:
+        return JsonResponse({'success': True, 'message': 'Donation accepted! Please check your active pickups.'})
+    if result == transitions.LIMIT_REACHED:
+        return JsonResponse({'success': False, 'message': f'You cannot accept more than {transitions.MAX_ACTIVE_PICKUPS} donations at a time.'}, status=400)
+    if result == transitions.NOT_FOUND:
         return JsonResponse({'success': False, 'message': 'Donation not found.'}, status=404)
-    except Exception as e:
-        print(f"Error in accept_donation: {e}")
-        return JsonResponse({'success': False, 'message': 'An unexpected error occurred.'}, status=500)
+    return JsonResponse({'success': False, 'message': 'This donation is no longer available.'}, status=404)
 
 @login_required(login_url='login_page')
 @user_type_required('VOLUNTEER')
@@ -240,22 +307,14 @@ def mark_as_collected(request, donation_id):
     if request.method != 'POST':
         return JsonResponse({'success': False, 'message': 'Invalid request.'}, status=400)
 
-    try:
-        donation = get_object_or_404(Donation, pk=donation_id)
-        if donation.assigned_volunteer != request.user.volunteer_profile:
-             return JsonResponse({'success': False, 'message': 'Unauthorized.'}, status=403)
-
-        if donation.status != 'ACCEPTED':
-            return JsonResponse({'success': False, 'message': 'Invalid donation status.'}, status=400)
-
-        donation.status = 'COLLECTED'
-        donation.collected_at = timezone.now()
-        donation.save()
-
+    result = transitions.collect(donation_id, request.profile)
+    if result == transitions.UPDATED:
         return JsonResponse({'success': True, 'message': 'Marked as collected!'})
-    except Exception as e:
-        print(f"Error in mark_as_collected: {e}")
-        return JsonResponse({'success': False, 'message': 'An error occurred.'}, status=500)
+    if result == transitions.NOT_FOUND:
+        return JsonResponse({'success': False, 'message': 'Donation not found.'}, status=404)
+    if result == transitions.FORBIDDEN:
+        return JsonResponse({'success': False, 'message': 'Unauthorized.'}, status=403)
+    return JsonResponse({'success': False, 'message': 'Invalid donation status.'}, status=400)
 
 
 @login_required(login_url='login_page')
@@ -263,16 +322,8 @@ def mark_as_collected(request, donation_id):
 def mark_as_delivered(request, camp_id):
     if request.method != 'POST': 
         return redirect('index')
-    donations = Donation.objects.filter(assigned_volunteer=request.user.volunteer_profile, status__in=['ACCEPTED', 'COLLECTED'])
     camp = get_object_or_404(DonationCamp, pk=camp_id)
-    
-    updated_count = 0
-    for donation in donations:
-        donation.status = 'VERIFYING'
-        donation.target_camp = camp
-        donation.delivered_at = timezone.now()
-        donation.save()
-        updated_count += 1
+    updated_count = transitions.count_updated(transitions.deliver_to_camp(request.profile, camp))
         
     if updated_count > 0:
         messages.success(request, f'{updated_count} item(s) marked as delivered and are pending verification by the NGO.')
@@ -281,6 +332,28 @@ def mark_as_delivered(request, camp_id):
 
     return redirect('volunteer_manage_pickups')
 
+
+@login_required(login_url='login_page')
+@user_type_required('VOLUNTEER')
+def deliver_donations_batch(request, camp_id):
+    """
+    Hand over several active pickups at ``camp_id`` in one request.
+
+    Body: ``{"donation_ids": [...]}`` (JSON or form data); omit it to deliver
+    every active pickup. Responds with the outcome for each donation.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'Invalid request.'}, status=400)
+    try:
+        donation_ids = transitions.donation_ids_from_request(request)
+    except (TypeError, ValueError) as e:
+        return JsonResponse({'success': False, 'message': f'Invalid data: {e}'}, status=400)
+
+    camp = get_object_or_404(DonationCamp, pk=camp_id)
+    results = transitions.deliver_to_camp(request.profile, camp, donation_ids)
+    updated = transitions.count_updated(results)
+    return JsonResponse({'success': updated > 0, 'updated': updated, 'results': results})
+
 @login_required(login_url='login_page')
 @user_type_required('VOLUNTEER')
 def save_webpush_subscription(request):
@@ -300,7 +373,7 @@ def save_webpush_subscription(request):
         # ADD THIS: Log the data received from the frontend
         print("Subscription data received:", data)
         
-        volunteer_profile = request.user.volunteer_profile
+        volunteer_profile = request.profile
         volunteer_profile.webpush_subscription = json.dumps(data)
         volunteer_profile.save()
         
@@ -315,19 +388,33 @@ def save_webpush_subscription(request):
 @login_required(login_url='login_page')
 def volunteer_leaderboard(request):
     """Display volunteer leaderboard with rankings based on deliveries and ratings"""
-    from django.db.models import Count, Avg, F, Q, Value, FloatField
-    from django.db.models.functions import Coalesce
-    
-    # Calculate volunteer scores: total deliveries + weighted average rating
-    volunteers = VolunteerProfile.objects.annotate(
-        total_deliveries=Count('assigned_donations', filter=Q(assigned_donations__status='DELIVERED')),
-        avg_rating=Coalesce(Avg('assigned_donations__rating', filter=Q(assigned_donations__rating__isnull=False)), Value(0.0), output_field=FloatField()),
-        score=F('total_deliveries') + F('avg_rating') * 2  # Weight rating with factor of 2
-    ).filter(
-        total_deliveries__gt=0  # Only show volunteers with at least 1 delivery
-    ).order_by('-score', '-total_deliveries')[:20]  # Top 20
-    
+    window = request.GET.get('window', LeaderboardEntry.Window.ALL_TIME).upper()
+    if window not in LeaderboardEntry.Window.values:
+        window = LeaderboardEntry.Window.ALL_TIME
+
+    scope = LeaderboardEntry.GLOBAL_SCOPE
+    scope_ngo = None
+    if request.GET.get('ngo'):
+        try:
+            ngo_pk = int(request.GET['ngo'])
+        except ValueError:
+            raise Http404('No NGO matches the given query.')
+        scope_ngo = get_object_or_404(NGOProfile, pk=ngo_pk)
+        scope = scope_ngo.pk
+
+    my_rank, my_entry = None, None
+    registered_ngos = []
+    if request.user.user_type == 'VOLUNTEER':
+        my_rank, my_entry = leaderboard.rank_of(request.user.pk, window=window, scope=scope)
+        registered_ngos = NGOProfile.objects.filter(volunteers__pk=request.user.pk).only('pk', 'ngo_name')
+
     context = {
-        'volunteers': volunteers
+        'entries': leaderboard.top(window=window, scope=scope, limit=20),
+        'window': window,
+        'windows': LeaderboardEntry.Window.choices,
+        'scope_ngo': scope_ngo,
+        'registered_ngos': registered_ngos,
+        'my_rank': my_rank,
+        'my_entry': my_entry,
     }
-    return render(request, 'volunteer/leaderboard.html', context)
\ No newline at end of file
+    return render(request, 'volunteer/leaderboard.html', context)
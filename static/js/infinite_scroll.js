@@ -0,0 +1,64 @@
+/**
+ * Infinite scroll for paginated lists
+ *
+ * A list that has more rows renders a `.load-more` sentinel (see
+ * templates/components/load_more.html) with the URL of the next fragment in
+ * `data-next-url` and the element to append to in `data-target`. When the
+ * sentinel scrolls into view, or its button is clicked, the next rows are
+ * fetched and appended; the response's `X-Next-Url` header points at the page
+ * after that, or is empty when the list is complete.
+ */
+
+/**
+ * Fetch and append the next page behind one sentinel
+ * @param {HTMLElement} sentinel - The `.load-more` element
+ */
+function loadMore(sentinel) {
+    const url = sentinel.dataset.nextUrl;
+    const target = document.querySelector(sentinel.dataset.target);
+    if (!url || !target || sentinel.dataset.loading) return;
+
+    sentinel.dataset.loading = '1';
+    fetch(url, { headers: { 'X-Requested-With': 'XMLHttpRequest' }, credentials: 'same-origin' })
+        .then(response => {
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            const nextUrl = response.headers.get('X-Next-Url');
+            return response.text().then(html => ({ html, nextUrl }));
+        })
+        .then(({ html, nextUrl }) => {
+            target.insertAdjacentHTML('beforeend', html);
+            if (nextUrl) {
+                sentinel.dataset.nextUrl = nextUrl;
+            } else {
+                sentinel.remove();
+            }
+        })
+        .catch(error => {
+            console.error('Could not load more rows:', error);
+        })
+        .finally(() => {
+            delete sentinel.dataset.loading;
+        });
+}
+
+/**
+ * Wire up every sentinel on the page
+ */
+function initInfiniteScroll() {
+    const sentinels = document.querySelectorAll('.load-more[data-next-url]');
+    sentinels.forEach(sentinel => {
+        const button = sentinel.querySelector('button');
+        if (button) button.addEventListener('click', () => loadMore(sentinel));
+    });
+
+    if (!('IntersectionObserver' in window)) return;
+    const observer = new IntersectionObserver(entries => {
+        entries.forEach(entry => {
+            // Lists in hidden tabs have no size and never intersect.
+            if (entry.isIntersecting && entry.target.isConnected) loadMore(entry.target);
+        });
+    }, { rootMargin: '200px' });
+    sentinels.forEach(sentinel => observer.observe(sentinel));
+}
+
+document.addEventListener('DOMContentLoaded', initInfiniteScroll);
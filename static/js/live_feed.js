@@ -0,0 +1,110 @@
+/**
+ * Live donation feed
+ *
+ * Opens the dashboard WebSocket (see portal/consumers.py) and applies each
+ * event (`{event, donations: [{id, status, status_display}]}`) to the page
+ * instead of reloading it:
+ *
+ * - `[data-donation-status="<id>"]` badges show the new status;
+ * - containers with `data-live-remove="<events>"` drop their
+ *   `[data-donation-id="<id>"]` rows on those events;
+ * - containers with `data-live-refresh="<events>"` and
+ *   `data-live-fragment="<list>"` reload the first page of that list (see
+ *   static/js/infinite_scroll.js for the fragment protocol).
+ */
+
+const LIVE_FEED_PATH = '/ws/feed/';
+const LIVE_FEED_MAX_DELAY = 30000;
+
+/**
+ * Whether a container reacts to an event through one of its attributes
+ * @param {HTMLElement} element - The container
+ * @param {string} attribute - `liveRemove` or `liveRefresh`
+ * @param {string} event - The event name
+ */
+function listensFor(element, attribute, event) {
+    return (element.dataset[attribute] || '').split(/\s+/).includes(event);
+}
+
+/**
+ * Replace a list's rows with its first page
+ * @param {HTMLElement} container - Element with `data-live-fragment`
+ */
+function refreshLiveList(container) {
+    const url = new URL(window.location.href);
+    const name = container.dataset.liveFragment;
+    url.searchParams.set('fragment', name);
+    url.searchParams.delete(`${name}_cursor`);
+
+    fetch(url, { headers: { 'X-Requested-With': 'XMLHttpRequest' }, credentials: 'same-origin' })
+        .then(response => {
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            const nextUrl = response.headers.get('X-Next-Url');
+            return response.text().then(html => ({ html, nextUrl }));
+        })
+        .then(({ html, nextUrl }) => {
+            container.innerHTML = html;
+            const sentinel = container.id && document.querySelector(`.load-more[data-target="#${container.id}"]`);
+            if (sentinel) {
+                if (nextUrl) {
+                    sentinel.dataset.nextUrl = nextUrl;
+                } else {
+                    sentinel.remove();
+                }
+            }
+        })
+        .catch(error => {
+            console.error('Could not refresh list:', error);
+        });
+}
+
+/**
+ * Apply one feed message to the page
+ * @param {Object} message - `{event, donations}`
+ */
+function applyLiveEvent(message) {
+    const ids = new Set(message.donations.map(donation => String(donation.id)));
+
+    message.donations.forEach(donation => {
+        document.querySelectorAll(`[data-donation-status="${donation.id}"]`).forEach(badge => {
+            badge.textContent = donation.status_display;
+            badge.className = `status-badge status-${donation.status.toLowerCase()}`;
+        });
+    });
+
+    document.querySelectorAll('[data-live-remove]').forEach(container => {
+        if (!listensFor(container, 'liveRemove', message.event)) return;
+        container.querySelectorAll('[data-donation-id]').forEach(row => {
+            if (ids.has(row.dataset.donationId)) row.remove();
+        });
+    });
+
+    document.querySelectorAll('[data-live-refresh]').forEach(container => {
+        if (listensFor(container, 'liveRefresh', message.event)) refreshLiveList(container);
+    });
+}
+
+/**
+ * Connect, and reconnect with backoff whenever the socket drops
+ * @param {number} delay - Milliseconds to wait before the next attempt
+ */
+function connectLiveFeed(delay = 1000) {
+    const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+    const socket = new WebSocket(`${scheme}://${window.location.host}${LIVE_FEED_PATH}`);
+
+    socket.addEventListener('open', () => { delay = 1000; });
+    socket.addEventListener('message', event => {
+        try {
+            applyLiveEvent(JSON.parse(event.data));
+        } catch (error) {
+            console.error('Bad live feed message:', error);
+        }
+    });
+    socket.addEventListener('close', () => {
+        setTimeout(() => connectLiveFeed(Math.min(delay * 2, LIVE_FEED_MAX_DELAY)), delay);
+    });
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    if ('WebSocket' in window) connectLiveFeed();
+});
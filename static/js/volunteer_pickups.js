@@ -5,6 +5,15 @@
 
 let deliveryMapInstance = null;
 
+/**
+ * Escape text (restaurant names, food descriptions, camp names) for use in HTML
+ */
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text == null ? '' : String(text);
+    return div.innerHTML.replace(/"/g, '&quot;').replace(/'/g, '&#39;');
+}
+
 /**
  * Initialize the page when DOM is ready
  */
@@ -67,17 +76,28 @@ function initializeDeliveryRouteMap() {
     const csrftoken = getCookie('csrftoken');
     const deliveryFormAction = `/donation/deliver/to/${campData.pk}/`;
 
+    // Pickup stops in the order planned by the server (portal/routes.py)
+    const routeDataElement = document.getElementById('route-data');
+    const stops = routeDataElement ? JSON.parse(routeDataElement.textContent).stops : [];
+
     // Add routing control
     L.Routing.control({
         waypoints: [
             L.latLng(volunteerData.lat, volunteerData.lon),
+            ...stops.map(stop => L.latLng(stop.lat, stop.lon)),
             L.latLng(campData.latitude, campData.longitude)
         ],
         routeWhileDragging: false,
-        createMarker: (i, waypoint) => {
-            const markerContent = i === 0 
-                ? "<strong>Your Location</strong>" 
-                : `<strong>Nearest Camp:</strong><br>${campData.name}`;
+        createMarker: (i, waypoint, count) => {
+            let markerContent;
+            if (i === 0) {
+                markerContent = "<strong>Your Location</strong>";
+            } else if (i === count - 1) {
+                markerContent = `<strong>Drop-off Camp:</strong><br>${escapeHtml(campData.name)}`;
+            } else {
+                const stop = stops[i - 1];
+                markerContent = `<strong>Pickup ${i}:</strong> ${escapeHtml(stop.restaurant)}<br>${escapeHtml(stop.food)}`;
+            }
             
             return L.marker(waypoint.latLng, { draggable: false })
                 .bindPopup(markerContent);
@@ -92,6 +112,7 @@ function initializeDeliveryRouteMap() {
         
         deliveryInfo.innerHTML = `
             <div class="route-summary">
+                <p><strong>Stops:</strong> ${stops.length} pickup(s), then ${escapeHtml(campData.name)}</p>
                 <p><strong>Distance:</strong> ${distance} km</p>
                 <p><strong>Estimated Time:</strong> ${time} minutes</p>
                 <form action="${deliveryFormAction}" method="POST" style="margin-top: 1rem;">